@@ -5,8 +5,8 @@
  */
 #include "Diff_Mapping.hpp"
 namespace hydrogen_framework {
-void Diff_Mapping::putMapping(std::vector<sesElem> seqVector) {
-  for (auto iter : seqVector) {
+void Diff_Mapping::putMapping(const std::vector<sesElem> &seqVector) {
+  for (const auto &iter : seqVector) {
     elemInfo info;
     switch (iter.second.type) {
     case SES_ADD:
@@ -29,6 +29,8 @@ void Diff_Mapping::putMapping(std::vector<sesElem> seqVector) {
       break;
     }
     lineMap.push_back(info);
+    beforeToAfter.insert(std::pair<long long, long long>(info.beforeIdx, info.afterIdx));
+    afterToBefore.insert(std::pair<long long, long long>(info.afterIdx, info.beforeIdx));
   } // End loop for seqVector
 } // End putMapping
 
@@ -76,21 +78,19 @@ void Diff_Mapping::printFileInfo() {
   std::cout << "----\n";
 } // End printFileInfo
 
-long long Diff_Mapping::getAfterLineNumber(long long currLine) {
-  for (auto iter : lineMap) {
-    if (iter.beforeIdx == currLine) {
-      return iter.afterIdx;
-    } // End check for currLine
-  }   // End loop for lineMap
+long long Diff_Mapping::getAfterLineNumber(long long currLine) const {
+  auto findLine = beforeToAfter.find(currLine);
+  if (findLine != beforeToAfter.end()) {
+    return findLine->second;
+  } // End check for currLine
   return std::numeric_limits<unsigned>::max();
 } // End getNewLineNumber
 
-long long Diff_Mapping::getBeforeLineNumber(long long currLine) {
-  for (auto iter : lineMap) {
-    if (iter.afterIdx == currLine) {
-      return iter.beforeIdx;
-    } // End check for currLine
-  }   // End loop for lineMap
+long long Diff_Mapping::getBeforeLineNumber(long long currLine) const {
+  auto findLine = afterToBefore.find(currLine);
+  if (findLine != afterToBefore.end()) {
+    return findLine->second;
+  } // End check for currLine
   return std::numeric_limits<unsigned>::max();
 } // End getOldLineNumber
 } // namespace hydrogen_framework
@@ -10,6 +10,7 @@
 #include <iostream>
 #include <list>
 #include <regex>
+#include <unordered_map>
 #include <vector>
 namespace hydrogen_framework {
 /**
@@ -30,32 +31,32 @@ public:
   /**
    * Populate line mapping
    */
-  void putMapping(std::vector<sesElem> seqVector);
+  void putMapping(const std::vector<sesElem> &seqVector);
 
   /**
    * Return lineMap
    */
-  std::list<elemInfo> getMapping() { return lineMap; }
+  const std::list<elemInfo> &getMapping() const { return lineMap; }
 
   /**
    * Return fileName
    */
-  std::string getFileName() { return fileName; }
+  const std::string &getFileName() const { return fileName; }
 
   /**
    * Return addedLines
    */
-  std::list<long long> getAddedLines() { return addedLines; }
+  const std::list<long long> &getAddedLines() const { return addedLines; }
 
   /**
    * Return deletedLines
    */
-  std::list<long long> getDeletedLines() { return deletedLines; }
+  const std::list<long long> &getDeletedLines() const { return deletedLines; }
 
   /**
    * Return matchedLines
    */
-  std::map<long long, long long> getMatchedLines() { return matchedLines; }
+  const std::map<long long, long long> &getMatchedLines() const { return matchedLines; }
 
   /**
    * Print lineMap
@@ -86,13 +87,13 @@ public:
    * Get the afterIdx line number given the beforeIdx line number
    * Return unsigned MAX if line not found
    */
-  long long getAfterLineNumber(long long currLine);
+  long long getAfterLineNumber(long long currLine) const;
 
   /**
    * Get the beforeIdx line number given the afterIdx line number
    * Return unsigned MAX if line not found
    */
-  long long getBeforeLineNumber(long long currLine);
+  long long getBeforeLineNumber(long long currLine) const;
 
 private:
   std::string fileName;              /**< File Name */
@@ -101,6 +102,10 @@ private:
   std::list<long long> deletedLines; /**< Container for deleted line numbers */
   std::map<long long, long long>
       matchedLines; /**< Container for matched line numbers mapping from before to after lines*/
-};                  // End Diff_Mapping Class
+  std::unordered_map<long long, long long>
+      beforeToAfter; /**< Index of lineMap from beforeIdx to afterIdx, first entry wins */
+  std::unordered_map<long long, long long>
+      afterToBefore; /**< Index of lineMap from afterIdx to beforeIdx, first entry wins */
+};                   // End Diff_Mapping Class
 } // namespace hydrogen_framework
 #endif
@@ -42,6 +42,38 @@ void Diff_Ses::addSequence(elem e, long long beforeIdx, long long afterIdx, cons
 } // End addSequence
 
 void Diff_Util::compose() {
+  /* The common prefix and suffix are matched without searching for the edit path */
+  size_t prefix = 0;
+  while (prefix < M && prefix < N && idA[prefix] == idB[prefix]) {
+    ++prefix;
+  } // End loop for prefix
+  size_t suffix = 0;
+  while (suffix < M - prefix && suffix < N - prefix && idA[M - 1 - suffix] == idB[N - 1 - suffix]) {
+    ++suffix;
+  } // End loop for suffix
+  for (size_t i = 0; i < prefix; ++i) {
+    ses.addSequence(wasSwapped() ? B[i] : A[i], i + 1, i + 1, SES_COMMON);
+  } // End loop for prefix
+  sequence suffixElems(wasSwapped() ? B.end() - suffix : A.end() - suffix, wasSwapped() ? B.end() : A.end());
+  long long suffixBefore = (wasSwapped() ? N : M) - suffix;
+  long long suffixAfter = (wasSwapped() ? M : N) - suffix;
+  A = sequence(A.begin() + prefix, A.end() - suffix);
+  B = sequence(B.begin() + prefix, B.end() - suffix);
+  idA = std::vector<unsigned>(idA.begin() + prefix, idA.end() - suffix);
+  idB = std::vector<unsigned>(idB.begin() + prefix, idB.end() - suffix);
+  M = A.size();
+  N = B.size();
+  offset = M + 1;
+  prefixLength = prefix;
+  if (M > 0 || N > 0) {
+    composePath();
+  } // End check for elements between prefix and suffix
+  for (size_t i = 0; i < suffix; ++i) {
+    ses.addSequence(suffixElems[i], suffixBefore + i + 1, suffixAfter + i + 1, SES_COMMON);
+  } // End loop for suffix
+} // End compose
+
+void Diff_Util::composePath() {
   pathCordinates.reserve(MAX_CORDINATES_SIZE);
   long long p = -1;
   fp = new long long[M + N + 3];
@@ -79,15 +111,27 @@ ONP:
     goto ONP;
   } // End check for recordSequence
   delete[] this->fp;
-} // End compose
+} // End composePath
 
 void Diff_Util::init() {
   M = distance(A.begin(), A.end());
   N = distance(B.begin(), B.end());
+  /* Elements are compared by ID, so every distinct element is hashed only once */
+  std::unordered_map<std::string, unsigned> ids;
+  idA.reserve(M);
+  for (const auto &e : A) {
+    idA.push_back(ids.insert(std::make_pair(e, ids.size())).first->second);
+  } // End loop for A
+  idB.reserve(N);
+  for (const auto &e : B) {
+    idB.push_back(ids.insert(std::make_pair(e, ids.size())).first->second);
+  } // End loop for B
+  prefixLength = 0;
   if (M < N) {
     swapped = false;
   } else {
     std::swap(A, B);
+    std::swap(idA, idB);
     std::swap(M, N);
     swapped = true;
   } // End check for M < N
@@ -100,8 +144,7 @@ long long Diff_Util::snake(const long long &k, const long long &above, const lon
   long long r = above > below ? path[(size_t)k - 1 + offset] : path[(size_t)k + 1 + offset];
   long long y = std::max(above, below);
   long long x = y - k;
-  while ((size_t)x < M && (size_t)y < N &&
-         (swapped ? cmp.impl(B[(size_t)y], A[(size_t)x]) : cmp.impl(A[(size_t)x], B[(size_t)y]))) {
+  while ((size_t)x < M && (size_t)y < N && idA[(size_t)x] == idB[(size_t)y]) {
     ++x;
     ++y;
   } // End loop for swapped
@@ -127,27 +170,27 @@ bool Diff_Util::recordSequence(const editPathCordinates &v) {
     while (px_idx < v[i].x || py_idx < v[i].y) {
       if (v[i].y - v[i].x > py_idx - px_idx) {
         if (!wasSwapped()) {
-          ses.addSequence(*y, 0, y_idx, SES_ADD);
+          ses.addSequence(*y, 0, prefixLength + y_idx, SES_ADD);
         } else {
-          ses.addSequence(*y, y_idx, 0, SES_DELETE);
+          ses.addSequence(*y, prefixLength + y_idx, 0, SES_DELETE);
         } // End check for wasSwapped
         ++y;
         ++y_idx;
         ++py_idx;
       } else if (v[i].y - v[i].x < py_idx - px_idx) {
         if (!wasSwapped()) {
-          ses.addSequence(*x, x_idx, 0, SES_DELETE);
+          ses.addSequence(*x, prefixLength + x_idx, 0, SES_DELETE);
         } else {
-          ses.addSequence(*x, 0, x_idx, SES_ADD);
+          ses.addSequence(*x, 0, prefixLength + x_idx, SES_ADD);
         } // End check for wasSwapped
         ++x;
         ++x_idx;
         ++px_idx;
       } else {
         if (!wasSwapped()) {
-          ses.addSequence(*x, x_idx, y_idx, SES_COMMON);
+          ses.addSequence(*x, prefixLength + x_idx, prefixLength + y_idx, SES_COMMON);
         } else {
-          ses.addSequence(*y, y_idx, x_idx, SES_COMMON);
+          ses.addSequence(*y, prefixLength + y_idx, prefixLength + x_idx, SES_COMMON);
         } // End check for wasSwapped
         ++x;
         ++y;
@@ -168,6 +211,8 @@ bool Diff_Util::recordSequence(const editPathCordinates &v) {
     sequence B_(B.begin() + (size_t)y_idx - 1, B.end());
     A = A_;
     B = B_;
+    idA.erase(idA.begin(), idA.begin() + (size_t)x_idx - 1);
+    idB.erase(idB.begin(), idB.begin() + (size_t)y_idx - 1);
     M = distance(A.begin(), A.end());
     N = distance(B.begin(), B.end());
     delta = N - M;
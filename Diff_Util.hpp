@@ -8,28 +8,9 @@
 
 #include <list>
 #include <string>
+#include <unordered_map>
 #include <vector>
 namespace hydrogen_framework {
-/**
- * DiffCompare Functor class
- */
-class Diff_Compare {
-public:
-  /**
-   * Constructor
-   */
-  Diff_Compare() {}
-  /**
-   * Virtual Destructor
-   */
-  virtual ~Diff_Compare() {}
-  /**
-   * Comparison function
-   * Return TRUE if equal
-   */
-  virtual inline bool impl(const std::string &e1, const std::string &e2) const { return e1 == e2; }
-};
-
 /**
  * Class to hold common/shared type definitions and variables
  */
@@ -216,12 +197,16 @@ public:
    * Compose Longest Common Subsequence and Shortest Edit Script.
    * The algorithm implemented here is based on "An O(NP) Sequence Comparison Algorithm"
    * described by Sun Wu, Udi Manber and Gene Myers
+   * The common prefix and suffix of the sequences are matched up front and only the rest is searched.
    */
   void compose();
 
 private:
   sequence A;                        /**< First sequence */
   sequence B;                        /**< Second sequence */
+  std::vector<unsigned> idA;         /**< Elements of A as IDs, equal elements of A and B share an ID */
+  std::vector<unsigned> idB;         /**< Elements of B as IDs, equal elements of A and B share an ID */
+  long long prefixLength;            /**< Length of the common prefix left out of A and B */
   size_t M;                          /**< M value */
   size_t N;                          /**< N value */
   size_t delta;                      /**< Delta */
@@ -231,12 +216,16 @@ private:
   editPath path;                     /**< Edit path */
   editPathCordinates pathCordinates; /**< Edit path coordinates */
   bool swapped;                      /**< Flag to check if sequence are swapped */
-  Diff_Compare cmp;                  /**< Comparison Functor */
   /**
    * Initialize
    */
   void init();
 
+  /**
+   * Search the edit path between A and B and record it
+   */
+  void composePath();
+
   /**
    * Search shortest path and record the path
    */
@@ -0,0 +1,52 @@
+/**
+ * @author Ashwin K J
+ * @file
+ * Implementing Dot_Writer.hpp
+ */
+#include "Dot_Writer.hpp"
+
+namespace hydrogen_framework {
+bool Dot_Writer::open(std::string fileName, bool compress) {
+  close();
+  if (compress) {
+    writerGzip = gzopen(fileName.c_str(), "wb");
+    return writerGzip != NULL;
+  } // End check for compress
+  writerFile.open(fileName, std::ios::trunc | std::ios::binary);
+  return writerFile.is_open();
+} // End open
+
+void Dot_Writer::close() {
+  flush();
+  if (writerGzip) {
+    gzclose(writerGzip);
+    writerGzip = NULL;
+  } // End check for writerGzip
+  if (writerFile.is_open()) {
+    writerFile.close();
+  } // End check for writerFile
+} // End close
+
+void Dot_Writer::writeEscaped(const std::string &text) {
+  size_t start = 0;
+  for (size_t pos = text.find('"'); pos != std::string::npos; pos = text.find('"', start)) {
+    writerBuffer.append(text, start, pos - start);
+    writerBuffer.append("\\\"");
+    start = pos + 1;
+  } // End loop for double quotes
+  writerBuffer.append(text, start, std::string::npos);
+  flushFull();
+} // End writeEscaped
+
+void Dot_Writer::flush() {
+  if (writerBuffer.empty()) {
+    return;
+  } // End check for empty buffer
+  if (writerGzip) {
+    gzwrite(writerGzip, writerBuffer.data(), writerBuffer.size());
+  } else if (writerFile.is_open()) {
+    writerFile.write(writerBuffer.data(), writerBuffer.size());
+  } // End check for output file
+  writerBuffer.clear();
+} // End flush
+} // namespace hydrogen_framework
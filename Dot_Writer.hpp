@@ -0,0 +1,91 @@
+/**
+ * @author Ashwin K J
+ * @file
+ * Dot_Writer class: Buffered writing of DOT files
+ */
+#ifndef DOT_WRITER_H
+#define DOT_WRITER_H
+
+#include <fstream>
+#include <iostream>
+#include <string>
+#include <zlib.h>
+
+namespace hydrogen_framework {
+/**
+ * Dot_Writer class: Collect the output in a buffer and write it to a plain or gzip compressed file in blocks
+ */
+class Dot_Writer {
+public:
+  /**
+   * Constructor
+   */
+  Dot_Writer() : writerGzip(NULL) { writerBuffer.reserve(writerBlockSize); }
+
+  /**
+   * Destructor
+   * Writes what is left in the buffer
+   */
+  ~Dot_Writer() { close(); }
+
+  /**
+   * Open fileName for writing, compressed with gzip if compress is TRUE
+   * Returns FALSE if the file cannot be opened
+   */
+  bool open(std::string fileName, bool compress);
+
+  /**
+   * Write what is left in the buffer and close the file
+   */
+  void close();
+
+  /**
+   * Append text to the output
+   */
+  Dot_Writer &operator<<(const std::string &text) {
+    writerBuffer.append(text);
+    flushFull();
+    return *this;
+  }
+
+  /**
+   * Append text to the output
+   */
+  Dot_Writer &operator<<(const char *text) {
+    writerBuffer.append(text);
+    flushFull();
+    return *this;
+  }
+
+  /**
+   * Append a number to the output
+   */
+  Dot_Writer &operator<<(unsigned number) { return *this << std::to_string(number); }
+
+  /**
+   * Append text to the output with its double quotes escaped, for use inside a quoted DOT label
+   */
+  void writeEscaped(const std::string &text);
+
+private:
+  static const size_t writerBlockSize = 1 << 16; /**< Buffer size after which the buffer is written out */
+  std::string writerBuffer;                      /**< Output not yet written */
+  std::ofstream writerFile;                      /**< Plain output file */
+  gzFile writerGzip;                             /**< Compressed output file */
+
+  /**
+   * Write the buffer to the file once it holds a block
+   */
+  void flushFull() {
+    if (writerBuffer.size() >= writerBlockSize) {
+      flush();
+    } // End check for full buffer
+  }
+
+  /**
+   * Write the buffer to the file
+   */
+  void flush();
+}; // End Dot_Writer class
+} // namespace hydrogen_framework
+#endif
@@ -7,8 +7,45 @@
 #include "Diff_Mapping.hpp"
 #include "Module.hpp"
 namespace hydrogen_framework {
+bool Hydrogen::parseOptions(int c, char *files[]) {
+  int index = 1;
+  for (; index < c; ++index) {
+    std::string option = files[index];
+    if (option.compare(0, 2, "--") != 0 || option == "--") {
+      break;
+    } // End check for option prefix
+    std::string name = option.substr(2);
+    std::string value;
+    auto equals = name.find('=');
+    if (equals != std::string::npos) {
+      value = name.substr(equals + 1);
+      name = name.substr(0, equals);
+    } // End check for option value
+    if (hydrogenKnownOptions.find(name) == hydrogenKnownOptions.end()) {
+      std::cerr << "Unknown option " << option << "\n";
+      return false;
+    } // End check for hydrogenKnownOptions
+    hydrogenOptions[name] = value;
+  } // End loop for options
+  hydrogenFirstInput = index;
+  return true;
+} // End parseOptions
+
+bool Hydrogen::getNumberOption(std::string name, unsigned long long &value) {
+  std::string option = getOption(name);
+  if (option.empty()) {
+    return true;
+  } // End check for option value
+  if (option.size() > 18 || !std::all_of(option.begin(), option.end(), ::isdigit)) {
+    std::cerr << "Unknown value " << option << " for --" << name << ", it should be a number\n";
+    return false;
+  } // End check for digits
+  value = std::stoull(option);
+  return true;
+} // End getNumberOption
+
 bool Hydrogen::validateInputs(int c, char *files[]) {
-  for (int index = 1; index < c; index++) {
+  for (int index = hydrogenFirstInput; index < c; index++) {
     std::string file = files[index];
     struct stat buffer;
     int status = stat(file.c_str(), &buffer);
@@ -24,10 +61,10 @@ bool Hydrogen::validateInputs(int c, char *files[]) {
   return true;
 } // End validateInputs
 
-bool Hydrogen::processInputs(int c, char *files[]) {
+bool Hydrogen::processInputs(int c, char *files[], bool load) {
   int countModules = 0;
   /* Getting all the modules first */
-  int index = 1;
+  int index = hydrogenFirstInput;
   for (; index < c; ++index) {
     std::string file = files[index];
     if (file == hydrogenDemarcation) {
@@ -35,13 +72,19 @@ bool Hydrogen::processInputs(int c, char *files[]) {
     } // End check for hydrogenDemarcation
     countModules++;
     Module *module = new Module();
+    if (!load || hasOption("stream")) {
+      module->setModuleFile(countModules, file);
+      hydrogenModules.push_back(module);
+      continue;
+    } // End check for stream option
+    Trace_Scope scope(hydrogenTrace, "load_module", countModules);
     if (!module->setModule(countModules, file)) {
       return false;
     } // End check for module
     hydrogenModules.push_back(module);
   } // End module loop
-  /* Getting the files associated with it */
-  bool filesForAllVersions = false;
+  /* Getting the files associated with it. A single version has no demarcation after its files */
+  bool filesForAllVersions = (countModules == 1);
   for (int i = 1; i <= countModules; ++i) {
     std::list<std::string> versionFiles;
     for (++index; index < c; ++index) {
@@ -68,4 +111,12 @@ bool Hydrogen::processInputs(int c, char *files[]) {
   } // End check for filesForAllVersions
   return true;
 } // End processInputs
+
+std::future<bool> Hydrogen::loadModuleAsync(Module *module) {
+  Trace &trace = hydrogenTrace;
+  return std::async(std::launch::async, [module, &trace]() {
+    Trace_Scope scope(trace, "load_module", module->getVersion());
+    return module->loadModule();
+  });
+} // End loadModuleAsync
 } // namespace hydrogen_framework
@@ -6,10 +6,14 @@
 #ifndef GET_INPUT_H
 #define GET_INPUT_H
 
+#include "Trace.hpp"
 #include <algorithm>
 #include <boost/algorithm/string.hpp>
 #include <boost/filesystem.hpp>
 #include <fstream>
+#include <future>
+#include <map>
+#include <set>
 #include <sys/stat.h>
 namespace hydrogen_framework {
 /* Forward declaration */
@@ -24,13 +28,50 @@ public:
    * Constructor for hydrogen class
    * Sets the demarcation variable
    */
-  Hydrogen() { hydrogenDemarcation = "::"; }
+  Hydrogen() {
+    hydrogenDemarcation = "::";
+    hydrogenFirstInput = 1;
+    hydrogenKnownOptions = {"dot",         "dot-gzip",    "max-path-time", "max-paths", "scope", "serve",
+                            "serve-cache", "snapshot-in", "snapshot-out",  "stream",    "trace"};
+  }
 
   /**
    * Destructor
    */
   ~Hydrogen() { hydrogenModules.clear(); }
 
+  /**
+   * Parse the --name[=value] options given before the first input.
+   * Returns FALSE if an option is not known.
+   */
+  bool parseOptions(int c, char *files[]);
+
+  /**
+   * Return TRUE if the option was given
+   */
+  bool hasOption(std::string name) { return hydrogenOptions.find(name) != hydrogenOptions.end(); }
+
+  /**
+   * Return the value of the option or an empty string if it was not given
+   */
+  std::string getOption(std::string name) { return hasOption(name) ? hydrogenOptions[name] : ""; }
+
+  /**
+   * Set value to the option as a number, it is left as it is if the option was given without a value.
+   * Returns FALSE if the value is not a number.
+   */
+  bool getNumberOption(std::string name, unsigned long long &value);
+
+  /**
+   * Return the given options and their values
+   */
+  const std::map<std::string, std::string> &getOptions() { return hydrogenOptions; }
+
+  /**
+   * Return the index of the first input after the options
+   */
+  int getFirstInput() { return hydrogenFirstInput; }
+
   /**
    * Validate provided inputs.
    * Returns FALSE if any of the provided input is not present.
@@ -40,17 +81,34 @@ public:
   /**
    * Process provided inputs.
    * Returns FALSE if any of the Module cannot be parsed properly.
+   * With --stream the Modules are only registered and are loaded later with loadModuleAsync.
+   * Without load the Modules are only registered as well, for the caller to load.
    */
-  bool processInputs(int c, char *files[]);
+  bool processInputs(int c, char *files[], bool load = true);
+
+  /**
+   * Load the Module on a background thread
+   * The future is FALSE if the Module cannot be parsed properly.
+   */
+  std::future<bool> loadModuleAsync(Module *module);
 
   /**
    * Return hydrogenModules
    */
   std::list<Module *> getModules() { return hydrogenModules; }
 
+  /**
+   * Return hydrogenTrace
+   */
+  Trace &getTrace() { return hydrogenTrace; }
+
 private:
-  std::string hydrogenDemarcation;     /**< Setting demarcation string for inputs */
-  std::list<Module *> hydrogenModules; /**< Container for storing LLVM Modules */
-};                                     // End hydrogen class
+  std::string hydrogenDemarcation;                    /**< Setting demarcation string for inputs */
+  std::list<Module *> hydrogenModules;                /**< Container for storing LLVM Modules */
+  int hydrogenFirstInput;                             /**< Index of the first input after the options */
+  std::set<std::string> hydrogenKnownOptions;         /**< Names of the accepted options */
+  std::map<std::string, std::string> hydrogenOptions; /**< Given options and their values */
+  Trace hydrogenTrace;                                /**< Timing of each phase */
+};                                                    // End hydrogen class
 } // namespace hydrogen_framework
 #endif
@@ -4,6 +4,7 @@
  * Implementing Graph.hpp
  */
 #include "Graph.hpp"
+#include "Dot_Writer.hpp"
 #include "Graph_Edge.hpp"
 #include "Graph_Function.hpp"
 #include "Graph_Instruction.hpp"
@@ -12,8 +13,76 @@ namespace hydrogen_framework {
 void Graph::pushGraphFunction(Graph_Function *func) {
   func->setGraph(this);
   graphFunctions.push_back(func);
+  for (auto line : func->getFunctionLines()) {
+    indexLine(line);
+  } // End loop for line
 } // End pushGraphFunction
 
+void Graph::indexLine(Graph_Line *line) {
+  invalidateLineIndex();
+  for (auto inst : line->getLineInstructions()) {
+    indexInstruction(inst);
+  } // End loop for inst
+} // End indexLine
+
+void Graph::indexInstruction(Graph_Instruction *inst) {
+  llvm::Instruction *I = inst->getInstructionPtr();
+  if (I) {
+    graphInstructionIndex.insert(std::make_pair(I, inst));
+    return;
+  } // End check for I
+  /* Instructions read from a snapshot have no LLVM instruction left to be found by */
+  if (!inst->isInstructionVirtual()) {
+    return;
+  } // End check for virtual node
+  /* Virtual nodes share their line number across versions, so they are known by function and line number */
+  Graph_Line *line = inst->getGraphLine();
+  std::pair<std::string, unsigned> key(line->getGraphFunction()->getFunctionName(),
+                                       line->getLineNumber(line->getLineGraphVersion()));
+  graphVirtualIndex.insert(std::make_pair(key, inst));
+} // End indexInstruction
+
+void Graph::releaseInstructions(llvm::Module *module) {
+  for (auto iter = graphInstructionIndex.begin(); iter != graphInstructionIndex.end();) {
+    if (iter->first->getModule() == module) {
+      iter->second->keepInstructionLabel();
+      iter = graphInstructionIndex.erase(iter);
+    } else {
+      ++iter;
+    } // End check for module
+  }   // End loop for graphInstructionIndex
+} // End releaseInstructions
+
+void Graph::buildLineIndex() {
+  graphLineIndex.clear();
+  for (auto func : graphFunctions) {
+    std::unordered_map<unsigned, std::list<Graph_Line *>> &fileLines = graphLineIndex[func->getFunctionFile()];
+    for (auto line : func->getFunctionLines()) {
+      std::list<Graph_Line *> &lines = fileLines[line->getLineNumber(graphVersion)];
+      /* Same line cannot be spread across functions. Hence keep the lines of the first function only */
+      if (lines.empty() || lines.front()->getGraphFunction() == func) {
+        lines.push_back(line);
+      } // End check for function of lines
+    }   // End loop for line
+  }     // End loop for func
+  graphLineIndexValid = true;
+} // End buildLineIndex
+
+std::list<Graph_Line *> Graph::findGraphLines(std::string fileName, unsigned lineNumber) {
+  if (!graphLineIndexValid) {
+    buildLineIndex();
+  } // End check for graphLineIndexValid
+  auto fileLines = graphLineIndex.find(fileName);
+  if (fileLines == graphLineIndex.end()) {
+    return std::list<Graph_Line *>();
+  } // End check for fileName
+  auto lines = fileLines->second.find(lineNumber);
+  if (lines == fileLines->second.end()) {
+    return std::list<Graph_Line *>();
+  } // End check for lineNumber
+  return lines->second;
+} // End findGraphLines
+
 void Graph::addEdge(Graph_Instruction *from, Graph_Instruction *to, Graph_Edge *edge) {
   from->pushEdgeInstruction(edge);
   to->pushEdgeInstruction(edge);
@@ -21,7 +90,7 @@ void Graph::addEdge(Graph_Instruction *from, Graph_Instruction *to, Graph_Edge *
 } // End addEdge
 
 void Graph::addSeqEdges(Graph_Line *line) {
-  std::list<Graph_Instruction *> instructions = line->getLineInstructions();
+  const std::vector<Graph_Instruction *> &instructions = line->getLineInstructions();
   for (auto inst = instructions.begin(), instEnd = instructions.end(); inst != instEnd; ++inst) {
     /* Double check to make sure it is not Br */
     llvm::Instruction *llvmInst = (*inst)->getInstructionPtr();
@@ -32,60 +101,41 @@ void Graph::addSeqEdges(Graph_Line *line) {
     }   // End check for llvmInst
     auto nextInst = std::next(inst);
     if (nextInst != instEnd) {
-      Graph_Edge *seqEdge = new Graph_Edge(*inst, *nextInst, Graph_Edge::SEQUENTIAL, graphVersion);
+      Graph_Edge *seqEdge = createEdge(*inst, *nextInst, Graph_Edge::SEQUENTIAL, graphVersion);
       addEdge(*inst, *nextInst, seqEdge);
     } // End check for instEnd
   }   // End loop for inst
 } // End addSeqEdges
 
 Graph_Instruction *Graph::findMatchedInstruction(llvm::Instruction *matchInst) {
-  for (auto func : graphFunctions) {
-    for (auto line : func->getFunctionLines()) {
-      for (auto inst : line->getLineInstructions()) {
-        if (inst->getInstructionPtr() == matchInst) {
-          return inst;
-        } // End check for matchInst
-      }   // End loop for inst
-    }     // End loop for line
-  }       // End loop for func
+  auto findInst = graphInstructionIndex.find(matchInst);
+  if (findInst != graphInstructionIndex.end()) {
+    return findInst->second;
+  } // End check for matchInst
   return NULL;
 } // End findMatchedInstruction
 
-Graph_Instruction *Graph::findVirtualEntry(std::string funcName) {
-  for (auto func : graphFunctions) {
-    if (func->getFunctionName() == funcName) {
-      for (auto line : func->getFunctionLines()) {
-        for (auto inst : line->getLineInstructions()) {
-          if (inst->getInstructionLabel().find("Entry::") != std::string::npos) {
-            return inst;
-          } // End check for matchInst
-        }   // End loop for inst
-      }     // End loop for line
-    }       // End check for function name
-  }         // End loop for func
+Graph_Instruction *Graph::findVirtualInstruction(std::string funcName, unsigned lineNumber) {
+  auto findInst = graphVirtualIndex.find(std::pair<std::string, unsigned>(funcName, lineNumber));
+  if (findInst != graphVirtualIndex.end()) {
+    return findInst->second;
+  } // End check for virtual node
   return NULL;
+} // End findVirtualInstruction
+
+Graph_Instruction *Graph::findVirtualEntry(std::string funcName) {
+  return findVirtualInstruction(funcName, graphEntryID);
 } // End findVirtualEntry
 
 Graph_Instruction *Graph::findVirtualExit(std::string funcName) {
-  for (auto func : graphFunctions) {
-    if (func->getFunctionName() == funcName) {
-      for (auto line : func->getFunctionLines()) {
-        for (auto inst : line->getLineInstructions()) {
-          if (inst->getInstructionLabel().find("Exit::") != std::string::npos) {
-            return inst;
-          } // End check for Exit
-        }   // End loop for inst
-      }     // End loop for line
-    }       // End check for function name
-  }         // End loop for func
-  return NULL;
+  return findVirtualInstruction(funcName, graphExitID);
 } // End findVirtualExit
 
 void Graph::addBranchEdges() {
   for (auto func : graphFunctions) {
-    std::list<Graph_Line *> lines = func->getFunctionLines();
+    const std::vector<Graph_Line *> &lines = func->getFunctionLines();
     for (auto line = lines.begin(); line != lines.end(); ++line) {
-      std::list<Graph_Instruction *> instructions = (*line)->getLineInstructions();
+      const std::vector<Graph_Instruction *> &instructions = (*line)->getLineInstructions();
       for (auto inst = instructions.begin(); inst != instructions.end(); ++inst) {
         llvm::Instruction *I = (*inst)->getInstructionPtr();
         if (I) {
@@ -96,7 +146,7 @@ void Graph::addBranchEdges() {
               llvm::Instruction *iSucc = llvm::dyn_cast<llvm::Instruction>(I->getSuccessor(iterSucc)->begin());
               Graph_Instruction *iSuccInst = findMatchedInstruction(iSucc);
               if (iSucc) {
-                Graph_Edge *branchEdge = new Graph_Edge(*inst, iSuccInst, Graph_Edge::BRANCH, graphVersion);
+                Graph_Edge *branchEdge = createEdge(*inst, iSuccInst, Graph_Edge::BRANCH, graphVersion);
                 addEdge(*inst, iSuccInst, branchEdge);
               } else {
                 std::cerr << "No matching Graph_Instruction found for edge from " << (*inst)->getInstructionLabel()
@@ -107,10 +157,10 @@ void Graph::addBranchEdges() {
             /* Adding Unique successors */
             auto nextLine = std::next(line);
             if (nextLine != lines.end()) {
-              std::list<Graph_Instruction *> nextInstructions = (*nextLine)->getLineInstructions();
+              const std::vector<Graph_Instruction *> &nextInstructions = (*nextLine)->getLineInstructions();
               auto nextI = nextInstructions.begin();
               if (nextI != nextInstructions.end()) {
-                Graph_Edge *seqEdge = new Graph_Edge(*inst, *nextI, Graph_Edge::SEQUENTIAL, graphVersion);
+                Graph_Edge *seqEdge = createEdge(*inst, *nextI, Graph_Edge::SEQUENTIAL, graphVersion);
                 addEdge(*inst, *nextI, seqEdge);
               } // End check for nextI
             }   // End check for nextLine
@@ -123,12 +173,12 @@ void Graph::addBranchEdges() {
 
 void Graph::addFunctionCallEdges() {
   /* External Node */
-  Graph_Function *virtualNodeFunc = new Graph_Function(getNextID());
+  Graph_Function *virtualNodeFunc = createFunction(getNextID());
   virtualNodeFunc->setFunctionFile("External_Node_File");
   virtualNodeFunc->setFunctionName("External_Node_Func");
-  Graph_Line *virtualNodeLine = new Graph_Line(graphVersion);
+  Graph_Line *virtualNodeLine = createLine(graphVersion);
   virtualNodeLine->setLineNumber(graphVersion, graphEntryID);
-  Graph_Instruction *externalNode = new Graph_Instruction();
+  Graph_Instruction *externalNode = createInstruction();
   externalNode->setInstructionID(getNextID());
   externalNode->setInstructionLabel("External_Node");
   externalNode->setInstructionPtr(NULL);
@@ -148,7 +198,7 @@ void Graph::addFunctionCallEdges() {
             const llvm::Function *Callee = callSite.getCalledFunction();
             if (!Callee || !llvm::Intrinsic::isLeaf(Callee->getIntrinsicID())) {
               /* Call Extern */
-              Graph_Edge *callEdge = new Graph_Edge(inst, externalNode, Graph_Edge::EXTERNAL_CALL, graphVersion);
+              Graph_Edge *callEdge = createEdge(inst, externalNode, Graph_Edge::EXTERNAL_CALL, graphVersion);
               addEdge(inst, externalNode, callEdge);
             } else if (!Callee->isIntrinsic()) {
               /* Add Edge based on function name */
@@ -159,7 +209,7 @@ void Graph::addFunctionCallEdges() {
                 /* Call site to Entry */
                 Graph_Instruction *virtualEntry = findVirtualEntry(funcName);
                 if (virtualEntry) {
-                  Graph_Edge *callEdge = new Graph_Edge(inst, virtualEntry, Graph_Edge::CALL, graphVersion);
+                  Graph_Edge *callEdge = createEdge(inst, virtualEntry, Graph_Edge::CALL, graphVersion);
                   addEdge(inst, virtualEntry, callEdge);
                 } else {
                   noEntry = true;
@@ -167,7 +217,7 @@ void Graph::addFunctionCallEdges() {
                 /* Exit to Call site */
                 Graph_Instruction *virtualExit = findVirtualExit(funcName);
                 if (virtualExit) {
-                  Graph_Edge *callEdge = new Graph_Edge(virtualExit, inst, Graph_Edge::CALL, graphVersion);
+                  Graph_Edge *callEdge = createEdge(virtualExit, inst, Graph_Edge::CALL, graphVersion);
                   addEdge(virtualExit, inst, callEdge);
                 } else {
                   noExit = true;
@@ -197,35 +247,40 @@ void Graph::addFunctionCallEdges() {
 
 void Graph::addVirtualNodes(Graph_Function *func) {
   std::string funcName = func->getFunctionName();
-  Graph_Line *virtualLine = new Graph_Line(graphVersion);
+  Graph_Line *virtualLine = createLine(graphVersion);
   /* Entry Node */
   virtualLine->setLineNumber(graphVersion, graphEntryID);
-  Graph_Instruction *virtualNode = new Graph_Instruction();
+  Graph_Instruction *virtualNode = createInstruction();
   virtualNode->setInstructionID(getNextID());
   virtualNode->setInstructionLabel("Entry::" + funcName);
   virtualNode->setInstructionPtr(NULL);
   virtualLine->pushLineInstruction(virtualNode);
-  auto *to = func->getFunctionLines().front()->getLineInstructions().front();
+  /* A function without lines is summarized by its Entry node joined to its Exit node */
+  bool summary = func->isFunctionLinesEmpty();
+  Graph_Instruction *entryNode = virtualNode;
+  if (!summary) {
+    auto *to = func->getFunctionLines().front()->getLineInstructions().front();
+    Graph_Edge *virtualEdgeEntry = createEdge(virtualNode, to, Graph_Edge::VIRTUAL, graphVersion);
+    addEdge(virtualNode, to, virtualEdgeEntry);
+  } // End check for summary
   func->pushFrontFunctionLines(virtualLine);
-  Graph_Edge *virtualEdgeEntry = new Graph_Edge(virtualNode, to, Graph_Edge::VIRTUAL, graphVersion);
-  addEdge(virtualNode, to, virtualEdgeEntry);
   /* Exit Node */
-  virtualLine = new Graph_Line(graphVersion);
+  virtualLine = createLine(graphVersion);
   virtualLine->setLineNumber(graphVersion, graphExitID);
-  virtualNode = new Graph_Instruction();
+  virtualNode = createInstruction();
   virtualNode->setInstructionID(getNextID());
   virtualNode->setInstructionLabel("Exit::" + funcName);
   virtualNode->setInstructionPtr(NULL);
   virtualLine->pushLineInstruction(virtualNode);
-  auto *from = func->getFunctionLines().back()->getLineInstructions().back();
+  auto *from = summary ? entryNode : func->getFunctionLines().back()->getLineInstructions().back();
   func->pushFunctionLines(virtualLine);
-  Graph_Edge *virtualEdgeExit = new Graph_Edge(from, virtualNode, Graph_Edge::VIRTUAL, graphVersion);
+  Graph_Edge *virtualEdgeExit = createEdge(from, virtualNode, Graph_Edge::VIRTUAL, graphVersion);
   addEdge(from, virtualNode, virtualEdgeExit);
 } // End addVirtualNodes
 
-void Graph::printGraph(std::string graphName) {
-  std::ofstream gFile(graphName + ".dot", std::ios::trunc);
-  if (!gFile.is_open()) {
+void Graph::printGraph(std::string graphName, bool compress) {
+  Dot_Writer gFile;
+  if (!gFile.open(graphName + (compress ? ".dot.gz" : ".dot"), compress)) {
     std::cerr << "Unable to open file for printing the output\n";
     return;
   } // End check for gFile
@@ -239,9 +294,9 @@ void Graph::printGraph(std::string graphName) {
     gFile << "\t\tlabel=\"" << func->getFunctionName() << "\";\n";
     for (auto line : func->getFunctionLines()) {
       for (auto inst : line->getLineInstructions()) {
-        std::string outputString = std::regex_replace(inst->getInstructionLabel(), std::regex("\""), "\\\"");
-        gFile << "\t\t\"" << inst->getInstructionID() << "\" [label=\"" << line->getLineNumber(graphVersion)
-              << "::" << outputString << "\"];\n";
+        gFile << "\t\t\"" << inst->getInstructionID() << "\" [label=\"" << line->getLineNumber(graphVersion) << "::";
+        gFile.writeEscaped(inst->getInstructionLabel());
+        gFile << "\"];\n";
       } // End loop for inst
     }   // End loop for line
     gFile << "\t}\n";
@@ -249,45 +304,43 @@ void Graph::printGraph(std::string graphName) {
   /* Generating Edges*/
   gFile << "\n/* Generating Edges */\n";
   for (auto edge : graphEdges) {
-    std::string outputString = "\t\t\"" + std::to_string(edge->getEdgeFrom()->getInstructionID()) + "\" -> \"" +
-                               std::to_string(edge->getEdgeTo()->getInstructionID());
+    gFile << "\t\t\"" << edge->getEdgeFrom()->getInstructionID() << "\" -> \"" << edge->getEdgeTo()->getInstructionID();
     switch (edge->getEdgeType()) {
     case Graph_Edge::SEQUENTIAL:
-      outputString += "\" [arrowhead = normal, penwidth = 1.0, color = black, label=\"" +
-                      edge->getPrintableEdgeVersions() + "\"];\n";
+      gFile << "\" [arrowhead = normal, penwidth = 1.0, color = black, label=\"" << edge->getPrintableEdgeVersions()
+            << "\"];\n";
       break;
     case Graph_Edge::BRANCH:
-      outputString += "\" [arrowhead = dot, penwidth = 1.0, color = black, label=\"" +
-                      edge->getPrintableEdgeVersions() + "::Branch\"];\n";
+      gFile << "\" [arrowhead = dot, penwidth = 1.0, color = black, label=\"" << edge->getPrintableEdgeVersions()
+            << "::Branch\"];\n";
       break;
     case Graph_Edge::VIRTUAL:
-      outputString += "\" [arrowhead = normal, penwidth = 1.0, color = pink, label=\"" +
-                      edge->getPrintableEdgeVersions() + "::Virtual\"];\n";
+      gFile << "\" [arrowhead = normal, penwidth = 1.0, color = pink, label=\"" << edge->getPrintableEdgeVersions()
+            << "::Virtual\"];\n";
       break;
     case Graph_Edge::CALL:
-      outputString += "\" [arrowhead = odot, penwidth = 1.0, color = blue, label=\"" +
-                      edge->getPrintableEdgeVersions() + "::Call\"];\n";
+      gFile << "\" [arrowhead = odot, penwidth = 1.0, color = blue, label=\"" << edge->getPrintableEdgeVersions()
+            << "::Call\"];\n";
       break;
     case Graph_Edge::EXTERNAL_CALL:
-      outputString += "\" [arrowhead = odot, penwidth = 1.0, color = yellow, label=\"" +
-                      edge->getPrintableEdgeVersions() + "::External_Call\"];\n";
+      gFile << "\" [arrowhead = odot, penwidth = 1.0, color = yellow, label=\"" << edge->getPrintableEdgeVersions()
+            << "::External_Call\"];\n";
       break;
     case Graph_Edge::MVICFG_ADD:
-      outputString += "\" [arrowhead = normal, penwidth = 1.0, color = green, label=\"" +
-                      edge->getPrintableEdgeVersions() + "::Add\"];\n";
+      gFile << "\" [arrowhead = normal, penwidth = 1.0, color = green, label=\"" << edge->getPrintableEdgeVersions()
+            << "::Add\"];\n";
       break;
     case Graph_Edge::MVICFG_DEL:
-      outputString += "\" [arrowhead = normal, penwidth = 1.0, color = red, label=\"" +
-                      edge->getPrintableEdgeVersions() + "::Del\"];\n";
+      gFile << "\" [arrowhead = normal, penwidth = 1.0, color = red, label=\"" << edge->getPrintableEdgeVersions()
+            << "::Del\"];\n";
       break;
     case Graph_Edge::ANY:
       std::cerr << "Should not have ANY as edgeType\n";
-      outputString += "\" [arrowhead = normal, penwidth = 2.0, color = red, label=\"" +
-                      edge->getPrintableEdgeVersions() + "::ANY\"];\n";
+      gFile << "\" [arrowhead = normal, penwidth = 2.0, color = red, label=\"" << edge->getPrintableEdgeVersions()
+            << "::ANY\"];\n";
       break;
     } // End switch for edge
-    gFile << outputString;
-  } // End loop for edge
+  }   // End loop for edge
   /* Finalizing graph */
   gFile << "}\n";
   gFile.close();
@@ -6,7 +6,10 @@
 #ifndef GRAPH_H
 #define GRAPH_H
 
-/* #include "Graph_Function.hpp" */
+#include "Graph_Edge.hpp"
+#include "Graph_Function.hpp"
+#include "Graph_Instruction.hpp"
+#include "Graph_Line.hpp"
 #include <fstream>
 #include <iostream>
 #include <list>
@@ -14,16 +17,37 @@
 #include <llvm/IR/DebugInfoMetadata.h>
 #include <llvm/IR/InstrTypes.h>
 #include <llvm/IR/Intrinsics.h>
-#include <regex>
+#include <map>
+#include <unordered_map>
+#include <utility>
+#include <vector>
 namespace hydrogen_framework {
-/* Forward declaration */
-class Graph_Edge;
-class Graph_Function;
-class Graph_Instruction;
-class Graph_Line;
+/**
+ * Graph_Pool Class: Stores the objects of one type in chunks of contiguous memory
+ * Objects keep their address and live as long as the pool
+ */
+template <typename T> class Graph_Pool {
+public:
+  /**
+   * Construct a new object in the pool with the given constructor arguments
+   */
+  template <typename... Args> T *create(Args... args) {
+    if (poolChunks.empty() || poolChunks.back().size() == poolChunks.back().capacity()) {
+      poolChunks.emplace_back();
+      poolChunks.back().reserve(poolChunkSize);
+    } // End check for full chunk
+    poolChunks.back().emplace_back(args...);
+    return &poolChunks.back().back();
+  }
+
+private:
+  static const size_t poolChunkSize = 1024; /**< Number of objects per chunk */
+  std::vector<std::vector<T>> poolChunks;   /**< Chunks that are never grown beyond their reserved size */
+};                                          // End Graph_Pool Class
 
 /**
  * Graph Class: Class for generating Graphs
+ * The Graph owns every Graph_Function, Graph_Line, Graph_Instruction and Graph_Edge created through it
  */
 class Graph {
 public:
@@ -33,7 +57,7 @@ public:
    */
   Graph(unsigned ver)
       : graphID(0), graphVersion(ver), graphEntryID(std::numeric_limits<unsigned int>::max() - 1),
-        graphExitID(std::numeric_limits<unsigned int>::max() - 2) {
+        graphExitID(std::numeric_limits<unsigned int>::max() - 2), graphLineIndexValid(false) {
     whiteList.push_back("__isoc99_scanf");
     whiteList.push_back("printf");
     whiteList.push_back("malloc");
@@ -69,6 +93,7 @@ public:
 
   /**
    * Destructor
+   * Frees the Graph_Functions, Graph_Lines, Graph_Instructions and Graph_Edges of this graph
    */
   ~Graph() {
     graphEdges.clear();
@@ -80,6 +105,16 @@ public:
    */
   unsigned getNextID() { return ++graphID; }
 
+  /**
+   * Return the last ID handed out by getNextID
+   */
+  unsigned getLastID() { return graphID; }
+
+  /**
+   * Continue handing out IDs after ID
+   */
+  void setLastID(unsigned ID) { graphID = ID; }
+
   /**
    * Return graphVersion
    */
@@ -88,7 +123,33 @@ public:
   /**
    * Set graphVersion
    */
-  void setGraphVersion(unsigned ver) { graphVersion = ver; }
+  void setGraphVersion(unsigned ver) {
+    graphVersion = ver;
+    invalidateLineIndex();
+  }
+
+  /**
+   * Create a Graph_Function owned by this graph
+   */
+  Graph_Function *createFunction(unsigned id) { return graphFunctionPool.create(id); }
+
+  /**
+   * Create a Graph_Line owned by this graph
+   */
+  Graph_Line *createLine(unsigned version) { return graphLinePool.create(version); }
+
+  /**
+   * Create a Graph_Instruction owned by this graph
+   */
+  Graph_Instruction *createInstruction() { return graphInstructionPool.create(); }
+
+  /**
+   * Create a Graph_Edge owned by this graph
+   * Use addEdge to connect it
+   */
+  Graph_Edge *createEdge(Graph_Instruction *from, Graph_Instruction *to, Graph_Edge::edgeTypes type, unsigned ver) {
+    return graphEdgePool.create(from, to, type, ver);
+  }
 
   /**
    * Push Graph_Edge into graphEdges
@@ -112,6 +173,7 @@ public:
 
   /**
    * Add virtual nodes and corresponding edges to the Graph_Function
+   * A Graph_Function without lines gets a virtual edge from its Entry to its Exit node instead
    */
   void addVirtualNodes(Graph_Function *func);
 
@@ -127,9 +189,38 @@ public:
   void addEdge(Graph_Instruction *from, Graph_Instruction *to, Graph_Edge *edge);
 
   /**
-   * Print the graph in DOT format
+   * Print the graph in DOT format to graphName.dot, or to graphName.dot.gz compressed with gzip
    */
-  void printGraph(std::string graphName);
+  void printGraph(std::string graphName, bool compress = false);
+
+  /**
+   * Add the instructions of a Graph_Line that is part of this graph to the lookup indexes
+   */
+  void indexLine(Graph_Line *line);
+
+  /**
+   * Add a Graph_Instruction that is part of this graph to the lookup indexes
+   * The first Graph_Instruction registered for an LLVM instruction or virtual node is kept
+   */
+  void indexInstruction(Graph_Instruction *inst);
+
+  /**
+   * Remove the instructions of the given LLVM Module from the lookup indexes and keep their labels
+   * Call before the Module is freed so that its addresses cannot match instructions of Modules loaded later
+   */
+  void releaseInstructions(llvm::Module *module);
+
+  /**
+   * Mark the line number index as out of date
+   * Called when lines are added or get a line number for the current graphVersion
+   */
+  void invalidateLineIndex() { graphLineIndexValid = false; }
+
+  /**
+   * Find the Graph_Lines with the given line number of the current graphVersion in the given file
+   * All Graph_Lines are from the first function in which the line number is found
+   */
+  std::list<Graph_Line *> findGraphLines(std::string fileName, unsigned lineNumber);
 
   /**
    * Find matching instruction in the ICFG
@@ -137,6 +228,12 @@ public:
    */
   Graph_Instruction *findMatchedInstruction(llvm::Instruction *matchInst);
 
+  /**
+   * Find the virtual node (Instruction without LLVM pointer) with the given line number in the given function
+   * Can return NULL if no match is found
+   */
+  Graph_Instruction *findVirtualInstruction(std::string funcName, unsigned lineNumber);
+
   /**
    * Find virtual entry for the given function name
    * Can return NULL if no match is found
@@ -152,7 +249,7 @@ public:
   /**
    * Return graphFunctions
    */
-  std::list<Graph_Function *> getGraphFunctions() { return graphFunctions; }
+  const std::vector<Graph_Function *> &getGraphFunctions() { return graphFunctions; }
 
   /**
    * Return TRUE if it is a virtual node
@@ -162,7 +259,7 @@ public:
   /**
    * Return graphEdges
    */
-  std::list<Graph_Edge *> getGraphEdges() { return graphEdges; }
+  const std::vector<Graph_Edge *> &getGraphEdges() { return graphEdges; }
 
   /**
    * Return whiteList
@@ -180,14 +277,30 @@ public:
   int countEdges();
 
 private:
-  unsigned graphID;                           /**< Unique Graph ID */
-  unsigned graphVersion;                      /**< Version of graph. */
-  unsigned graphEntryID;                      /**< ID for all virtual entry Node. Set to max -1 */
-  unsigned graphExitID;                       /**< ID for all virtual exit Node. Set to max -2 */
-  std::list<Graph_Edge *> graphEdges;         /**< Container for Edges in the graph */
-  std::list<Graph_Function *> graphFunctions; /**< Container for function containers */
-  std::list<std::string> whiteList;           /**< Container for white-listed functions */
-};                                            // End Graph Class
+  unsigned graphID;                                   /**< Unique Graph ID */
+  unsigned graphVersion;                              /**< Version of graph. */
+  unsigned graphEntryID;                              /**< ID for all virtual entry Node. Set to max -1 */
+  unsigned graphExitID;                               /**< ID for all virtual exit Node. Set to max -2 */
+  std::vector<Graph_Edge *> graphEdges;               /**< Container for Edges in the graph */
+  std::vector<Graph_Function *> graphFunctions;       /**< Container for function containers */
+  std::list<std::string> whiteList;                   /**< Container for white-listed functions */
+  Graph_Pool<Graph_Function> graphFunctionPool;       /**< Storage for the Graph_Functions created by this graph */
+  Graph_Pool<Graph_Line> graphLinePool;               /**< Storage for the Graph_Lines created by this graph */
+  Graph_Pool<Graph_Instruction> graphInstructionPool; /**< Storage for the Graph_Instructions created by this graph */
+  Graph_Pool<Graph_Edge> graphEdgePool;               /**< Storage for the Graph_Edges created by this graph */
+  std::unordered_map<llvm::Instruction *, Graph_Instruction *>
+      graphInstructionIndex; /**< Index from LLVM instruction to its Graph_Instruction */
+  std::map<std::pair<std::string, unsigned>, Graph_Instruction *>
+      graphVirtualIndex; /**< Index from function name and line number to virtual Graph_Instruction */
+  std::unordered_map<std::string, std::unordered_map<unsigned, std::list<Graph_Line *>>>
+      graphLineIndex;       /**< Index from file name and line number to Graph_Lines, rebuilt on demand */
+  bool graphLineIndexValid; /**< Flag to indicate graphLineIndex matches graphFunctions and graphVersion */
+
+  /**
+   * Rebuild graphLineIndex from graphFunctions for the current graphVersion
+   */
+  void buildLineIndex();
+}; // End Graph Class
 
 /**
  * Find the line number and file name of the given LLVM instruction
@@ -6,8 +6,8 @@
 #ifndef GRAPH_EDGE_H
 #define GRAPH_EDGE_H
 
-#include <list>
 #include <string>
+#include <vector>
 namespace hydrogen_framework {
 /* Forward Declaration */
 class Graph_Instruction;
@@ -78,7 +78,7 @@ public:
   /**
    * Return edgeVersions
    */
-  std::list<unsigned> getEdgeVersions() { return edgeVersions; }
+  const std::vector<unsigned> &getEdgeVersions() { return edgeVersions; }
 
   /**
    * Get printable edgeVersions
@@ -92,10 +92,10 @@ public:
   bool isPartOfGraph(unsigned graphVersion);
 
 private:
-  Graph_Instruction *edgeFrom;      /**< From Instruction */
-  Graph_Instruction *edgeTo;        /**< To Instruction */
-  edgeTypes edgeType;               /**< Edge Type */
-  std::list<unsigned> edgeVersions; /**< Container to store edge's versions */
-};                                  // End Graph_Edge Class
+  Graph_Instruction *edgeFrom;        /**< From Instruction */
+  Graph_Instruction *edgeTo;          /**< To Instruction */
+  edgeTypes edgeType;                 /**< Edge Type */
+  std::vector<unsigned> edgeVersions; /**< Container to store edge's versions */
+};                                    // End Graph_Edge Class
 } // namespace hydrogen_framework
 #endif
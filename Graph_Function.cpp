@@ -4,16 +4,23 @@
  * Implementing Graph_Function.hpp
  */
 #include "Graph_Function.hpp"
+#include "Graph.hpp"
 #include "Graph_Line.hpp"
 
 namespace hydrogen_framework {
 void Graph_Function::pushFunctionLines(Graph_Line *line) {
   line->setGraphFunction(this);
   functionLines.push_back(line);
+  if (funcGraph) {
+    funcGraph->indexLine(line);
+  } // End check for funcGraph
 } // End pushFunctionLines
 
 void Graph_Function::pushFrontFunctionLines(Graph_Line *line) {
   line->setGraphFunction(this);
-  functionLines.push_front(line);
+  functionLines.insert(functionLines.begin(), line);
+  if (funcGraph) {
+    funcGraph->indexLine(line);
+  } // End check for funcGraph
 } // End pushFrontFunctionLines
 } // namespace hydrogen_framework
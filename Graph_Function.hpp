@@ -6,8 +6,8 @@
 #ifndef GRAPH_FUNCTION_H
 #define GRAPH_FUNCTION_H
 
-#include <list>
 #include <string>
+#include <vector>
 namespace hydrogen_framework {
 /* Forward declaration */
 class Graph;
@@ -44,12 +44,12 @@ public:
   bool isFunctionFileSet() { return !functionFile.empty(); }
 
   /**
-   * Push Graph_Line at the back of the functionLines list
+   * Push Graph_Line at the back of functionLines
    */
   void pushFunctionLines(Graph_Line *line);
 
   /**
-   * Push Graph_Line at the front of the functionLines list. Only used for Virtual node
+   * Push Graph_Line at the front of functionLines. Only used for Virtual node
    */
   void pushFrontFunctionLines(Graph_Line *line);
 
@@ -61,7 +61,7 @@ public:
   /**
    * Return functionLines
    */
-  std::list<Graph_Line *> getFunctionLines() { return functionLines; }
+  const std::vector<Graph_Line *> &getFunctionLines() { return functionLines; }
 
   /**
    * Return funcName
@@ -89,11 +89,11 @@ public:
   Graph *getGraph() { return funcGraph; }
 
 private:
-  unsigned functionID;                   /**< Function Container ID */
-  std::string functionName;              /**< Name of the function */
-  std::string functionFile;              /**< Name of the file in which the function resides */
-  std::list<Graph_Line *> functionLines; /**< Container for lines in the function */
-  Graph *funcGraph;                      /**< Points to the Graph that encompasses this */
-};                                       // End Graph_Function Class
+  unsigned functionID;                     /**< Function Container ID */
+  std::string functionName;                /**< Name of the function */
+  std::string functionFile;                /**< Name of the file in which the function resides */
+  std::vector<Graph_Line *> functionLines; /**< Container for lines in the function */
+  Graph *funcGraph;                        /**< Points to the Graph that encompasses this */
+};                                         // End Graph_Function Class
 } // namespace hydrogen_framework
 #endif
@@ -6,14 +6,14 @@
 #ifndef GRAPH_INSTRUCTION_H
 #define GRAPH_INSTRUCTION_H
 
-#include <list>
 #include <llvm/IR/Module.h>
-#include <set>
+#include <llvm/Support/raw_ostream.h>
+#include <string>
+#include <vector>
 namespace hydrogen_framework {
 /* Forward declaration */
 class Graph_Edge;
 class Graph_Line;
-class Query;
 
 /**
  * Graph_Instruction Class: To store individual LLVM instructions
@@ -23,7 +23,7 @@ public:
   /**
    * Constructor
    */
-  Graph_Instruction() : instructionID(0), instructionPtr(NULL), instructionLine(NULL) {}
+  Graph_Instruction() : instructionID(0), instructionPtr(NULL), instructionOpcode(""), instructionLine(NULL) {}
 
   /**
    * Destructor
@@ -46,14 +46,35 @@ public:
   void setInstructionPtr(llvm::Instruction *I) { instructionPtr = I; }
 
   /**
-   * Push Graph_Edge into instructionEdges list
+   * Set instructionOpcode
+   * Takes the static opcode name given by LLVM
+   */
+  void setInstructionOpcode(const char *opcode) { instructionOpcode = opcode; }
+
+  /**
+   * Push Graph_Edge into instructionEdges
    */
   void pushEdgeInstruction(Graph_Edge *edge) { instructionEdges.push_back(edge); }
 
   /**
    * Return instructionLabel
+   * Without a set label the instruction is printed from instructionPtr on every call
+   */
+  std::string getInstructionLabel() {
+    if (!instructionLabel.empty() || !instructionPtr) {
+      return instructionLabel;
+    } // End check for set label
+    std::string label;
+    llvm::raw_string_ostream rLabel(label);
+    instructionPtr->print(rLabel);
+    return rLabel.str();
+  }
+
+  /**
+   * Set instructionLabel to the printed instruction
+   * Keeps the label available after the LLVM Module of instructionPtr is released
    */
-  std::string getInstructionLabel() { return instructionLabel; }
+  void keepInstructionLabel() { instructionLabel = getInstructionLabel(); }
 
   /**
    * Return instructionID
@@ -67,37 +88,51 @@ public:
   llvm::Instruction *getInstructionPtr() { return instructionPtr; }
 
   /**
-   * Return instructionEdges
+   * Return instructionOpcode
+   * Stays valid after the LLVM Module of instructionPtr is released
    */
-  std::list<Graph_Edge *> getInstructionEdges() { return instructionEdges; }
+  const char *getInstructionOpcode() { return instructionOpcode; }
 
   /**
-   * Set pointer to encompassing Graph_Line
+   * Return TRUE for virtual nodes, which stand for no LLVM instruction and have no opcode
    */
-  void setGraphLine(Graph_Line *line) { instructionLine = line; }
+  bool isInstructionVirtual() { return instructionOpcode[0] == '\0'; }
 
   /**
-   * Return pointer to encompassing Graph_Line
+   * Return instructionEdges
    */
-  Graph_Line *getGraphLine() { return instructionLine; }
+  const std::vector<Graph_Edge *> &getInstructionEdges() { return instructionEdges; }
 
   /**
-   * Return instructionVisitedQueries
+   * Set pointer to encompassing Graph_Line
    */
-  std::set<Query *> getInstructionVisitedQueries() { return instructionVisitedQueries; }
+  void setGraphLine(Graph_Line *line) { instructionLine = line; }
 
   /**
-   * Insert query as pointer into instructionVisitedQueries
+   * Return pointer to encompassing Graph_Line
    */
-  void insertInstructionVisitedQueries(Query *q) { instructionVisitedQueries.insert(q); }
+  Graph_Line *getGraphLine() { return instructionLine; }
 
 private:
-  unsigned instructionID;                      /**< Instruction ID */
-  std::string instructionLabel;                /**< Instruction label or text */
-  llvm::Instruction *instructionPtr;           /**< Instruction LLVM Pointer */
-  std::list<Graph_Edge *> instructionEdges;    /**< Container for edges in the instruction */
-  Graph_Line *instructionLine;                 /**< Points to the Graph_Line that encompasses this */
-  std::set<Query *> instructionVisitedQueries; /**< Container for Queries that have visited this */
-};                                             // End Graph_Instruction Class
+  unsigned instructionID;                     /**< Instruction ID */
+  std::string instructionLabel;               /**< Instruction label or text, empty if printed from instructionPtr */
+  llvm::Instruction *instructionPtr;          /**< Instruction LLVM Pointer */
+  const char *instructionOpcode;              /**< Opcode name of instructionPtr */
+  std::vector<Graph_Edge *> instructionEdges; /**< Container for edges in the instruction */
+  Graph_Line *instructionLine;                /**< Points to the Graph_Line that encompasses this */
+};                                            // End Graph_Instruction Class
+
+/**
+ * Graph_Instruction_Order: Order Graph_Instructions by instructionID, NULL first
+ * Keeps the iteration order of containers independent of where the instructions were allocated
+ */
+struct Graph_Instruction_Order {
+  bool operator()(Graph_Instruction *lhs, Graph_Instruction *rhs) const {
+    if (!lhs || !rhs) {
+      return !lhs && rhs;
+    } // End check for NULL
+    return lhs->getInstructionID() < rhs->getInstructionID();
+  }
+}; // End Graph_Instruction_Order
 } // namespace hydrogen_framework
 #endif
@@ -4,22 +4,37 @@
  * Implementing Graph_Line.hpp
  */
 #include "Graph_Line.hpp"
+#include "Graph.hpp"
+#include "Graph_Function.hpp"
 #include "Graph_Instruction.hpp"
+#include <algorithm>
 
 namespace hydrogen_framework {
 
 void Graph_Line::setLineNumber(unsigned Version, unsigned line) {
-  lineNumber.insert(std::pair<unsigned, unsigned>(Version, line));
+  auto findVersion = std::lower_bound(lineNumber.begin(), lineNumber.end(), std::make_pair(Version, 0u));
+  /* The first line number set for a version is kept */
+  bool inserted = findVersion == lineNumber.end() || findVersion->first != Version;
+  if (inserted) {
+    lineNumber.insert(findVersion, std::make_pair(Version, line));
+  } // End check for Version
+  /* A line number for the current version moves this line in the line index of the encompassing Graph */
+  if (inserted && lineFunction && lineFunction->getGraph() && lineFunction->getGraph()->getGraphVersion() == Version) {
+    lineFunction->getGraph()->invalidateLineIndex();
+  } // End check for encompassing Graph
 } // End setLineNumber
 
 void Graph_Line::pushLineInstruction(Graph_Instruction *inst) {
   inst->setGraphLine(this);
   lineInstructions.push_back(inst);
+  if (lineFunction && lineFunction->getGraph()) {
+    lineFunction->getGraph()->indexInstruction(inst);
+  } // End check for encompassing Graph
 } // End pushLineInstruction;
 
 unsigned Graph_Line::getLineNumber(unsigned Version) {
-  auto searchLine = lineNumber.find(Version);
-  if (searchLine != lineNumber.end()) {
+  auto searchLine = std::lower_bound(lineNumber.begin(), lineNumber.end(), std::make_pair(Version, 0u));
+  if (searchLine != lineNumber.end() && searchLine->first == Version) {
     return searchLine->second;
   } // End check for searchLine
   return 0;
@@ -6,8 +6,8 @@
 #ifndef GRAPH_LINE_H
 #define GRAPH_LINE_H
 
-#include <list>
-#include <map>
+#include <utility>
+#include <vector>
 namespace hydrogen_framework {
 /* Forward declaration */
 class Graph_Function;
@@ -34,6 +34,11 @@ public:
    */
   unsigned getLineNumber(unsigned Version);
 
+  /**
+   * Return the graphVersion and line number pairs of all versions
+   */
+  const std::vector<std::pair<unsigned, unsigned>> &getLineNumbers() { return lineNumber; }
+
   /**
    * Set lineNumber
    */
@@ -45,14 +50,14 @@ public:
   bool isLineInstructionEmpty() { return lineInstructions.empty(); }
 
   /**
-   * Push the Graph_Instruction at the back of the list
+   * Push the Graph_Instruction at the back of lineInstructions
    */
   void pushLineInstruction(Graph_Instruction *inst);
 
   /**
    * Return lineInstructions
    */
-  std::list<Graph_Instruction *> getLineInstructions() { return lineInstructions; }
+  const std::vector<Graph_Instruction *> &getLineInstructions() { return lineInstructions; }
 
   /**
    * Set pointer to encompassing Graph_Function
@@ -70,10 +75,10 @@ public:
   unsigned getLineGraphVersion() { return lineGraphVersion; }
 
 private:
-  std::map<unsigned, unsigned> lineNumber;         /**< Map between graphVersion and line Number */
-  std::list<Graph_Instruction *> lineInstructions; /**< Container for instruction in the line */
-  Graph_Function *lineFunction;                    /**< Points to the Graph_Function that encompasses this */
-  unsigned lineGraphVersion;                       /**< The graph version in which this line was introduced */
-};                                                 // End Graph_Line Class
+  std::vector<std::pair<unsigned, unsigned>> lineNumber; /**< graphVersion and line Number pairs sorted by version */
+  std::vector<Graph_Instruction *> lineInstructions;     /**< Container for instruction in the line */
+  Graph_Function *lineFunction;                          /**< Points to the Graph_Function that encompasses this */
+  unsigned lineGraphVersion;                             /**< The graph version in which this line was introduced */
+};                                                       // End Graph_Line Class
 } // namespace hydrogen_framework
 #endif
@@ -8,7 +8,12 @@
 #include "Graph_Line.hpp"
 #include "MVICFG.hpp"
 #include "Module.hpp"
+#include "Result.hpp"
+#include "Server.hpp"
+#include "Snapshot.hpp"
+#include "Trace.hpp"
 #include <chrono>
+#include <future>
 
 using namespace hydrogen_framework;
 
@@ -23,10 +28,60 @@ int main(int argc, char *argv[]) {
               << "<Path-to-Module1> <Path-to-Module2> .. <Path-to-ModuleN> :: "
               << "<Path-to-file1-for-Module1> .. <Path-to-fileN-for-Module1> :: "
               << "<Path-to-file2-for-Module2> .. <Path-to-fileN-for-Module2> ..\n"
-              << "Note that '::' is the demarcation\n";
+              << "Note that '::' is the demarcation\n"
+              << "Options go before the first module:\n"
+              << "  --dot=<output>         DOT files to write: none, mvicfg or all (with Graph_N.dot, the default)\n"
+              << "  --dot-gzip             Compress the DOT files with gzip\n"
+              << "  --max-paths=<count>    Stop counting the added or removed paths of a version at count\n"
+              << "  --max-path-time=<ms>   Stop counting the paths of a version after ms milliseconds\n"
+              << "  --scope[=<depth>]      Build in detail only the changed functions and the functions up to depth\n"
+              << "                         calls away from them (1 by default), summarize the others\n"
+              << "  --snapshot-in=<file>   Add the modules to the MVICFG saved in file instead of starting anew\n"
+              << "  --snapshot-out=<file>  Save the MVICFG to file so later versions can be added with --snapshot-in\n"
+              << "  --serve=<socket>       Answer runs sent to the Unix socket, keeping the modules and ICFGs loaded\n"
+              << "  --serve-cache=<count>  Number of modules the server keeps, 64 by default\n"
+              << "  --stream               Load each module only when it is needed and free it once merged\n"
+              << "  --trace=<file>         Write the time and peak memory of each phase as a Chrome trace\n";
     return 1;
   } // End check for min argument
   Hydrogen framework;
+  if (!framework.parseOptions(argc, argv)) {
+    return 1;
+  } // End check for options
+  if (framework.hasOption("serve")) {
+    unsigned long long cacheSize = 64;
+    if (!framework.getNumberOption("serve-cache", cacheSize)) {
+      return 1;
+    } // End check for serve-cache
+    if (framework.getOption("serve").empty()) {
+      std::cerr << "--serve needs the path of the socket, e.g. --serve=/tmp/hydrogen.sock\n";
+      return 1;
+    } // End check for socket path
+    Server server(argv[0], framework.getOption("serve"), cacheSize);
+    return server.serve() ? 0 : 4;
+  } // End check for serve
+  std::string dot = framework.hasOption("dot") ? framework.getOption("dot") : "all";
+  if (dot != "none" && dot != "mvicfg" && dot != "all") {
+    std::cerr << "Unknown value " << dot << " for --dot, it should be none, mvicfg or all\n";
+    return 1;
+  } // End check for dot option
+  bool dotGzip = framework.hasOption("dot-gzip");
+  bool scoped = framework.hasOption("scope");
+  unsigned long long scopeDepth = 1;
+  unsigned long long maxPaths = 0;
+  unsigned long long maxPathTime = 0;
+  if (!framework.getNumberOption("scope", scopeDepth) || !framework.getNumberOption("max-paths", maxPaths) ||
+      !framework.getNumberOption("max-path-time", maxPathTime)) {
+    return 1;
+  } // End check for number options
+  if (scoped && framework.hasOption("snapshot-in")) {
+    std::cerr << "--scope cannot be combined with --snapshot-in, the snapshot holds every function in detail\n";
+    return 1;
+  } // End check for scope and snapshot-in
+  if (framework.getFirstInput() >= argc) {
+    std::cerr << "Insufficient arguments after the options\n";
+    return 1;
+  } // End check for inputs after options
   if (!framework.validateInputs(argc, argv)) {
     return 2;
   } // End check for valid Input
@@ -34,11 +89,92 @@ int main(int argc, char *argv[]) {
     return 3;
   } // End check for processing Inputs
   std::list<Module *> mod = framework.getModules();
-  /* Create ICFG */
+  Trace &trace = framework.getTrace();
+  /* In stream mode the next module is parsed on a background thread while the current one is merged */
+  bool stream = framework.hasOption("stream");
+  std::future<bool> nextModule;
+  /* In scope mode all the diffs are needed first, to find the functions they touch in every version */
+  std::set<std::string> functionScope;
+  std::vector<std::list<Diff_Mapping>> scopeDiffMaps;
+  if (scoped) {
+    std::set<std::string> changedFuncs;
+    std::map<std::string, std::set<std::string>> calls;
+    unsigned version = 1;
+    for (auto iterModule = mod.begin(); iterModule != mod.end(); ++iterModule, ++version) {
+      auto iterModuleNext = std::next(iterModule);
+      if (iterModuleNext != mod.end()) {
+        Trace_Scope scope(trace, "diff", version + 1);
+        scopeDiffMaps.push_back(generateLineMapping(*iterModule, *iterModuleNext));
+      } // End check for next module
+      /* Lines added to this version and lines deleted from it in the next version */
+      std::map<std::string, std::set<long long>> changedLines;
+      if (version > 1) {
+        for (const auto &diff : scopeDiffMaps[version - 2]) {
+          changedLines[diff.getFileName()].insert(diff.getAddedLines().begin(), diff.getAddedLines().end());
+        } // End loop for diff
+      }   // End check for previous module
+      if (iterModuleNext != mod.end()) {
+        for (const auto &diff : scopeDiffMaps[version - 1]) {
+          changedLines[diff.getFileName()].insert(diff.getDeletedLines().begin(), diff.getDeletedLines().end());
+        } // End loop for diff
+      }   // End check for next module
+      if (stream && !framework.loadModuleAsync(*iterModule).get()) {
+        return 3;
+      } // End check for loading the module
+      {
+        Trace_Scope scope(trace, "scope", version);
+        getChangedFunctions(*iterModule, changedLines, changedFuncs, calls);
+      }
+      if (stream) {
+        (*iterModule)->releaseModule();
+      } // End check for stream
+    }   // End loop for Module
+    functionScope = getFunctionScope(changedFuncs, calls, scopeDepth);
+  } // End check for scoped
   unsigned graphVersion = 1;
-  Module *firstMod = mod.front();
-  Graph *MVICFG = buildICFG(firstMod, graphVersion);
+  Graph *MVICFG;
+  if (framework.hasOption("snapshot-in")) {
+    /* Resume from the saved MVICFG, its last version takes the place of the first module */
+    Module *snapshotMod = new Module();
+    {
+      Trace_Scope scope(trace, "snapshot_in", 0);
+      MVICFG = readSnapshot(framework.getOption("snapshot-in"), snapshotMod);
+    }
+    if (!MVICFG) {
+      return 3;
+    } // End check for snapshot
+    graphVersion = MVICFG->getGraphVersion();
+    if (stream) {
+      nextModule = framework.loadModuleAsync(mod.front());
+    } // End check for stream
+    mod.push_front(snapshotMod);
+  } else {
+    if (stream) {
+      nextModule = framework.loadModuleAsync(mod.front());
+      if (!nextModule.get()) {
+        return 3;
+      } // End check for loading the first module
+      if (mod.size() > 1) {
+        nextModule = framework.loadModuleAsync(*std::next(mod.begin()));
+      } // End check for a second module
+    }   // End check for stream
+    /* Create ICFG */
+    Module *firstMod = mod.front();
+    {
+      Trace_Scope scope(trace, "icfg", graphVersion);
+      MVICFG = buildICFG(firstMod, graphVersion, scoped ? &functionScope : NULL);
+    }
+    if (dot == "all") {
+      Trace_Scope scope(trace, "dot", graphVersion);
+      MVICFG->printGraph("Graph_" + std::to_string(graphVersion), dotGzip);
+    } // End check for dot
+    if (stream) {
+      MVICFG->releaseInstructions(firstMod->getPtr().get());
+      firstMod->releaseModule();
+    } // End check for stream
+  }   // End check for snapshot-in
   std::map<unsigned int, std::pair<int, int>> pathsChanged;
+  std::set<unsigned int> pathsTruncated;
   /* Start timer */
   auto mvicfgStart = std::chrono::high_resolution_clock::now();
   /* Create MVICFG */
@@ -49,29 +185,62 @@ int main(int argc, char *argv[]) {
       /* Container for added and deleted MVICFG lines */
       std::list<Graph_Line *> addedLines;
       std::list<Graph_Line *> deletedLines;
-      std::map<Graph_Line *, Graph_Line *> matchedLines; /**<Map From ICFG Graph_Line to MVICFG Graph_Line */
-      std::list<Diff_Mapping> diffMap = generateLineMapping(*iterModule, *iterModuleNext);
-      Graph *ICFG = buildICFG(*iterModuleNext, ++graphVersion);
-      for (auto iter : diffMap) {
-        // iter.printFileInfo();
-        std::list<Graph_Line *> iterAdd = addToMVICFG(MVICFG, ICFG, iter, graphVersion);
-        std::list<Graph_Line *> iterDel = deleteFromMVICFG(MVICFG, ICFG, iter, graphVersion);
-        std::map<Graph_Line *, Graph_Line *> iterMatch = matchedInMVICFG(MVICFG, ICFG, iter, graphVersion);
-        addedLines.insert(addedLines.end(), iterAdd.begin(), iterAdd.end());
-        deletedLines.insert(deletedLines.end(), iterDel.begin(), iterDel.end());
-        matchedLines.insert(iterMatch.begin(), iterMatch.end());
-      } // End loop for diffMap
-      /* Update Map Edges */
-      getEdgesForAddedLines(MVICFG, ICFG, addedLines, diffMap, graphVersion);
-      /* Update the matched lines to get new temporary variable mapping for old lines */
-      updateMVICFGVersion(MVICFG, addedLines, deletedLines, diffMap, graphVersion);
-      /* Update Map Version */
-      MVICFG->setGraphVersion(graphVersion);
+      std::list<Diff_Mapping> diffMap;
+      if (scoped) {
+        diffMap.swap(scopeDiffMaps[graphVersion - 1]);
+      } else {
+        Trace_Scope scope(trace, "diff", graphVersion + 1);
+        diffMap = generateLineMapping(*iterModule, *iterModuleNext);
+      } // End check for scoped
+      if (stream) {
+        Trace_Scope scope(trace, "wait_module", graphVersion + 1);
+        if (!nextModule.get()) {
+          return 3;
+        } // End check for loading the module
+        auto iterModuleAfter = std::next(iterModuleNext);
+        if (iterModuleAfter != iterModuleEnd) {
+          nextModule = framework.loadModuleAsync(*iterModuleAfter);
+        } // End check for iterModuleEnd
+      }   // End check for stream
+      Graph *ICFG;
+      {
+        Trace_Scope scope(trace, "icfg", graphVersion + 1);
+        ICFG = buildICFG(*iterModuleNext, ++graphVersion, scoped ? &functionScope : NULL);
+      }
+      if (dot == "all") {
+        Trace_Scope scope(trace, "dot", graphVersion);
+        ICFG->printGraph("Graph_" + std::to_string(graphVersion), dotGzip);
+      } // End check for dot
+      /* Files with only summarized functions have no lines to add, delete or match */
+      std::set<std::string> scopeFiles;
+      if (scoped) {
+        for (auto graph : {MVICFG, ICFG}) {
+          for (auto func : graph->getGraphFunctions()) {
+            if (functionScope.find(func->getFunctionName()) != functionScope.end()) {
+              scopeFiles.insert(func->getFunctionFile());
+            } // End check for functionScope
+          }   // End loop for func
+        }     // End loop for graph
+      }       // End check for scoped
+      mergeICFG(MVICFG, ICFG, diffMap, graphVersion, trace, addedLines, deletedLines, scoped ? &scopeFiles : NULL);
 
       // Report paths added/deleted
-      int pathsAdded = reportPaths(MVICFG, addedLines);
-      int pathsDeleted = reportPaths(MVICFG, deletedLines);
+      int pathsAdded;
+      int pathsDeleted;
+      {
+        Trace_Scope scope(trace, "paths", graphVersion);
+        if (!reportPaths(MVICFG, addedLines, deletedLines, pathsAdded, pathsDeleted, maxPaths, maxPathTime)) {
+          std::cerr << "Path search for version " << graphVersion << " stopped at the limit\n";
+          pathsTruncated.insert(graphVersion);
+        } // End check for reportPaths
+      }
       pathsChanged.insert(std::pair<unsigned int, std::pair<int, int>>(graphVersion, std::pair<int, int>(pathsAdded, pathsDeleted)));
+      /* The version is merged, so its ICFG and module are no longer needed */
+      if (stream) {
+        MVICFG->releaseInstructions((*iterModuleNext)->getPtr().get());
+        (*iterModuleNext)->releaseModule();
+        delete ICFG;
+      } // End check for stream
       // std::cout << "Version " << graphVersion << " added " << pathsAdded << " paths" << "\n";
       // std::cout << "Version " << graphVersion << " removed " << pathsDeleted << " paths" << "\n";
     } // End check for iterModuleEnd
@@ -79,27 +248,33 @@ int main(int argc, char *argv[]) {
   /* Stop timer */
   auto mvicfgStop = std::chrono::high_resolution_clock::now();
   auto mvicfgBuildTime = std::chrono::duration_cast<std::chrono::milliseconds>(mvicfgStop - mvicfgStart);
-  MVICFG->printGraph("MVICFG");
+  if (framework.hasOption("snapshot-out")) {
+    Trace_Scope scope(trace, "snapshot_out", graphVersion);
+    if (!writeSnapshot(framework.getOption("snapshot-out"), MVICFG, mod.back())) {
+      return 5;
+    } // End check for snapshot
+  }   // End check for snapshot-out
+  if (dot != "none") {
+    Trace_Scope scope(trace, "dot", graphVersion);
+    MVICFG->printGraph("MVICFG", dotGzip);
+  } // End check for dot
   std::cout << "Finished Building MVICFG in " << mvicfgBuildTime.count() << "ms\n";
   /* Write output to file */
-  std::ofstream rFile("Result.txt", std::ios::trunc);
-  if (!rFile.is_open()) {
-    std::cerr << "Unable to open file for printing the output\n";
+  Result result;
+  result.setArgs(argc, argv);
+  result.addTiming("mvicfg", mvicfgBuildTime.count());
+  for (auto total : trace.getTotals()) {
+    result.addTiming(total.first, total.second);
+  } // End loop for phase timings
+  result.setGraphSize(MVICFG->countNodes(), MVICFG->countEdges());
+  for (auto pair : pathsChanged) {
+    result.addVersionPaths(pair.first, pair.second.first, pair.second.second, pathsTruncated.count(pair.first));
+  } // End loop for pathsChanged
+  if (!result.writeFiles()) {
     return 5;
   } // End check for Result file
-  rFile << "Input Args:\n";
-  for (auto i = 0; i < argc; ++ i) {
-    rFile << argv[i] << "  ";
-  } // End loop for writing arguments
-  rFile << "\n";
-  rFile << "Finished Building MVICFG in " << mvicfgBuildTime.count() << "ms\n";
-  rFile << "Nodes: " << MVICFG->countNodes() << "\n";
-  rFile << "Edges: " << MVICFG->countEdges() << "\n";
-  for (auto pair : pathsChanged) {
-    auto addedRemoved = pair.second;
-    rFile << "Version " << pair.first << " added " << addedRemoved.first << " paths" << "\n";
-    rFile << "Version " << pair.first << " removed " << addedRemoved.second << " paths" << "\n";
-  }
-  rFile.close();
+  if (framework.hasOption("trace") && !trace.writeTrace(framework.getOption("trace"))) {
+    return 5;
+  } // End check for trace file
   return 0;
 } // End main
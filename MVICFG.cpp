@@ -11,240 +11,395 @@
 #include "Graph_Instruction.hpp"
 #include "Graph_Line.hpp"
 #include "Module.hpp"
+#include "Trace.hpp"
+#include <atomic>
+#include <chrono>
+#include <thread>
+#include <unordered_map>
+#include <unordered_set>
 namespace hydrogen_framework {
 
-// DFS from instruction downwards, skipping vertices that have been visited, and
-// print the path when we get back to an instruction that is of another previous version.
-int dfsPath(Graph *MVICFG,
-  Graph_Instruction *instruction,
-  std::set<Graph_Instruction *> &visited,
-  std::set<Graph_Instruction *> &newInstructions,
-  bool verbose = false)
-{
-  if (verbose) {
-    std::cout << instruction->getInstructionLabel() << std::endl;
-  }
-  visited.insert(instruction);
-
-  int pathCount = 0;
-
-  for (auto edge :instruction->getInstructionEdges()) {
-    auto leadingOut = edge->getEdgeFrom()->getInstructionID() == instruction->getInstructionID();
-    if (leadingOut) {
-      auto to = getMatchedInstructionFromGraph(MVICFG, edge->getEdgeTo());
+/**
+ * Path_Frame: An instruction on the path being searched and the next of its edges to follow
+ */
+struct Path_Frame {
+  Graph_Instruction *inst; /**< Instruction on the path */
+  size_t nextEdge;         /**< Position of the next edge of inst */
+};                         // End Path_Frame struct
 
-      // End the path since we've joined back up with a vertex in the old version
-      if (newInstructions.find(to) == newInstructions.end()) {
+bool reportPaths(Graph *MVICFG, const std::list<Graph_Line *> &addedLines, const std::list<Graph_Line *> &deletedLines,
+                 int &pathsAdded, int &pathsDeleted, unsigned long long maxPaths, long long maxMillis, bool verbose) {
+  /* The added lines are side 0 and the deleted lines side 1, a bit per side marks the instructions */
+  const std::list<Graph_Line *> *sideLines[2] = {&addedLines, &deletedLines};
+  int *sidePaths[2] = {&pathsAdded, &pathsDeleted};
+  std::unordered_map<Graph_Instruction *, unsigned> newInstructions;
+  std::unordered_map<Graph_Instruction *, unsigned> visited;
+  std::vector<std::pair<unsigned, Graph_Instruction *>> starts;
+  for (unsigned side = 0; side < 2; ++side) {
+    std::vector<Graph_Instruction *> sideStarts;
+    for (auto line : *sideLines[side]) {
+      for (auto instr : line->getLineInstructions()) {
+        Graph_Instruction *matchedInstruction = getMatchedInstructionFromGraph(MVICFG, instr);
+        if (matchedInstruction && !(newInstructions[matchedInstruction] & (1u << side))) {
+          newInstructions[matchedInstruction] |= 1u << side;
+          sideStarts.push_back(matchedInstruction);
+        } // End check for matchedInstruction
+      }   // End loop for instr
+    }     // End loop for line
+    /* Paths are searched from the new instructions in the order they were created */
+    std::sort(sideStarts.begin(), sideStarts.end(), Graph_Instruction_Order());
+    for (auto inst : sideStarts) {
+      starts.push_back(std::make_pair(side, inst));
+    } // End loop for sideStarts
+  }   // End loop for side
+  pathsAdded = 0;
+  pathsDeleted = 0;
+  auto deadline = std::chrono::steady_clock::now() + std::chrono::milliseconds(maxMillis);
+  unsigned long long steps = 0;
+  bool truncated = false;
+  bool timedOut = false;
+  std::vector<Path_Frame> stack;
+  for (auto start : starts) {
+    unsigned side = start.first;
+    unsigned sideBit = 1u << side;
+    Graph_Instruction *instruction = start.second;
+    int &pathCount = *sidePaths[side];
+    /* Don't proceed if we've seen this one before */
+    if (visited[instruction] & sideBit) {
+      continue;
+    } // End check for visited
+    if (maxPaths && static_cast<unsigned long long>(pathCount) >= maxPaths) {
+      truncated = true;
+      continue;
+    } // End check for maxPaths
+    const std::vector<Graph_Edge *> &edges = instruction->getInstructionEdges();
+    auto edgeLeadingIn = std::find_if(edges.begin(), edges.end(), [=](Graph_Edge *e) {
+      return e->getEdgeTo()->getInstructionID() == instruction->getInstructionID();
+    });
+    if (edgeLeadingIn == edges.end()) {
+      std::cerr << "Couldn't get edge leading in." << std::endl;
+      continue;
+    } // End check for edgeLeadingIn
+    Graph_Instruction *from = (*edgeLeadingIn)->getEdgeFrom();
+    if (verbose) {
+      std::cout << from->getInstructionLabel() << std::endl;
+    } // End check for verbose
+    visited[from] |= sideBit;
+    /* Depth first from the instruction, a path ends on an instruction that is not new or was seen already */
+    visited[instruction] |= sideBit;
+    if (verbose) {
+      std::cout << instruction->getInstructionLabel() << std::endl;
+    } // End check for verbose
+    stack.push_back(Path_Frame{instruction, 0});
+    while (!stack.empty()) {
+      if (maxPaths && static_cast<unsigned long long>(pathCount) >= maxPaths) {
+        truncated = true;
+        break;
+      } // End check for maxPaths
+      if (maxMillis && ++steps % 1024 == 0 && std::chrono::steady_clock::now() > deadline) {
+        truncated = timedOut = true;
+        break;
+      } // End check for deadline
+      Path_Frame &frame = stack.back();
+      const std::vector<Graph_Edge *> &frameEdges = frame.inst->getInstructionEdges();
+      if (frame.nextEdge == frameEdges.size()) {
+        stack.pop_back();
+        continue;
+      } // End check for last edge
+      Graph_Edge *edge = frameEdges[frame.nextEdge++];
+      if (edge->getEdgeFrom()->getInstructionID() != frame.inst->getInstructionID()) {
+        continue;
+      } // End check for edge leading out
+      /* Edges of the MVICFG lead to its own instructions */
+      Graph_Instruction *to = edge->getEdgeTo();
+      if (!(newInstructions[to] & sideBit)) {
+        /* End the path since we've joined back up with a vertex in the old version */
         if (verbose) {
           std::cout << to->getInstructionLabel() << std::endl;
           std::cout << "Done with path!" << std::endl;
-        }
-        pathCount += 1;
+        } // End check for verbose
+        ++pathCount;
         continue;
-      }
-
-      // Don't proceed if we've seen this one before
-      if (visited.find(to) != visited.end()) {
-        pathCount += 1;
+      } // End check for new instruction
+      if (visited[to] & sideBit) {
+        ++pathCount;
         continue;
-      }
-
-      pathCount += dfsPath(MVICFG, to, visited, newInstructions, verbose);
-    }
-  }
-
-  return pathCount;
-}
-
-int reportPaths(Graph *MVICFG, std::list<Graph_Line *> lines, bool verbose) {
-  std::list<std::list<Graph_Instruction *>> paths;
-  std::set<Graph_Instruction *> visited;
-  std::set<Graph_Instruction *> newInstructions;
-  
-  for (auto line: lines) {
-    for (auto instr : line->getLineInstructions()) {
-      auto matchedInstruction = getMatchedInstructionFromGraph(MVICFG, instr);
-      if (matchedInstruction)
-        newInstructions.insert(matchedInstruction);
-    }
-  }
+      } // End check for visited
+      visited[to] |= sideBit;
+      if (verbose) {
+        std::cout << to->getInstructionLabel() << std::endl;
+      } // End check for verbose
+      stack.push_back(Path_Frame{to, 0});
+    } // End loop for stack
+    stack.clear();
+    if (timedOut) {
+      break;
+    } // End check for timedOut
+  }   // End loop for starts
+  return !truncated;
+} // End reportPaths
 
-  int pathCount = 0;
+/**
+ * ICFG_Line_Plan: A line of a function and the LLVM instructions on it, before its Graph_Line is created
+ */
+struct ICFG_Line_Plan {
+  unsigned lineNumber;                           /**< Line number from the debug information */
+  std::vector<llvm::Instruction *> instructions; /**< Instructions on the line in order */
+};                                               // End ICFG_Line_Plan struct
 
-  for (auto instruction: newInstructions) {
-    // Don't proceed if we've seen this one before.
-    if (visited.find(instruction) == visited.end()) {
-      auto edges = instruction->getInstructionEdges();
-      auto edgeLeadingIn = std::find_if(edges.begin(), edges.end(), [=](Graph_Edge *e){
-        return e->getEdgeTo()->getInstructionID() == instruction->getInstructionID();
-      });
-      if (edgeLeadingIn == edges.end()) {
-        std::cerr << "Couldn't get edge leading in." << std::endl;
-        continue;
-      }
-      auto from = (*edgeLeadingIn)->getEdgeFrom();
+/**
+ * ICFG_Function_Plan: A function of the module and its lines, read without touching the Graph
+ */
+struct ICFG_Function_Plan {
+  std::string name;                  /**< Name of the function */
+  std::string file;                  /**< File of the function */
+  bool summary;                      /**< Out of scope, only its Entry and Exit nodes are built */
+  std::vector<ICFG_Line_Plan> lines; /**< Lines of the function in order */
+};                                   // End ICFG_Function_Plan struct
 
-      if (verbose) {
-        std::cout << from->getInstructionLabel() << std::endl;
-      }
-      visited.insert(from);
-      pathCount += dfsPath(MVICFG, instruction, visited, newInstructions, verbose);
-    }
-  }
-  
-  return pathCount;
-}
+/**
+ * Read the name, file and lines of the function into plan
+ * Only reads the LLVM function, so functions can be planned on different threads
+ */
+static void planFunction(llvm::Function &F, const std::set<std::string> *scope, ICFG_Function_Plan &plan) {
+  if (F.hasName()) {
+    plan.name = F.getName();
+  } else {
+    plan.name = "Unknown_Function";
+  } // End check for function name
+  plan.summary = scope && !F.isDeclaration() && scope->find(plan.name) == scope->end();
+  if (plan.summary) {
+    /* Out of scope, only the file is needed for its Entry and Exit nodes */
+    unsigned int DILocLine = 0;
+    std::string DIFile = "Unknown_File";
+    getLocationInfo(F.getEntryBlock().front(), DILocLine, DIFile);
+    plan.file = DIFile;
+    return;
+  } // End check for scope
+  plan.lines.push_back(ICFG_Line_Plan{0, std::vector<llvm::Instruction *>()});
+  for (llvm::BasicBlock &BB : F) {
+    for (llvm::Instruction &I : BB) {
+      unsigned int DILocLine = 0;
+      std::string DIFile = "Unknown_File";
+      getLocationInfo(I, DILocLine, DIFile);
+      /* Attach the line to current line if no debug information is found */
+      if (DILocLine == 0) {
+        DILocLine = plan.lines.back().lineNumber;
+      } // End check for DILocLine
+      /* Start a new line whenever new DILocLine is encountered */
+      if (DILocLine != plan.lines.back().lineNumber) {
+        if (!plan.lines.back().instructions.empty()) {
+          plan.lines.push_back(ICFG_Line_Plan{0, std::vector<llvm::Instruction *>()});
+        } // End check for empty line
+        plan.lines.back().lineNumber = DILocLine;
+      } // End check for continuation for current line
+      if (plan.file.empty()) {
+        plan.file = DIFile;
+      } // End check for file
+      plan.lines.back().instructions.push_back(&I);
+    } // End loop for BasicBlock
+  }   // End loop for Function
+  if (plan.lines.back().instructions.empty()) {
+    plan.lines.pop_back();
+  } // End check for empty line
+} // End planFunction
 
-Graph *buildICFG(Module *mod, unsigned graphVersion) {
+Graph *buildICFG(Module *mod, unsigned graphVersion, const std::set<std::string> *scope) {
   std::unique_ptr<llvm::Module> &modPtr = mod->getPtr();
   Graph *ICFG = new Graph(graphVersion);
+  /* Functions are read independently of each other, so they are planned on several threads */
+  std::vector<llvm::Function *> functions;
   for (llvm::Function &F : (*modPtr)) {
-    std::string funcName;
-    Graph_Function *funcGraph = new Graph_Function(ICFG->getNextID());
-    if (F.hasName()) {
-      funcName = F.getName();
-    } else {
-      funcName = "Unknown_Function";
-    } // End check for function name
-    funcGraph->setFunctionName(funcName);
-    Graph_Line *currentLineGraph = new Graph_Line(graphVersion);
-    for (llvm::BasicBlock &BB : F) {
-      for (llvm::Instruction &I : BB) {
-        unsigned int DILocLine = 0;
-        std::string DIFile = "Unknown_File";
-        getLocationInfo(I, DILocLine, DIFile);
-        /* Attach the line to current line if no debug information is found */
-        if (DILocLine == 0) {
-          DILocLine = currentLineGraph->getLineNumber(graphVersion);
-        } // End check for DILocLine
-        /* Create new Graph_Line container whenever new DILocLine is encountered */
-        if (DILocLine != currentLineGraph->getLineNumber(graphVersion)) {
-          if (!currentLineGraph->isLineInstructionEmpty()) {
-            funcGraph->pushFunctionLines(currentLineGraph);
-            ICFG->addSeqEdges(currentLineGraph);
-          } // End check for isLineInstructionEmpty
-          currentLineGraph = new Graph_Line(graphVersion);
-        } // End check for continuation for current line
-        if (!funcGraph->isFunctionFileSet()) {
-          funcGraph->setFunctionFile(DIFile);
-        } // End check for isFunctionFileSet
-        currentLineGraph->setLineNumber(graphVersion, DILocLine);
-        std::string instLabel;
-        llvm::raw_string_ostream rInstLabel(instLabel);
-        I.print(rInstLabel);
-        Graph_Instruction *currentInstGraph = new Graph_Instruction();
-        currentInstGraph->setInstructionLabel(instLabel);
+    functions.push_back(&F);
+  } // End loop for Module
+  std::vector<ICFG_Function_Plan> plans(functions.size());
+  std::atomic<size_t> nextFunction(0);
+  auto planFunctions = [&]() {
+    for (size_t i = nextFunction++; i < functions.size(); i = nextFunction++) {
+      planFunction(*functions[i], scope, plans[i]);
+    } // End loop for functions
+  };
+  size_t threadCount = std::min<size_t>(std::max(std::thread::hardware_concurrency(), 1u), functions.size());
+  std::vector<std::thread> threads;
+  for (size_t i = 1; i < threadCount; ++i) {
+    threads.push_back(std::thread(planFunctions));
+  } // End loop for starting threads
+  planFunctions();
+  for (auto &thread : threads) {
+    thread.join();
+  } // End loop for joining threads
+  /* The Graph is built in module order, so the IDs do not depend on the threads */
+  for (auto &plan : plans) {
+    Graph_Function *funcGraph = ICFG->createFunction(ICFG->getNextID());
+    funcGraph->setFunctionName(plan.name);
+    funcGraph->setFunctionFile(plan.file);
+    if (plan.summary) {
+      ICFG->pushGraphFunction(funcGraph);
+      ICFG->addVirtualNodes(funcGraph);
+      continue;
+    } // End check for summary
+    for (auto &linePlan : plan.lines) {
+      Graph_Line *currentLineGraph = ICFG->createLine(graphVersion);
+      currentLineGraph->setLineNumber(graphVersion, linePlan.lineNumber);
+      for (auto I : linePlan.instructions) {
+        /* The label is printed from the instruction when it is needed */
+        Graph_Instruction *currentInstGraph = ICFG->createInstruction();
         currentInstGraph->setInstructionID(ICFG->getNextID());
-        llvm::Instruction *iTmp = &I;
-        currentInstGraph->setInstructionPtr(iTmp);
+        currentInstGraph->setInstructionPtr(I);
+        currentInstGraph->setInstructionOpcode(I->getOpcodeName());
         currentLineGraph->pushLineInstruction(currentInstGraph);
-      } // End loop for BasicBlock
-    }   // End loop for Function
-    if (!currentLineGraph->isLineInstructionEmpty()) {
+      } // End loop for instructions
       funcGraph->pushFunctionLines(currentLineGraph);
       ICFG->addSeqEdges(currentLineGraph);
-    } // End check for isLineInstructionEmpty
+    } // End loop for lines
     if (!funcGraph->isFunctionLinesEmpty()) {
       ICFG->pushGraphFunction(funcGraph);
       ICFG->addVirtualNodes(funcGraph);
     } // End check for isFunctionLinesEmpty
-  }   // End loop for Module
+  }   // End loop for plans
+  /* Successors and callees are found through the instruction and virtual node indexes of the Graph */
   ICFG->addBranchEdges();
   ICFG->addFunctionCallEdges();
-  ICFG->printGraph("Graph_" + std::to_string(graphVersion));
   return ICFG;
 } // End buildICFG
 
+void getChangedFunctions(Module *mod, const std::map<std::string, std::set<long long>> &changedLines,
+                         std::set<std::string> &changedFuncs, std::map<std::string, std::set<std::string>> &calls) {
+  for (llvm::Function &F : *(mod->getPtr())) {
+    if (F.isDeclaration() || !F.hasName()) {
+      continue;
+    } // End check for function body
+    std::string funcName = F.getName();
+    std::set<std::string> &callees = calls[funcName];
+    std::string funcFile;
+    unsigned firstLine = std::numeric_limits<unsigned>::max();
+    unsigned lastLine = 0;
+    for (llvm::BasicBlock &BB : F) {
+      for (llvm::Instruction &I : BB) {
+        if (llvm::DILocation *DILoc = I.getDebugLoc()) {
+          if (funcFile.empty()) {
+            funcFile = DILoc->getFilename();
+          } // End check for funcFile
+          firstLine = std::min(firstLine, DILoc->getLine());
+          lastLine = std::max(lastLine, DILoc->getLine());
+        } // End check for DILoc
+        if (auto callSite = llvm::CallSite(&I)) {
+          const llvm::Function *Callee = callSite.getCalledFunction();
+          if (Callee && Callee->hasName() && !Callee->isIntrinsic()) {
+            std::string calleeName = Callee->getName();
+            callees.insert(calleeName);
+          } // End check for Callee
+        }   // End check for callSite
+      }     // End loop for BasicBlock
+    }       // End loop for Function
+    auto fileLines = changedLines.find(funcFile);
+    if (fileLines != changedLines.end()) {
+      /* A changed line within the lines of the function */
+      auto line = fileLines->second.lower_bound(firstLine);
+      if (line != fileLines->second.end() && *line <= lastLine) {
+        changedFuncs.insert(funcName);
+      } // End check for changed line
+    }   // End check for changed file
+  }     // End loop for functions
+} // End getChangedFunctions
+
+std::set<std::string> getFunctionScope(const std::set<std::string> &funcs,
+                                       const std::map<std::string, std::set<std::string>> &calls, unsigned depth) {
+  /* Calls are followed in both directions, from callers to callees and back */
+  std::map<std::string, std::set<std::string>> neighbours;
+  for (const auto &call : calls) {
+    for (const auto &callee : call.second) {
+      neighbours[call.first].insert(callee);
+      neighbours[callee].insert(call.first);
+    } // End loop for callees
+  }   // End loop for calls
+  std::set<std::string> scope(funcs);
+  std::set<std::string> frontier(funcs);
+  for (unsigned level = 0; level < depth && !frontier.empty(); ++level) {
+    std::set<std::string> next;
+    for (const auto &func : frontier) {
+      for (const auto &neighbour : neighbours[func]) {
+        if (scope.insert(neighbour).second) {
+          next.insert(neighbour);
+        } // End check for new function
+      }   // End loop for neighbour
+    }     // End loop for frontier
+    frontier.swap(next);
+  } // End loop for level
+  return scope;
+} // End getFunctionScope
+
 std::list<Diff_Mapping> generateLineMapping(Module *firstMod, Module *secondMod) {
-  std::list<Diff_Mapping> diffMap;
-  std::list<std::string> processedFiles;
+  /* Files are matched by name, the first file of the second module with a name is taken */
+  std::unordered_map<std::string, std::string> nextModuleFiles;
+  for (auto iterFile : (secondMod)->getFiles()) {
+    nextModuleFiles.insert(std::make_pair(boost::filesystem::path(iterFile).filename().string(), iterFile));
+  } // End loop for second module files
+  std::unordered_set<std::string> processedFiles;
+  std::vector<std::string> names;
+  std::vector<Diff_Mapping::sequence> ALines, BLines;
   /* Process files from first module */
   for (auto iterFile : (firstMod)->getFiles()) {
-    std::list<std::string> nextModuleFiles = (secondMod)->getFiles();
-    auto fileMatch = std::find_if(std::begin(nextModuleFiles), std::end(nextModuleFiles), [=](std::string f) {
-      return (boost::filesystem::path(f).filename() == boost::filesystem::path(iterFile).filename());
-    });
-    Diff_Mapping::sequence ALines, BLines;
+    std::string name = boost::filesystem::path(iterFile).filename().string();
+    processedFiles.insert(name);
+    names.push_back(name);
+    ALines.push_back(Diff_Mapping::sequence());
+    BLines.push_back(Diff_Mapping::sequence());
+    firstMod->readSource(iterFile, ALines.back());
+    auto fileMatch = nextModuleFiles.find(name);
     if (fileMatch != nextModuleFiles.end()) {
       /* Matching file exist */
-      processedFiles.push_back(boost::filesystem::path(iterFile).filename().c_str());
-      std::ifstream Aifs(iterFile.c_str());
-      std::ifstream Bifs((*fileMatch).c_str());
-      Diff_Mapping::elem buf;
-      while (getline(Aifs, buf)) {
-        ALines.push_back(buf);
-      } // End loop for Aifs
-      while (getline(Bifs, buf)) {
-        BLines.push_back(buf);
-      } // End loop for Bifs
-    } else {
-      /* File no longer exist */
-      processedFiles.push_back(boost::filesystem::path(iterFile).filename().c_str());
-      std::ifstream Aifs(iterFile.c_str());
-      Diff_Mapping::elem buf;
-      while (getline(Aifs, buf)) {
-        ALines.push_back(buf);
-      } // End loop for Aifs
-    }   // End check for nextModuleFiles
-    Diff_Util diff(ALines, BLines);
-    diff.compose();
-    Diff_Ses s = diff.getSes();
-    Diff_Mapping file(boost::filesystem::path(iterFile).filename().c_str());
-    file.putMapping(s.getSequence());
-    /* file.printMapping(); */
-    diffMap.push_back(file);
-  } // End loop for first module file processing
+      secondMod->readSource(fileMatch->second, BLines.back());
+    } // End check for nextModuleFiles
+  }   // End loop for first module file processing
   /* Check for new files in next module */
   for (auto iterFile : (secondMod)->getFiles()) {
-    auto fileMatch = std::find_if(std::begin(processedFiles), std::end(processedFiles),
-                                  [=](std::string f) { return (f == boost::filesystem::path(iterFile).filename()); });
-    if (fileMatch == processedFiles.end()) {
+    std::string name = boost::filesystem::path(iterFile).filename().string();
+    if (processedFiles.insert(name).second) {
       /* New file exist */
-      processedFiles.push_back(boost::filesystem::path(iterFile).filename().c_str());
-      Diff_Mapping::sequence ALines, BLines;
-      std::ifstream Bifs(iterFile.c_str());
-      Diff_Mapping::elem buf;
-      while (getline(Bifs, buf)) {
-        BLines.push_back(buf);
-      } // End loop for Bifs
-      Diff_Util diff(ALines, BLines);
-      diff.compose();
-      Diff_Ses s = diff.getSes();
-      Diff_Mapping file(boost::filesystem::path(iterFile).filename().c_str());
-      file.putMapping(s.getSequence());
-      /* file.printMapping(); */
-      diffMap.push_back(file);
+      names.push_back(name);
+      ALines.push_back(Diff_Mapping::sequence());
+      BLines.push_back(Diff_Mapping::sequence());
+      secondMod->readSource(iterFile, BLines.back());
     } // End check for processedFiles
   }   // End loop for second module file processing
-  return diffMap;
+  /* Files are diffed independently of each other, so they are shared among threads */
+  std::vector<Diff_Mapping> files;
+  for (auto name : names) {
+    files.push_back(Diff_Mapping(name));
+  } // End loop for names
+  std::atomic<size_t> nextFile(0);
+  auto diffFiles = [&]() {
+    for (size_t i = nextFile++; i < files.size(); i = nextFile++) {
+      Diff_Util diff(ALines[i], BLines[i]);
+      diff.compose();
+      files[i].putMapping(diff.getSes().getSequence());
+      /* files[i].printMapping(); */
+    } // End loop for files
+  };
+  size_t threadCount = std::min<size_t>(std::max(std::thread::hardware_concurrency(), 1u), files.size());
+  std::vector<std::thread> threads;
+  for (size_t i = 1; i < threadCount; ++i) {
+    threads.push_back(std::thread(diffFiles));
+  } // End loop for starting threads
+  diffFiles();
+  for (auto &thread : threads) {
+    thread.join();
+  } // End loop for joining threads
+  return std::list<Diff_Mapping>(files.begin(), files.end());
 } // End generateLineMapping
 
 std::list<Graph_Line *> getGraphLinesGivenLine(Graph *graph, long long lineNo, std::string fileName) {
-  std::list<Graph_Line *> graphLines;
-  bool foundLine = false;
-  for (auto func : graph->getGraphFunctions()) {
-    /* Matching with correct diff File */
-    if (func->getFunctionFile() == fileName) {
-      for (auto line : func->getFunctionLines()) {
-        /* Matching line of diff */
-        if (line->getLineNumber(graph->getGraphVersion()) == lineNo) {
-          graphLines.push_back(line);
-          foundLine = true;
-        } // End check for lineNo
-      }   // End loop for line
-      /* Same line cannot be spread across functions. Hence stop search if at least one line found */
-      if (foundLine) {
-        return graphLines;
-      } // End check for foundLine
-    }   // End check for fileName
-  }     // End loop for Functions
-  return graphLines;
+  if (lineNo < 0 || lineNo > std::numeric_limits<unsigned>::max()) {
+    return std::list<Graph_Line *>();
+  } // End check for lineNo range
+  return graph->findGraphLines(fileName, lineNo);
 } // End getGraphLinesGivenLine
 
 std::list<Graph_Line *> getPredGivenGraphLine(Graph_Line *line) {
   std::list<Graph_Line *> pred;
   Graph_Instruction *frontInst = line->getLineInstructions().front();
-  std::list<Graph_Edge *> edges = frontInst->getInstructionEdges();
+  const std::vector<Graph_Edge *> &edges = frontInst->getInstructionEdges();
   for (auto iter : edges) {
     if (iter->getEdgeTo() == frontInst) {
       pred.push_back(iter->getEdgeFrom()->getGraphLine());
@@ -256,7 +411,7 @@ std::list<Graph_Line *> getPredGivenGraphLine(Graph_Line *line) {
 std::list<Graph_Line *> getSuccGivenGraphLine(Graph_Line *line) {
   std::list<Graph_Line *> succ;
   Graph_Instruction *backInst = line->getLineInstructions().back();
-  std::list<Graph_Edge *> edges = backInst->getInstructionEdges();
+  const std::vector<Graph_Edge *> &edges = backInst->getInstructionEdges();
   for (auto iter : edges) {
     if (iter->getEdgeFrom() == backInst) {
       succ.push_back(iter->getEdgeTo()->getGraphLine());
@@ -269,10 +424,10 @@ std::string getGraphLineInstructionsAsString(Graph_Line *line) {
   std::string lineString;
   /* Iterate through the Graph_Line and make a string representation of the Instruction OpCode */
   for (auto inst : line->getLineInstructions()) {
-    /* If Ptr is not found, then it won't be present in the other version as well */
-    if (inst->getInstructionPtr() != NULL) {
-      lineString.append(inst->getInstructionPtr()->getOpcodeName()).append(" ");
-    } // End check for Instruction Ptr
+    /* Virtual nodes won't be present in the other version as well */
+    if (!inst->isInstructionVirtual()) {
+      lineString.append(inst->getInstructionOpcode()).append(" ");
+    } // End check for virtual node
   }   // End loop for Graph_Line
   if (!lineString.empty()) {
     lineString.pop_back();
@@ -280,8 +435,8 @@ std::string getGraphLineInstructionsAsString(Graph_Line *line) {
   return lineString;
 } // End getGraphLineInstructionsAsString
 
-Graph_Line *resolveMatchedLinesWithNoExtactStringMatch(std::list<Graph_Line *> matchedLines, std::string lineFromString,
-                                                       unsigned int graphVersion) {
+Graph_Line *resolveMatchedLinesWithNoExtactStringMatch(const std::list<Graph_Line *> &matchedLines,
+                                                       const std::string &lineFromString, unsigned int graphVersion) {
   int minDiff = std::numeric_limits<int>::max();
   Graph_Line *tmp = NULL;
   for (auto line : matchedLines) {
@@ -313,7 +468,7 @@ Graph_Line *resolveMatchedLinesWithNoExtactStringMatch(std::list<Graph_Line *> m
   return tmp;
 } // End resolveMatchedLinesWithNoExtactStringMatch
 
-Graph_Line *findMatchedLine(Graph_Line *t, Graph *matchTo, Graph *matchFrom, Diff_Mapping diff) {
+Graph_Line *findMatchedLine(Graph_Line *t, Graph *matchTo, Graph *matchFrom, const Diff_Mapping &diff) {
   /* Extra check to ensure correct diff File */
   if (diff.getFileName() != t->getGraphFunction()->getFunctionFile()) {
     std::cerr << "findMatchedLine is using wrong diff File\n";
@@ -396,7 +551,7 @@ Graph_Edge *getEdge(Graph_Instruction *fromNode, Graph_Instruction *toNode, Grap
 } // End getEdge
 
 Graph_Edge *getInBetweenEdge(Graph_Line *fromLine, Graph_Line *toLine) {
-  std::list<Graph_Instruction *> fromLineInstructions = fromLine->getLineInstructions();
+  const std::vector<Graph_Instruction *> &fromLineInstructions = fromLine->getLineInstructions();
   for (auto fromLineInstIter = fromLineInstructions.rbegin(); fromLineInstIter != fromLineInstructions.rend();
        ++fromLineInstIter) {
     Graph_Instruction *fromLineInst = *fromLineInstIter;
@@ -410,8 +565,8 @@ Graph_Edge *getInBetweenEdge(Graph_Line *fromLine, Graph_Line *toLine) {
   return NULL;
 } // End getInBetweenEdge
 
-Graph_Line *getNewlyAdded(Graph *MVICFG, Graph *ICFG, Graph_Line *newLine, Diff_Mapping diff) {
-  std::list<long long> addedLines = diff.getAddedLines();
+Graph_Line *getNewlyAdded(Graph *MVICFG, Graph *ICFG, Graph_Line *newLine, const Diff_Mapping &diff) {
+  const std::list<long long> &addedLines = diff.getAddedLines();
   auto findAdd = std::find_if(std::begin(addedLines), std::end(addedLines),
                               [=](long long no) { return (no == newLine->getLineNumber(ICFG->getGraphVersion())); });
   if (findAdd != addedLines.end()) {
@@ -429,8 +584,8 @@ Graph_Line *getNewlyAdded(Graph *MVICFG, Graph *ICFG, Graph_Line *newLine, Diff_
   return NULL;
 } // End getNewlyAdded
 
-std::list<Graph_Line *> addToMVICFG(Graph *MVICFG, Graph *ICFG, Diff_Mapping diff, unsigned Version) {
-  std::list<long long> addedLines = diff.getAddedLines();
+std::list<Graph_Line *> addToMVICFG(Graph *MVICFG, Graph *ICFG, const Diff_Mapping &diff, unsigned Version) {
+  const std::list<long long> &addedLines = diff.getAddedLines();
   std::string fileName = diff.getFileName();
   std::list<Graph_Line *> N;
   std::list<Graph_Line *> icfgN;
@@ -446,7 +601,7 @@ std::list<Graph_Line *> addToMVICFG(Graph *MVICFG, Graph *ICFG, Diff_Mapping dif
     for (auto addedLine : addedGraphLines) {
       Graph_Function *func = addedLine->getGraphFunction();
       /* Get corresponding MVICFG Graph_Function */
-      std::list<Graph_Function *> mvicfgFunctions = MVICFG->getGraphFunctions();
+      const std::vector<Graph_Function *> &mvicfgFunctions = MVICFG->getGraphFunctions();
       auto findMvicfgFunc =
           std::find_if(std::begin(mvicfgFunctions), std::end(mvicfgFunctions), [=](Graph_Function *mvicfgfunc) {
             return mvicfgfunc->getFunctionName() == func->getFunctionName();
@@ -454,22 +609,26 @@ std::list<Graph_Line *> addToMVICFG(Graph *MVICFG, Graph *ICFG, Diff_Mapping dif
       /* Create new one if it doesn't exist */
       Graph_Function *mvicfgFunc;
       if (findMvicfgFunc == mvicfgFunctions.end()) {
-        mvicfgFunc = new Graph_Function(MVICFG->getNextID());
-        Graph_Function *mvicfgFunc = new Graph_Function(MVICFG->getNextID());
+        mvicfgFunc = MVICFG->createFunction(MVICFG->getNextID());
+        Graph_Function *mvicfgFunc = MVICFG->createFunction(MVICFG->getNextID());
         mvicfgFunc->setFunctionName(func->getFunctionName());
         mvicfgFunc->setFunctionFile(func->getFunctionFile());
       } else {
         mvicfgFunc = *findMvicfgFunc;
       } // End check for findMvicfgFunc
       /* Iterating through addedLine and adding instructions to MVICFG */
-      Graph_Line *newLine = new Graph_Line(ICFG->getGraphVersion());
+      Graph_Line *newLine = MVICFG->createLine(ICFG->getGraphVersion());
       newLine->setLineNumber(MVICFG->getGraphVersion(), 0);
       newLine->setLineNumber(ICFG->getGraphVersion(), addedLine->getLineNumber(ICFG->getGraphVersion()));
       for (auto inst : addedLine->getLineInstructions()) {
-        Graph_Instruction *newInstruction = new Graph_Instruction();
-        newInstruction->setInstructionLabel(inst->getInstructionLabel());
+        Graph_Instruction *newInstruction = MVICFG->createInstruction();
         newInstruction->setInstructionID(MVICFG->getNextID());
         newInstruction->setInstructionPtr(inst->getInstructionPtr());
+        if (!inst->getInstructionPtr()) {
+          /* Only virtual nodes have a label that cannot be printed from the instruction */
+          newInstruction->setInstructionLabel(inst->getInstructionLabel());
+        } // End check for virtual node
+        newInstruction->setInstructionOpcode(inst->getInstructionOpcode());
         newLine->pushLineInstruction(newInstruction);
       } // End loop for adding instructions
       mvicfgFunc->pushFunctionLines(newLine);
@@ -528,7 +687,7 @@ std::list<Graph_Line *> addToMVICFG(Graph *MVICFG, Graph *ICFG, Diff_Mapping dif
                       edgeType = Graph_Edge::MVICFG_ADD;
                     } // End check for foundEdge
                   }   // End check for getEdgeType
-                  Graph_Edge *newEdge = new Graph_Edge(tDashInst, nInst, edgeType, Version);
+                  Graph_Edge *newEdge = MVICFG->createEdge(tDashInst, nInst, edgeType, Version);
                   MVICFG->addEdge(tDashInst, nInst, newEdge);
                 } else {
                   checkEdge->pushEdgeVersions(Version);
@@ -560,7 +719,7 @@ std::list<Graph_Line *> addToMVICFG(Graph *MVICFG, Graph *ICFG, Diff_Mapping dif
                       edgeType = Graph_Edge::MVICFG_ADD;
                     } // End check for foundEdge
                   }   // End check for edgeType
-                  Graph_Edge *newEdge = new Graph_Edge(nInst, tDashInst, edgeType, Version);
+                  Graph_Edge *newEdge = MVICFG->createEdge(nInst, tDashInst, edgeType, Version);
                   MVICFG->addEdge(nInst, tDashInst, newEdge);
                 } else {
                   checkEdge->pushEdgeVersions(Version);
@@ -580,31 +739,22 @@ std::list<Graph_Line *> addToMVICFG(Graph *MVICFG, Graph *ICFG, Diff_Mapping dif
 } // End addToMVICFG
 
 Graph_Instruction *getMatchedInstructionFromGraph(Graph *graphToMatch, Graph_Instruction *instToMatch) {
-  for (auto func : graphToMatch->getGraphFunctions()) {
-    for (auto line : func->getFunctionLines()) {
-      std::list<Graph_Instruction *> lineInstList = line->getLineInstructions();
-      std::_List_iterator<Graph_Instruction *> findInst;
-      if (instToMatch->getInstructionPtr() == NULL) {
-        /* This is a virtual node and they always share their line numbers */
-        unsigned instToLineNumber = instToMatch->getGraphLine()->getLineNumber(graphToMatch->getGraphVersion());
-        findInst = std::find_if(std::begin(lineInstList), std::end(lineInstList), [=](Graph_Instruction *inst) {
-          return (inst->getGraphLine()->getLineNumber(graphToMatch->getGraphVersion()) == instToLineNumber);
-        });
-      } else {
-        findInst = std::find_if(std::begin(lineInstList), std::end(lineInstList), [=](Graph_Instruction *inst) {
-          return (inst->getInstructionPtr() == instToMatch->getInstructionPtr());
-        });
-      } // End check for instToMatch
-      if (findInst != lineInstList.end()) {
-        return *findInst;
-      } // End check for findInst
-    }   // End loop for line
-  }     // End loop for func
-  return NULL;
+  if (instToMatch->isInstructionVirtual()) {
+    /* This is a virtual node and they always share their line numbers within a function */
+    Graph_Line *line = instToMatch->getGraphLine();
+    return graphToMatch->findVirtualInstruction(line->getGraphFunction()->getFunctionName(),
+                                                line->getLineNumber(line->getLineGraphVersion()));
+  } // End check for instToMatch
+  /* Instructions of graphToMatch match themselves, also after their LLVM Module was released */
+  Graph_Line *line = instToMatch->getGraphLine();
+  if (line && line->getGraphFunction() && line->getGraphFunction()->getGraph() == graphToMatch) {
+    return instToMatch;
+  } // End check for instruction of graphToMatch
+  return graphToMatch->findMatchedInstruction(instToMatch->getInstructionPtr());
 } // End getMatchedInstructionFromGraph
 
-void getEdgesForAddedLines(Graph *MVICFG, Graph *ICFG, std::list<Graph_Line *> addedLines,
-                           std::list<Diff_Mapping> diffMap, unsigned Version) {
+void getEdgesForAddedLines(Graph *MVICFG, Graph *ICFG, const std::list<Graph_Line *> &addedLines,
+                           const std::list<Diff_Mapping> &diffMap, unsigned Version) {
   for (auto line : addedLines) {
     for (auto lineInst : line->getLineInstructions()) {
       Graph_Instruction *lineDashInst = getMatchedInstructionFromGraph(ICFG, lineInst);
@@ -628,7 +778,7 @@ void getEdgesForAddedLines(Graph *MVICFG, Graph *ICFG, std::list<Graph_Line *> a
         } // End check for to
         Graph_Edge *checkEdge = getEdge(from, to, edgeDash->getEdgeType());
         if (!checkEdge) {
-          Graph_Edge *newEdge = new Graph_Edge(from, to, edgeDash->getEdgeType(), ICFG->getGraphVersion());
+          Graph_Edge *newEdge = MVICFG->createEdge(from, to, edgeDash->getEdgeType(), ICFG->getGraphVersion());
           MVICFG->addEdge(from, to, newEdge);
         } // End check for checkEdge
       }   // End loop for adding edges
@@ -636,8 +786,8 @@ void getEdgesForAddedLines(Graph *MVICFG, Graph *ICFG, std::list<Graph_Line *> a
   }       // End loop for line
 } // End getEdgesForAddedLines
 
-std::list<Graph_Line *> deleteFromMVICFG(Graph *MVICFG, Graph *ICFG, Diff_Mapping diff, unsigned Version) {
-  std::list<long long> deletedLines = diff.getDeletedLines();
+std::list<Graph_Line *> deleteFromMVICFG(Graph *MVICFG, Graph *ICFG, const Diff_Mapping &diff, unsigned Version) {
+  const std::list<long long> &deletedLines = diff.getDeletedLines();
   std::string fileName = diff.getFileName();
   std::list<Graph_Line *> N;
   /* Identify all deleted lines */
@@ -727,7 +877,7 @@ std::list<Graph_Line *> deleteFromMVICFG(Graph *MVICFG, Graph *ICFG, Diff_Mappin
                                 edgeType = Graph_Edge::MVICFG_DEL;
                               } // End check for foundEdge
                             }   // End check for getEdgeType
-                            Graph_Edge *newEdge = new Graph_Edge(mInst, nInst, edgeType, Version);
+                            Graph_Edge *newEdge = MVICFG->createEdge(mInst, nInst, edgeType, Version);
                             MVICFG->addEdge(mInst, nInst, newEdge);
                           } // End check for checkEdge
                         } else if (findMSucc != succDash.end()) {
@@ -757,7 +907,7 @@ std::list<Graph_Line *> deleteFromMVICFG(Graph *MVICFG, Graph *ICFG, Diff_Mappin
                                 edgeType = Graph_Edge::MVICFG_DEL;
                               } // End check for foundEdge
                             }   // End check for getEdgeType
-                            Graph_Edge *newEdge = new Graph_Edge(nInst, mInst, edgeType, Version);
+                            Graph_Edge *newEdge = MVICFG->createEdge(nInst, mInst, edgeType, Version);
                             MVICFG->addEdge(nInst, mInst, newEdge);
                           } // End check for checkEdge
                         }   // End check for Predecessors and Successors
@@ -783,8 +933,9 @@ std::list<Graph_Line *> deleteFromMVICFG(Graph *MVICFG, Graph *ICFG, Diff_Mappin
   return N;
 } // End deleteFromMVICFG
 
-std::map<Graph_Line *, Graph_Line *> matchedInMVICFG(Graph *MVICFG, Graph *ICFG, Diff_Mapping diff, unsigned Version) {
-  std::map<long long, long long> matchedLines = diff.getMatchedLines();
+std::map<Graph_Line *, Graph_Line *> matchedInMVICFG(Graph *MVICFG, Graph *ICFG, const Diff_Mapping &diff,
+                                                     unsigned Version) {
+  const std::map<long long, long long> &matchedLines = diff.getMatchedLines();
   std::string fileName = diff.getFileName();
   std::map<Graph_Line *, Graph_Line *> matchedGraphLines;
   std::list<Graph_Line *> mvicfgM;
@@ -894,12 +1045,13 @@ std::map<Graph_Line *, Graph_Line *> matchedInMVICFG(Graph *MVICFG, Graph *ICFG,
   return matchedGraphLines;
 } // End matchedInMVICFG
 
-void updateMVICFGVersion(Graph *MVICFG, std::list<Graph_Line *> addedLines, std::list<Graph_Line *> deletedLines,
-                         std::list<Diff_Mapping> diffMap, unsigned Version) {
+void updateMVICFGVersion(Graph *MVICFG, const std::list<Graph_Line *> &addedLines,
+                         const std::list<Graph_Line *> &deletedLines, const std::list<Diff_Mapping> &diffMap,
+                         unsigned Version) {
   /* Update Graph_Line information */
   for (auto func : MVICFG->getGraphFunctions()) {
     auto findDiff = std::find_if(std::begin(diffMap), std::end(diffMap),
-                                 [=](Diff_Mapping d) { return (d.getFileName() == func->getFunctionFile()); });
+                                 [=](const Diff_Mapping &d) { return (d.getFileName() == func->getFunctionFile()); });
     if (findDiff != diffMap.end()) {
       for (auto line : func->getFunctionLines()) {
         auto findInAdd = std::find_if(std::begin(addedLines), std::end(addedLines),
@@ -970,4 +1122,41 @@ void updateMVICFGVersion(Graph *MVICFG, std::list<Graph_Line *> addedLines, std:
     }       // End check for edgeFromInst
   }         // End loop for updating Graph_Edge information
 } // End updateMVICFGVersion
+
+void mergeICFG(Graph *MVICFG, Graph *ICFG, const std::list<Diff_Mapping> &diffMap, unsigned graphVersion, Trace &trace,
+               std::list<Graph_Line *> &addedLines, std::list<Graph_Line *> &deletedLines,
+               const std::set<std::string> *scopeFiles) {
+  std::map<Graph_Line *, Graph_Line *> matchedLines; /**<Map From ICFG Graph_Line to MVICFG Graph_Line */
+  for (const auto &iter : diffMap) {
+    // iter.printFileInfo();
+    if (scopeFiles && scopeFiles->find(iter.getFileName()) == scopeFiles->end()) {
+      continue;
+    } // End check for scopeFiles
+    std::list<Graph_Line *> iterAdd;
+    std::list<Graph_Line *> iterDel;
+    std::map<Graph_Line *, Graph_Line *> iterMatch;
+    {
+      Trace_Scope scope(trace, "add", graphVersion);
+      iterAdd = addToMVICFG(MVICFG, ICFG, iter, graphVersion);
+    }
+    {
+      Trace_Scope scope(trace, "delete", graphVersion);
+      iterDel = deleteFromMVICFG(MVICFG, ICFG, iter, graphVersion);
+    }
+    {
+      Trace_Scope scope(trace, "match", graphVersion);
+      iterMatch = matchedInMVICFG(MVICFG, ICFG, iter, graphVersion);
+    }
+    addedLines.insert(addedLines.end(), iterAdd.begin(), iterAdd.end());
+    deletedLines.insert(deletedLines.end(), iterDel.begin(), iterDel.end());
+    matchedLines.insert(iterMatch.begin(), iterMatch.end());
+  } // End loop for diffMap
+  Trace_Scope scope(trace, "update", graphVersion);
+  /* Update Map Edges */
+  getEdgesForAddedLines(MVICFG, ICFG, addedLines, diffMap, graphVersion);
+  /* Update the matched lines to get new temporary variable mapping for old lines */
+  updateMVICFGVersion(MVICFG, addedLines, deletedLines, diffMap, graphVersion);
+  /* Update Map Version */
+  MVICFG->setGraphVersion(graphVersion);
+} // End mergeICFG
 } // namespace hydrogen_framework
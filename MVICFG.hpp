@@ -22,16 +22,36 @@ class Graph_Edge;
 class Graph_Instruction;
 class Graph_Line;
 class Module;
+class Trace;
 
 /**
- * Report paths added in the set of lines.
+ * Report the paths added in addedLines and the paths deleted in deletedLines, in one search of the MVICFG.
+ * The search of each side stops after maxPaths paths and the whole search after maxMillis ms, 0 means no limit.
+ * Returns FALSE if a limit stopped the search, the counts are then lower bounds.
  */
-int reportPaths(Graph *MVICFG, std::list<Graph_Line *> lines, bool verbose = false);
+bool reportPaths(Graph *MVICFG, const std::list<Graph_Line *> &addedLines, const std::list<Graph_Line *> &deletedLines,
+                 int &pathsAdded, int &pathsDeleted, unsigned long long maxPaths = 0, long long maxMillis = 0,
+                 bool verbose = false);
 
 /**
  * Build ICFG for the given module
+ * With a scope, only the functions named in it are built in detail and the rest are summarized
+ * by their Entry and Exit nodes.
  */
-Graph *buildICFG(Module *mod, unsigned graphVersion);
+Graph *buildICFG(Module *mod, unsigned graphVersion, const std::set<std::string> *scope = NULL);
+
+/**
+ * Collect the functions of the module with a line in changedLines, which are keyed by file name.
+ * The functions called by each function are added to calls.
+ */
+void getChangedFunctions(Module *mod, const std::map<std::string, std::set<long long>> &changedLines,
+                         std::set<std::string> &changedFuncs, std::map<std::string, std::set<std::string>> &calls);
+
+/**
+ * Return the functions together with their callers and callees up to depth calls away
+ */
+std::set<std::string> getFunctionScope(const std::set<std::string> &funcs,
+                                       const std::map<std::string, std::set<std::string>> &calls, unsigned depth);
 
 /**
  * Generate Line Mappings between two modules
@@ -66,15 +86,15 @@ std::string getGraphLineInstructionsAsString(Graph_Line *line);
  * Currently will throw an warning if heuristic skips more than 2 OpCode to match the lines
  * Returns NULL if no heuristic match is found
  */
-Graph_Line *resolveMatchedLinesWithNoExtactStringMatch(std::list<Graph_Line *> matchedLines, std::string lineFromString,
-                                                       unsigned int graphVersion);
+Graph_Line *resolveMatchedLinesWithNoExtactStringMatch(const std::list<Graph_Line *> &matchedLines,
+                                                       const std::string &lineFromString, unsigned int graphVersion);
 
 /**
  * Find matched Node
  * Returns NULL if no match found
  * Always make sure to check that the Graph_Line is from the diff being used
  */
-Graph_Line *findMatchedLine(Graph_Line *t, Graph *matchTo, Graph *matchFrom, Diff_Mapping diff);
+Graph_Line *findMatchedLine(Graph_Line *t, Graph *matchTo, Graph *matchFrom, const Diff_Mapping &diff);
 
 /**
  * Get the edge between two given nodes
@@ -95,12 +115,12 @@ Graph_Edge *getInBetweenEdge(Graph_Line *fromLine, Graph_Line *toLine);
  * Used only when findMatchedLine fails to retrieve the same
  * Returns NULL if no such line is found
  */
-Graph_Line *getNewlyAdded(Graph *MVICFG, Graph *ICFG, Graph_Line *newLine, Diff_Mapping diff);
+Graph_Line *getNewlyAdded(Graph *MVICFG, Graph *ICFG, Graph_Line *newLine, const Diff_Mapping &diff);
 
 /**
  * Add nodes to MVICFG and returns the added MVICFG lines
  */
-std::list<Graph_Line *> addToMVICFG(Graph *MVICFG, Graph *ICFG, Diff_Mapping diff, unsigned Version);
+std::list<Graph_Line *> addToMVICFG(Graph *MVICFG, Graph *ICFG, const Diff_Mapping &diff, unsigned Version);
 
 /**
  * Get matching Graph_Instruction from given Graph given a Graph_Instruction using LLVM PTR
@@ -111,23 +131,34 @@ Graph_Instruction *getMatchedInstructionFromGraph(Graph *graphToMatch, Graph_Ins
 /**
  * Import edges from ICFG instruction for added Graph_Line
  */
-void getEdgesForAddedLines(Graph *MVICFG, Graph *ICFG, std::list<Graph_Line *> addedLines,
-                           std::list<Diff_Mapping> diffMap, unsigned Version);
+void getEdgesForAddedLines(Graph *MVICFG, Graph *ICFG, const std::list<Graph_Line *> &addedLines,
+                           const std::list<Diff_Mapping> &diffMap, unsigned Version);
 
 /**
  * Mark deleted nodes in MVICFG and returns the deleted MVICFG lines
  */
-std::list<Graph_Line *> deleteFromMVICFG(Graph *MVICFG, Graph *ICFG, Diff_Mapping diff, unsigned Version);
+std::list<Graph_Line *> deleteFromMVICFG(Graph *MVICFG, Graph *ICFG, const Diff_Mapping &diff, unsigned Version);
 
 /**
  * Returns the corresponding matched Graph_Line in MVICFG from ICFG
  */
-std::map<Graph_Line *, Graph_Line *> matchedInMVICFG(Graph *MVICFG, Graph *ICFG, Diff_Mapping diff, unsigned Version);
+std::map<Graph_Line *, Graph_Line *> matchedInMVICFG(Graph *MVICFG, Graph *ICFG, const Diff_Mapping &diff,
+                                                     unsigned Version);
 
 /**
  * Update the Edge and Node information for MVICFG
  */
-void updateMVICFGVersion(Graph *MVICFG, std::list<Graph_Line *> addedLines, std::list<Graph_Line *> deletedLines,
-                         std::list<Diff_Mapping> diffMap, unsigned Version);
+void updateMVICFGVersion(Graph *MVICFG, const std::list<Graph_Line *> &addedLines,
+                         const std::list<Graph_Line *> &deletedLines, const std::list<Diff_Mapping> &diffMap,
+                         unsigned Version);
+
+/**
+ * Merge the ICFG of graphVersion into the MVICFG along the diffs of its files and make it the MVICFG version.
+ * With scopeFiles, the diffs of the other files are skipped. The lines the version added to and deleted from the
+ * MVICFG are returned in addedLines and deletedLines.
+ */
+void mergeICFG(Graph *MVICFG, Graph *ICFG, const std::list<Diff_Mapping> &diffMap, unsigned graphVersion, Trace &trace,
+               std::list<Graph_Line *> &addedLines, std::list<Graph_Line *> &deletedLines,
+               const std::set<std::string> *scopeFiles = NULL);
 } // namespace hydrogen_framework
 #endif
@@ -6,23 +6,43 @@
 #include "Module.hpp"
 namespace hydrogen_framework {
 bool Module::setModule(int ver, std::string file) {
-  modVersion = ver;
-  llvm::StringRef modulePath(file);
+  setModuleFile(ver, file);
+  return loadModule();
+} // End setModule
+
+bool Module::loadModule() {
+  llvm::StringRef modulePath(modFile);
   llvm::SMDiagnostic error;
-  modPtr = llvm::parseIRFile(modulePath, error, modContext);
+  /* The old Module must go before the context it was created in */
+  releaseModule();
+  modContext.reset(new llvm::LLVMContext());
+  modPtr = llvm::parseIRFile(modulePath, error, *modContext);
   /* Parsing Error handling */
   if (!modPtr) {
     std::string errorMessage;
     llvm::raw_string_ostream output(errorMessage);
     /* error.print("Error in parsing the file ", output); */
-    std::cerr << "Error in parsing the " << file << "\n";
+    std::cerr << "Error in parsing the " << modFile << "\n";
     return false;
   } // End check for modPtr
   /* Verifying Module */
   if (llvm::verifyModule(*modPtr, &llvm::errs()) != 0) {
-    std::cerr << "Error in verifying the Module : " << file << "\n";
+    std::cerr << "Error in verifying the Module : " << modFile << "\n";
     return false;
   } // End check for verifyModule
   return true;
-} // End setModule
+} // End loadModule
+
+void Module::readSource(std::string file, std::vector<std::string> &lines) {
+  auto source = modSources.find(file);
+  if (source != modSources.end()) {
+    lines.insert(lines.end(), source->second.begin(), source->second.end());
+    return;
+  } // End check for source in memory
+  std::ifstream ifs(file.c_str());
+  std::string buf;
+  while (getline(ifs, buf)) {
+    lines.push_back(buf);
+  } // End loop for ifs
+} // End readSource
 } // namespace hydrogen_framework
@@ -6,6 +6,7 @@
 #ifndef MODULE_H
 #define MODULE_H
 
+#include <fstream>
 #include <iostream>
 #include <list>
 #include <llvm/IR/LLVMContext.h>
@@ -14,6 +15,9 @@
 #include <llvm/IRReader/IRReader.h>
 #include <llvm/Support/SourceMgr.h>
 #include <llvm/Support/raw_ostream.h>
+#include <map>
+#include <string>
+#include <vector>
 
 namespace hydrogen_framework {
 /**
@@ -38,6 +42,29 @@ public:
    */
   bool setModule(int ver, std::string file);
 
+  /**
+   * Set modVersion and modFile without loading the LLVM Module
+   */
+  void setModuleFile(int ver, std::string file) {
+    modVersion = ver;
+    modFile = file;
+  }
+
+  /**
+   * Parse and verify modFile into a fresh context
+   * Returns FALSE if LLVM IR parsing error is found
+   */
+  bool loadModule();
+
+  /**
+   * Free the LLVM Module and its context
+   * modVersion and modFiles stay available
+   */
+  void releaseModule() {
+    modPtr.reset();
+    modContext.reset();
+  }
+
   /**
    * Set modFiles by swapping out with the incoming list of files
    */
@@ -48,6 +75,11 @@ public:
    */
   int getVersion() { return modVersion; }
 
+  /**
+   * Return modFile
+   */
+  std::string getFile() { return modFile; }
+
   /**
    * Return modPtr
    */
@@ -56,13 +88,25 @@ public:
   /**
    * Return modFiles;
    */
-  std::list<std::string> getFiles() { return modFiles; }
+  const std::list<std::string> &getFiles() { return modFiles; }
+
+  /**
+   * Keep the lines of a source file in memory, to be used instead of the file on disk
+   */
+  void setSource(std::string file, std::vector<std::string> lines) { modSources[file].swap(lines); }
+
+  /**
+   * Read the lines of a source file of the module, from memory if setSource was used for it
+   */
+  void readSource(std::string file, std::vector<std::string> &lines);
 
 private:
-  int modVersion;                       /**< Module Version */
-  llvm::LLVMContext modContext;         /**< LLVM Module Context */
-  std::unique_ptr<llvm::Module> modPtr; /**< LLVM Module Pointer */
-  std::list<std::string> modFiles;      /**< Source files for the LLVM Module */
-};                                      // End module class
+  int modVersion;                                             /**< Module Version */
+  std::string modFile;                                        /**< Bytecode file of the LLVM Module */
+  std::unique_ptr<llvm::LLVMContext> modContext;              /**< LLVM Module Context */
+  std::unique_ptr<llvm::Module> modPtr;                       /**< LLVM Module Pointer */
+  std::list<std::string> modFiles;                            /**< Source files for the LLVM Module */
+  std::map<std::string, std::vector<std::string>> modSources; /**< Lines of source files kept in memory */
+};                                                            // End module class
 } // namespace hydrogen_framework
 #endif
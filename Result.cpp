@@ -0,0 +1,122 @@
+/**
+ * @author Ashwin K J
+ * @file
+ * Implementing Result.hpp
+ */
+#include "Result.hpp"
+#include <cstdio>
+
+namespace hydrogen_framework {
+void Result::setArgs(int argc, char *argv[]) {
+  resultArgs.clear();
+  for (auto i = 0; i < argc; ++i) {
+    resultArgs.push_back(argv[i]);
+  } // End loop for arguments
+} // End setArgs
+
+void Result::addTiming(std::string phase, long long milliseconds) {
+  for (auto &iter : resultTiming) {
+    if (iter.first == phase) {
+      iter.second += milliseconds;
+      return;
+    } // End check for phase
+  }   // End loop for resultTiming
+  resultTiming.push_back(std::pair<std::string, long long>(phase, milliseconds));
+} // End addTiming
+
+void Result::writeText(std::ostream &out) {
+  out << "Input Args:\n";
+  for (auto arg : resultArgs) {
+    out << arg << "  ";
+  } // End loop for writing arguments
+  out << "\n";
+  for (auto iter : resultTiming) {
+    if (iter.first == "mvicfg") {
+      out << "Finished Building MVICFG in " << iter.second << "ms\n";
+    } // End check for MVICFG timing
+  }   // End loop for resultTiming
+  out << "Nodes: " << resultNodes << "\n";
+  out << "Edges: " << resultEdges << "\n";
+  for (auto pair : resultPaths) {
+    auto addedRemoved = pair.second;
+    out << "Version " << pair.first << " added " << addedRemoved.first << " paths"
+        << "\n";
+    out << "Version " << pair.first << " removed " << addedRemoved.second << " paths"
+        << "\n";
+    if (resultTruncated.count(pair.first)) {
+      out << "Version " << pair.first << " path search stopped at the limit, the counts are lower bounds\n";
+    } // End check for resultTruncated
+  }   // End loop for resultPaths
+} // End writeText
+
+void Result::writeJSON(std::ostream &out) {
+  out << "{\n  \"args\": [";
+  bool first = true;
+  for (auto arg : resultArgs) {
+    out << (first ? "" : ", ") << escapeJSON(arg);
+    first = false;
+  } // End loop for resultArgs
+  out << "],\n  \"timings_ms\": {";
+  first = true;
+  for (auto iter : resultTiming) {
+    out << (first ? "" : ", ") << escapeJSON(iter.first) << ": " << iter.second;
+    first = false;
+  } // End loop for resultTiming
+  out << "},\n  \"nodes\": " << resultNodes << ",\n  \"edges\": " << resultEdges << ",\n  \"versions\": [";
+  first = true;
+  for (auto pair : resultPaths) {
+    out << (first ? "\n" : ",\n") << "    {\"version\": " << pair.first << ", \"paths_added\": " << pair.second.first
+        << ", \"paths_removed\": " << pair.second.second
+        << ", \"paths_truncated\": " << (resultTruncated.count(pair.first) ? "true" : "false") << "}";
+    first = false;
+  } // End loop for resultPaths
+  out << (first ? "]\n}\n" : "\n  ]\n}\n");
+} // End writeJSON
+
+bool Result::writeFiles() {
+  std::ofstream rFile("Result.txt", std::ios::trunc);
+  std::ofstream jFile("Result.json", std::ios::trunc);
+  if (!rFile.is_open() || !jFile.is_open()) {
+    std::cerr << "Unable to open file for printing the output\n";
+    return false;
+  } // End check for Result files
+  writeText(rFile);
+  writeJSON(jFile);
+  rFile.close();
+  jFile.close();
+  return true;
+} // End writeFiles
+
+std::string Result::escapeJSON(const std::string &str) {
+  std::string escaped = "\"";
+  for (char c : str) {
+    switch (c) {
+    case '"':
+      escaped += "\\\"";
+      break;
+    case '\\':
+      escaped += "\\\\";
+      break;
+    case '\n':
+      escaped += "\\n";
+      break;
+    case '\t':
+      escaped += "\\t";
+      break;
+    case '\r':
+      escaped += "\\r";
+      break;
+    default:
+      if (static_cast<unsigned char>(c) < 0x20) {
+        char buffer[8];
+        std::snprintf(buffer, sizeof(buffer), "\\u%04x", static_cast<unsigned char>(c));
+        escaped += buffer;
+      } else {
+        escaped += c;
+      } // End check for control characters
+    }   // End switch on character
+  }     // End loop for str
+  escaped += "\"";
+  return escaped;
+} // End escapeJSON
+} // namespace hydrogen_framework
@@ -0,0 +1,88 @@
+/**
+ * @author Ashwin K J
+ * @file
+ * Result class: Collecting and writing the outcome of a Hydrogen run
+ */
+#ifndef RESULT_H
+#define RESULT_H
+
+#include <fstream>
+#include <iostream>
+#include <list>
+#include <map>
+#include <set>
+#include <string>
+#include <utility>
+
+namespace hydrogen_framework {
+/**
+ * Result class: Hold the numbers of a run and write them as Result.txt and Result.json
+ */
+class Result {
+public:
+  /**
+   * Constructor
+   */
+  Result() : resultNodes(0), resultEdges(0) {}
+
+  /**
+   * Set resultArgs from the command line
+   */
+  void setArgs(int argc, char *argv[]);
+
+  /**
+   * Record the wall time of a phase in milliseconds
+   * Phases are written in the order they were first recorded
+   */
+  void addTiming(std::string phase, long long milliseconds);
+
+  /**
+   * Set the node and edge count of the final MVICFG
+   */
+  void setGraphSize(int nodes, int edges) {
+    resultNodes = nodes;
+    resultEdges = edges;
+  }
+
+  /**
+   * Record the paths added and removed by a version
+   * truncated is set if the path search stopped at a limit, so that the counts are lower bounds
+   */
+  void addVersionPaths(unsigned version, int added, int removed, bool truncated = false) {
+    resultPaths[version] = std::pair<int, int>(added, removed);
+    if (truncated) {
+      resultTruncated.insert(version);
+    } // End check for truncated
+  }
+
+  /**
+   * Write the human readable report
+   */
+  void writeText(std::ostream &out);
+
+  /**
+   * Write the report as a single JSON object
+   */
+  void writeJSON(std::ostream &out);
+
+  /**
+   * Write Result.txt and Result.json into the current directory
+   * Returns FALSE if either file could not be opened
+   */
+  bool writeFiles();
+
+  /**
+   * Return str as a quoted JSON string
+   */
+  static std::string escapeJSON(const std::string &str);
+
+private:
+  std::list<std::string> resultArgs;                         /**< Command line of the run */
+  std::list<std::pair<std::string, long long>> resultTiming; /**< Wall time of each phase in ms */
+  int resultNodes;                                           /**< Nodes in the MVICFG */
+  int resultEdges;                                           /**< Edges in the MVICFG */
+  std::map<unsigned, std::pair<int, int>> resultPaths;       /**< Version to paths added and removed */
+  std::set<unsigned> resultTruncated;                        /**< Versions whose path search stopped at a limit */
+};                                                           // End Result class
+} // namespace hydrogen_framework
+#endif
@@ -0,0 +1,295 @@
+/**
+ * @author Ashwin K J
+ * @file
+ * Implementing Server.hpp
+ */
+#include "Server.hpp"
+#include "Diff_Mapping.hpp"
+#include "Get_Input.hpp"
+#include "Graph.hpp"
+#include "Graph_Line.hpp"
+#include "MVICFG.hpp"
+#include "Module.hpp"
+#include "Result.hpp"
+#include "Trace.hpp"
+#include <algorithm>
+#include <cerrno>
+#include <cstdio>
+#include <cstring>
+#include <fstream>
+#include <iterator>
+#include <sstream>
+#include <sys/socket.h>
+#include <sys/un.h>
+#include <thread>
+#include <unistd.h>
+
+namespace hydrogen_framework {
+/**
+ * Write all of data to the connection
+ * Returns FALSE if the connection was closed
+ */
+static bool writeAll(int connection, const std::string &data) {
+  size_t written = 0;
+  while (written < data.size()) {
+    ssize_t count = send(connection, data.data() + written, data.size() - written, MSG_NOSIGNAL);
+    if (count < 0 && errno == EINTR) {
+      continue;
+    } // End check for interrupted send
+    if (count <= 0) {
+      return false;
+    } // End check for closed connection
+    written += count;
+  } // End loop for data
+  return true;
+} // End writeAll
+
+/**
+ * Return a key for the content of the file, or an empty string if it cannot be read
+ */
+static std::string hashFile(std::string fileName) {
+  std::ifstream file(fileName.c_str(), std::ios::binary);
+  if (!file.is_open()) {
+    return "";
+  } // End check for file
+  std::string content((std::istreambuf_iterator<char>(file)), std::istreambuf_iterator<char>());
+  return std::to_string(content.size()) + "-" + std::to_string(std::hash<std::string>()(content));
+} // End hashFile
+
+Server::Server_Entry::~Server_Entry() { delete entryICFG; } // End ~Server_Entry
+
+bool Server::serve() {
+  int listener = socket(AF_UNIX, SOCK_STREAM, 0);
+  if (listener < 0) {
+    std::perror("Unable to create the socket");
+    return false;
+  } // End check for socket
+  sockaddr_un address;
+  std::memset(&address, 0, sizeof(address));
+  address.sun_family = AF_UNIX;
+  if (serverSocket.size() >= sizeof(address.sun_path)) {
+    std::cerr << "Socket path " << serverSocket << " is too long\n";
+    close(listener);
+    return false;
+  } // End check for socket path
+  std::strcpy(address.sun_path, serverSocket.c_str());
+  /* A socket left behind by an earlier server is replaced */
+  unlink(serverSocket.c_str());
+  if (bind(listener, reinterpret_cast<sockaddr *>(&address), sizeof(address)) != 0 ||
+      listen(listener, SOMAXCONN) != 0) {
+    std::perror(("Unable to listen on " + serverSocket).c_str());
+    close(listener);
+    return false;
+  } // End check for bind and listen
+  std::cout << "Serving on " << serverSocket << std::endl;
+  while (true) {
+    int connection = accept(listener, NULL, NULL);
+    if (connection < 0) {
+      if (errno == EINTR || errno == ECONNABORTED) {
+        continue;
+      } // End check for retry
+      std::perror("Unable to accept a connection");
+      close(listener);
+      return false;
+    } // End check for connection
+    std::thread(&Server::serveConnection, this, connection).detach();
+  } // End loop for connections
+} // End serve
+
+void Server::serveConnection(int connection) {
+  std::string buffer;
+  std::vector<std::string> args;
+  char chunk[65536];
+  ssize_t count;
+  while ((count = read(connection, chunk, sizeof(chunk))) != 0) {
+    if (count < 0) {
+      if (errno == EINTR) {
+        continue;
+      } // End check for interrupted read
+      break;
+    } // End check for read error
+    buffer.append(chunk, count);
+    size_t start = 0;
+    for (size_t end = buffer.find('\0'); end != std::string::npos; end = buffer.find('\0', start)) {
+      std::string arg = buffer.substr(start, end - start);
+      start = end + 1;
+      if (!arg.empty()) {
+        args.push_back(arg);
+        continue;
+      } // End check for end of request
+      std::string response;
+      bool done = handleRequest(args, response);
+      std::string header = (done ? "OK " : "ERROR ") + std::to_string(response.size()) + "\n";
+      if (!writeAll(connection, header + response)) {
+        close(connection);
+        return;
+      } // End check for writeAll
+      args.clear();
+    } // End loop for arguments
+    buffer.erase(0, start);
+  } // End loop for reading
+  close(connection);
+} // End serveConnection
+
+std::shared_ptr<Server::Server_Entry> Server::getEntry(Module *mod) {
+  std::string key = hashFile(mod->getFile());
+  for (auto file : mod->getFiles()) {
+    key += "\n" + file;
+  } // End loop for source files
+  std::lock_guard<std::mutex> guard(serverMutex);
+  for (auto iter = serverEntries.begin(); iter != serverEntries.end(); ++iter) {
+    if ((*iter)->entryKey == key) {
+      serverEntries.splice(serverEntries.begin(), serverEntries, iter);
+      return serverEntries.front();
+    } // End check for key
+  }   // End loop for serverEntries
+  std::shared_ptr<Server_Entry> entry = newEntry(mod, key);
+  serverEntries.push_front(entry);
+  while (serverEntries.size() > serverCacheSize) {
+    serverEntries.pop_back();
+  } // End loop for eviction
+  return entry;
+} // End getEntry
+
+std::shared_ptr<Server::Server_Entry> Server::newEntry(Module *mod, const std::string &key) {
+  std::shared_ptr<Server_Entry> entry(new Server_Entry());
+  entry->entryKey = key;
+  entry->entryModule.reset(new Module());
+  entry->entryModule->setModuleFile(0, mod->getFile());
+  entry->entryModule->setFiles(mod->getFiles());
+  return entry;
+} // End newEntry
+
+void Server::dropEntry(const std::shared_ptr<Server_Entry> &entry) {
+  std::lock_guard<std::mutex> guard(serverMutex);
+  serverEntries.remove(entry);
+} // End dropEntry
+
+Graph *Server::getICFG(Server_Entry &entry, unsigned graphVersion, Trace &trace) {
+  if (entry.entryICFG && entry.entryGraphVersion == graphVersion) {
+    return entry.entryICFG;
+  } // End check for cached ICFG
+  Trace_Scope scope(trace, "icfg", graphVersion);
+  /* An ICFG is merged into the MVICFG before the next one is requested, so the old one can go */
+  delete entry.entryICFG;
+  entry.entryICFG = buildICFG(entry.entryModule.get(), graphVersion);
+  entry.entryGraphVersion = graphVersion;
+  return entry.entryICFG;
+} // End getICFG
+
+bool Server::handleRequest(const std::vector<std::string> &args, std::string &response) {
+  /* The request is parsed like the command line of a run */
+  std::vector<std::string> argStrings(1, serverProgram);
+  argStrings.insert(argStrings.end(), args.begin(), args.end());
+  std::vector<char *> argv;
+  for (auto &arg : argStrings) {
+    argv.push_back(&arg[0]);
+  } // End loop for argStrings
+  int argc = argv.size();
+  Hydrogen request;
+  if (!request.parseOptions(argc, argv.data())) {
+    response = "Unknown option";
+    return false;
+  } // End check for options
+  for (auto option : request.getOptions()) {
+    if (option.first != "max-paths" && option.first != "max-path-time") {
+      response = "--" + option.first + " is not supported by the server";
+      return false;
+    } // End check for server options
+  }   // End loop for options
+  unsigned long long maxPaths = 0;
+  unsigned long long maxPathTime = 0;
+  if (!request.getNumberOption("max-paths", maxPaths) || !request.getNumberOption("max-path-time", maxPathTime)) {
+    response = "Option values should be numbers";
+    return false;
+  } // End check for number options
+  if (request.getFirstInput() >= argc) {
+    response = "No modules given";
+    return false;
+  } // End check for inputs after options
+  if (!request.validateInputs(argc, argv.data())) {
+    response = "Input not accessible";
+    return false;
+  } // End check for valid Input
+  bool registered = request.processInputs(argc, argv.data(), false);
+  std::list<Module *> mods = request.getModules();
+  std::vector<std::shared_ptr<Server_Entry>> entries;
+  for (auto mod : mods) {
+    if (registered) {
+      std::shared_ptr<Server_Entry> entry = getEntry(mod);
+      /* The graphs of a version point into its Module, so a version named twice needs a second, uncached one */
+      if (std::find(entries.begin(), entries.end(), entry) != entries.end()) {
+        entry = newEntry(mod, entry->entryKey);
+      } // End check for repeated version
+      entries.push_back(entry);
+    } // End check for registered
+    delete mod;
+  } // End loop for mods
+  if (!registered) {
+    response = "Insufficient no of file versions provided";
+    return false;
+  } // End check for processing Inputs
+  /* Entries are locked in key order, so that requests sharing versions cannot wait on each other */
+  /* The first entry of a key is the cached one, the uncached copies need no lock */
+  std::map<std::string, std::shared_ptr<Server_Entry>> entryKeys;
+  for (auto &entry : entries) {
+    entryKeys.insert(std::make_pair(entry->entryKey, entry));
+  } // End loop for entries
+  std::list<std::unique_lock<std::mutex>> locks;
+  for (auto &entry : entryKeys) {
+    locks.emplace_back(entry.second->entryMutex);
+  } // End loop for entryKeys
+  Trace trace;
+  for (auto &entry : entries) {
+    if (entry->entryModule->getPtr()) {
+      continue;
+    } // End check for loaded Module
+    Trace_Scope scope(trace, "load_module", 0);
+    if (!entry->entryModule->loadModule()) {
+      dropEntry(entry);
+      response = "Error in parsing the " + entry->entryModule->getFile();
+      return false;
+    } // End check for loadModule
+  }   // End loop for entries
+  /* The first ICFG becomes the MVICFG, so it is built anew for every request */
+  unsigned graphVersion = 1;
+  Graph *MVICFG;
+  {
+    Trace_Scope scope(trace, "icfg", graphVersion);
+    MVICFG = buildICFG(entries.front()->entryModule.get(), graphVersion);
+  }
+  Result result;
+  auto mvicfgStart = std::chrono::high_resolution_clock::now();
+  for (size_t next = 1; next < entries.size(); ++next) {
+    std::list<Diff_Mapping> diffMap;
+    {
+      Trace_Scope scope(trace, "diff", graphVersion + 1);
+      diffMap = generateLineMapping(entries[next - 1]->entryModule.get(), entries[next]->entryModule.get());
+    }
+    Graph *ICFG = getICFG(*entries[next], ++graphVersion, trace);
+    std::list<Graph_Line *> addedLines;
+    std::list<Graph_Line *> deletedLines;
+    mergeICFG(MVICFG, ICFG, diffMap, graphVersion, trace, addedLines, deletedLines);
+    int pathsAdded;
+    int pathsDeleted;
+    bool complete;
+    {
+      Trace_Scope scope(trace, "paths", graphVersion);
+      complete = reportPaths(MVICFG, addedLines, deletedLines, pathsAdded, pathsDeleted, maxPaths, maxPathTime);
+    }
+    result.addVersionPaths(graphVersion, pathsAdded, pathsDeleted, !complete);
+  } // End loop for entries
+  auto mvicfgStop = std::chrono::high_resolution_clock::now();
+  result.setArgs(argc, argv.data());
+  result.addTiming("mvicfg", std::chrono::duration_cast<std::chrono::milliseconds>(mvicfgStop - mvicfgStart).count());
+  for (auto total : trace.getTotals()) {
+    result.addTiming(total.first, total.second);
+  } // End loop for phase timings
+  result.setGraphSize(MVICFG->countNodes(), MVICFG->countEdges());
+  delete MVICFG;
+  std::ostringstream out;
+  result.writeJSON(out);
+  response = out.str();
+  return true;
+} // End handleRequest
+} // namespace hydrogen_framework
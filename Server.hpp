@@ -0,0 +1,107 @@
+/**
+ * @author Ashwin K J
+ * @file
+ * Server class: Answering Hydrogen runs sent over a Unix socket from cached Modules and ICFGs
+ */
+#ifndef SERVER_H
+#define SERVER_H
+
+#include <list>
+#include <map>
+#include <memory>
+#include <mutex>
+#include <string>
+#include <vector>
+
+namespace hydrogen_framework {
+/* Forward declaration */
+class Graph;
+class Module;
+class Trace;
+
+/**
+ * Server class: Listen on a Unix socket and run Hydrogen on the versions each request names
+ * A request is the command line of a run, each argument ended by a NUL byte and the request by an empty argument.
+ * The answer is "OK <length>\n" followed by the Result.json of the run, or "ERROR <length>\n" and a message.
+ * Loaded Modules and the last ICFG built from each are kept for later requests, keyed by the content of the bytecode
+ * and the paths of the source files.
+ */
+class Server {
+public:
+  /**
+   * Constructor
+   * Keeps up to cacheSize Modules, dropping the least recently used ones
+   */
+  Server(std::string program, std::string socketPath, size_t cacheSize)
+      : serverProgram(program), serverSocket(socketPath), serverCacheSize(cacheSize) {}
+
+  /**
+   * Answer requests until the process is stopped, each connection on its own thread
+   * Returns FALSE if the socket cannot be set up
+   */
+  bool serve();
+
+  /**
+   * Run Hydrogen on the command line in args and set response to its Result.json
+   * Returns FALSE with the reason in response if the run failed
+   */
+  bool handleRequest(const std::vector<std::string> &args, std::string &response);
+
+private:
+  /**
+   * Server_Entry: A cached Module and the last ICFG built from it
+   */
+  struct Server_Entry {
+    /**
+     * Constructor
+     */
+    Server_Entry() : entryICFG(NULL), entryGraphVersion(0) {}
+
+    /**
+     * Destructor
+     * Frees the ICFG and the Module
+     */
+    ~Server_Entry();
+
+    std::string entryKey;                /**< Content hash of the bytecode and paths of the source files */
+    std::unique_ptr<Module> entryModule; /**< Module, loaded by the first request that uses it */
+    Graph *entryICFG;                    /**< ICFG of the Module for the graph version it was last requested as */
+    unsigned entryGraphVersion;          /**< Graph version of entryICFG */
+    std::mutex entryMutex;               /**< Held by the request using the entry */
+  };                                     // End Server_Entry struct
+
+  /**
+   * Answer the requests of one connection until it is closed
+   */
+  void serveConnection(int connection);
+
+  /**
+   * Return the cache entry for the bytecode and source files of the Module, creating it if needed
+   */
+  std::shared_ptr<Server_Entry> getEntry(Module *mod);
+
+  /**
+   * Return a new entry for the bytecode and source files of the Module, which is not put in the cache
+   */
+  std::shared_ptr<Server_Entry> newEntry(Module *mod, const std::string &key);
+
+  /**
+   * Drop the entry from the cache, the requests using it keep it until they are done
+   */
+  void dropEntry(const std::shared_ptr<Server_Entry> &entry);
+
+  /**
+   * Return the ICFG of the entry's Module for graphVersion, building it if needed
+   * Only the last ICFG is kept, so that an entry never holds more than one
+   * The entry must be locked by the caller
+   */
+  Graph *getICFG(Server_Entry &entry, unsigned graphVersion, Trace &trace);
+
+  std::string serverProgram;                              /**< Program name written as the first argument of a run */
+  std::string serverSocket;                               /**< Path of the Unix socket */
+  size_t serverCacheSize;                                 /**< Number of Modules, with an ICFG each, to keep */
+  std::list<std::shared_ptr<Server_Entry>> serverEntries; /**< Cached entries, most recently used first */
+  std::mutex serverMutex;                                 /**< Guards serverEntries */
+};                                                        // End Server class
+} // namespace hydrogen_framework
+#endif
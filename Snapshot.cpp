@@ -0,0 +1,282 @@
+/**
+ * @author Ashwin K J
+ * @file
+ * Implementing Snapshot.hpp
+ */
+#include "Snapshot.hpp"
+#include "Graph_Edge.hpp"
+#include "Graph_Function.hpp"
+#include "Graph_Instruction.hpp"
+#include "Graph_Line.hpp"
+#include <unordered_map>
+#include <vector>
+#include <zlib.h>
+
+namespace hydrogen_framework {
+/* Start of every snapshot and the version of the layout that follows it */
+static const std::string snapshotMagic = "HYDROGEN-MVICFG";
+static const unsigned long long snapshotFormat = 1;
+
+/**
+ * Snapshot_Input: The content of a snapshot and the position up to which it was read
+ * Once a read fails, failed is set and all further reads return zero or an empty string
+ */
+struct Snapshot_Input {
+  std::string data; /**< Uncompressed content of the snapshot */
+  size_t pos;       /**< Position of the next read */
+  bool failed;      /**< Flag to indicate a read went past the end */
+};                  // End Snapshot_Input struct
+
+/**
+ * Append number to data, seven bits per byte with the high bit set on all but the last byte
+ */
+static void putNumber(std::string &data, unsigned long long number) {
+  while (number >= 0x80) {
+    data.push_back(static_cast<char>((number & 0x7f) | 0x80));
+    number >>= 7;
+  } // End loop for seven bit groups
+  data.push_back(static_cast<char>(number));
+} // End putNumber
+
+/**
+ * Append text to data, preceded by its length
+ */
+static void putString(std::string &data, const std::string &text) {
+  putNumber(data, text.size());
+  data.append(text);
+} // End putString
+
+/**
+ * Read a number written by putNumber
+ */
+static unsigned long long getNumber(Snapshot_Input &input) {
+  unsigned long long number = 0;
+  for (unsigned shift = 0; shift < 64 && input.pos < input.data.size(); shift += 7) {
+    unsigned char byte = input.data[input.pos++];
+    number |= static_cast<unsigned long long>(byte & 0x7f) << shift;
+    if (!(byte & 0x80)) {
+      return number;
+    } // End check for last byte
+  }   // End loop for seven bit groups
+  input.failed = true;
+  return 0;
+} // End getNumber
+
+/**
+ * Read a string written by putString
+ */
+static std::string getString(Snapshot_Input &input) {
+  unsigned long long length = getNumber(input);
+  if (input.failed || length > input.data.size() - input.pos) {
+    input.failed = true;
+    return std::string();
+  } // End check for length
+  std::string text = input.data.substr(input.pos, length);
+  input.pos += length;
+  return text;
+} // End getString
+
+bool writeSnapshot(std::string fileName, Graph *MVICFG, Module *lastMod) {
+  std::string data = snapshotMagic;
+  putNumber(data, snapshotFormat);
+  putNumber(data, MVICFG->getGraphVersion());
+  putNumber(data, MVICFG->getLastID());
+  /* Instructions and edges refer to each other by their position in the snapshot */
+  std::vector<Graph_Instruction *> instructions;
+  std::unordered_map<Graph_Instruction *, unsigned long long> instructionPos;
+  const std::vector<Graph_Function *> &functions = MVICFG->getGraphFunctions();
+  putNumber(data, functions.size());
+  for (auto func : functions) {
+    putNumber(data, func->getFunctionID());
+    putString(data, func->getFunctionName());
+    putString(data, func->getFunctionFile());
+    putNumber(data, func->getFunctionLines().size());
+    for (auto line : func->getFunctionLines()) {
+      putNumber(data, line->getLineGraphVersion());
+      putNumber(data, line->getLineNumbers().size());
+      for (auto number : line->getLineNumbers()) {
+        putNumber(data, number.first);
+        putNumber(data, number.second);
+      } // End loop for line numbers
+      putNumber(data, line->getLineInstructions().size());
+      for (auto inst : line->getLineInstructions()) {
+        instructionPos[inst] = instructions.size();
+        instructions.push_back(inst);
+        putNumber(data, inst->getInstructionID());
+        putString(data, inst->getInstructionLabel());
+        putString(data, inst->getInstructionOpcode());
+      } // End loop for inst
+    }   // End loop for line
+  }     // End loop for func
+  std::unordered_map<Graph_Edge *, unsigned long long> edgePos;
+  const std::vector<Graph_Edge *> &edges = MVICFG->getGraphEdges();
+  putNumber(data, edges.size());
+  for (auto edge : edges) {
+    auto from = instructionPos.find(edge->getEdgeFrom());
+    auto to = instructionPos.find(edge->getEdgeTo());
+    if (from == instructionPos.end() || to == instructionPos.end()) {
+      std::cerr << "Edge to an instruction outside of the MVICFG, unable to write the snapshot\n";
+      return false;
+    } // End check for edge instructions
+    unsigned long long pos = edgePos.size();
+    edgePos[edge] = pos;
+    putNumber(data, from->second);
+    putNumber(data, to->second);
+    putNumber(data, edge->getEdgeType());
+    putNumber(data, edge->getEdgeVersions().size());
+    for (auto ver : edge->getEdgeVersions()) {
+      putNumber(data, ver);
+    } // End loop for edge versions
+  }   // End loop for edges
+  /* The edges of each instruction, in their order */
+  for (auto inst : instructions) {
+    putNumber(data, inst->getInstructionEdges().size());
+    for (auto edge : inst->getInstructionEdges()) {
+      auto pos = edgePos.find(edge);
+      if (pos == edgePos.end()) {
+        std::cerr << "Instruction edge outside of the MVICFG, unable to write the snapshot\n";
+        return false;
+      } // End check for edge
+      putNumber(data, pos->second);
+    } // End loop for instruction edges
+  }   // End loop for instructions
+  /* Sources of the last version, which the next version is diffed against */
+  putNumber(data, lastMod->getFiles().size());
+  for (auto file : lastMod->getFiles()) {
+    std::vector<std::string> lines;
+    lastMod->readSource(file, lines);
+    putString(data, file);
+    putNumber(data, lines.size());
+    for (auto &line : lines) {
+      putString(data, line);
+    } // End loop for lines
+  }   // End loop for files
+  gzFile sFile = gzopen(fileName.c_str(), "wb");
+  if (!sFile) {
+    std::cerr << "Unable to open file for writing the snapshot\n";
+    return false;
+  } // End check for sFile
+  bool written = gzwrite(sFile, data.data(), data.size()) == static_cast<int>(data.size());
+  written = gzclose(sFile) == Z_OK && written;
+  if (!written) {
+    std::cerr << "Unable to write the snapshot to " << fileName << "\n";
+  } // End check for written
+  return written;
+} // End writeSnapshot
+
+Graph *readSnapshot(std::string fileName, Module *lastMod) {
+  Snapshot_Input input;
+  input.pos = 0;
+  input.failed = false;
+  gzFile sFile = gzopen(fileName.c_str(), "rb");
+  if (!sFile) {
+    std::cerr << "Unable to open the snapshot " << fileName << "\n";
+    return NULL;
+  } // End check for sFile
+  char buffer[1 << 16];
+  int count;
+  while ((count = gzread(sFile, buffer, sizeof(buffer))) > 0) {
+    input.data.append(buffer, count);
+  } // End loop for reading sFile
+  gzclose(sFile);
+  if (count < 0 || input.data.compare(0, snapshotMagic.size(), snapshotMagic) != 0) {
+    std::cerr << fileName << " is not a Hydrogen snapshot\n";
+    return NULL;
+  } // End check for snapshotMagic
+  input.pos = snapshotMagic.size();
+  if (getNumber(input) != snapshotFormat) {
+    std::cerr << fileName << " was written by an incompatible version of Hydrogen\n";
+    return NULL;
+  } // End check for snapshotFormat
+  /* Graph_Instruction points to the opcode names of LLVM, virtual nodes have none */
+  std::unordered_map<std::string, const char *> opcodes;
+  opcodes[""] = "";
+  for (unsigned opcode = 1; opcode < llvm::Instruction::OtherOpsEnd; ++opcode) {
+    opcodes[llvm::Instruction::getOpcodeName(opcode)] = llvm::Instruction::getOpcodeName(opcode);
+  } // End loop for LLVM opcodes
+  Graph *MVICFG = new Graph(getNumber(input));
+  MVICFG->setLastID(getNumber(input));
+  std::vector<Graph_Instruction *> instructions;
+  unsigned long long funcCount = getNumber(input);
+  for (unsigned long long i = 0; i < funcCount && !input.failed; ++i) {
+    Graph_Function *func = MVICFG->createFunction(getNumber(input));
+    func->setFunctionName(getString(input));
+    func->setFunctionFile(getString(input));
+    unsigned long long lineCount = getNumber(input);
+    for (unsigned long long j = 0; j < lineCount && !input.failed; ++j) {
+      Graph_Line *line = MVICFG->createLine(getNumber(input));
+      unsigned long long numberCount = getNumber(input);
+      for (unsigned long long k = 0; k < numberCount && !input.failed; ++k) {
+        unsigned ver = getNumber(input);
+        line->setLineNumber(ver, getNumber(input));
+      } // End loop for line numbers
+      unsigned long long instCount = getNumber(input);
+      for (unsigned long long k = 0; k < instCount && !input.failed; ++k) {
+        Graph_Instruction *inst = MVICFG->createInstruction();
+        inst->setInstructionID(getNumber(input));
+        inst->setInstructionLabel(getString(input));
+        auto opcode = opcodes.find(getString(input));
+        if (opcode == opcodes.end()) {
+          input.failed = true;
+          break;
+        } // End check for opcode
+        inst->setInstructionOpcode(opcode->second);
+        line->pushLineInstruction(inst);
+        instructions.push_back(inst);
+      } // End loop for inst
+      func->pushFunctionLines(line);
+    } // End loop for line
+    MVICFG->pushGraphFunction(func);
+  } // End loop for func
+  std::vector<Graph_Edge *> edges;
+  unsigned long long edgeCount = getNumber(input);
+  for (unsigned long long i = 0; i < edgeCount && !input.failed; ++i) {
+    unsigned long long from = getNumber(input);
+    unsigned long long to = getNumber(input);
+    unsigned long long type = getNumber(input);
+    unsigned long long verCount = getNumber(input);
+    if (from >= instructions.size() || to >= instructions.size() || type > Graph_Edge::ANY || verCount == 0) {
+      input.failed = true;
+      break;
+    } // End check for edge
+    Graph_Edge *edge = MVICFG->createEdge(instructions[from], instructions[to],
+                                          static_cast<Graph_Edge::edgeTypes>(type), getNumber(input));
+    for (unsigned long long k = 1; k < verCount && !input.failed; ++k) {
+      edge->pushEdgeVersions(getNumber(input));
+    } // End loop for edge versions
+    MVICFG->pushGraphEdges(edge);
+    edges.push_back(edge);
+  } // End loop for edges
+  for (auto inst : instructions) {
+    unsigned long long instEdgeCount = getNumber(input);
+    for (unsigned long long k = 0; k < instEdgeCount && !input.failed; ++k) {
+      unsigned long long pos = getNumber(input);
+      if (pos >= edges.size()) {
+        input.failed = true;
+        break;
+      } // End check for pos
+      inst->pushEdgeInstruction(edges[pos]);
+    } // End loop for instruction edges
+  }   // End loop for instructions
+  std::list<std::string> files;
+  unsigned long long fileCount = getNumber(input);
+  for (unsigned long long i = 0; i < fileCount && !input.failed; ++i) {
+    std::string file = getString(input);
+    std::vector<std::string> lines;
+    unsigned long long lineCount = getNumber(input);
+    for (unsigned long long j = 0; j < lineCount && !input.failed; ++j) {
+      lines.push_back(getString(input));
+    } // End loop for lines
+    lastMod->setSource(file, lines);
+    files.push_back(file);
+  } // End loop for files
+  if (input.failed || input.pos != input.data.size()) {
+    std::cerr << "The snapshot " << fileName << " is damaged\n";
+    delete MVICFG;
+    return NULL;
+  } // End check for failed
+  lastMod->setModuleFile(MVICFG->getGraphVersion(), "");
+  lastMod->setFiles(files);
+  return MVICFG;
+} // End readSnapshot
+} // namespace hydrogen_framework
@@ -0,0 +1,28 @@
+/**
+ * @author Ashwin K J
+ * @file
+ * Snapshot: Saving an MVICFG so that later versions can be added to it in another run
+ */
+#ifndef SNAPSHOT_H
+#define SNAPSHOT_H
+
+#include "Graph.hpp"
+#include "Module.hpp"
+#include <string>
+
+namespace hydrogen_framework {
+/**
+ * Write MVICFG to fileName as a gzip compressed binary snapshot
+ * The sources of lastMod are stored with it, since the next version is diffed against them.
+ * Returns FALSE if the file cannot be written.
+ */
+bool writeSnapshot(std::string fileName, Graph *MVICFG, Module *lastMod);
+
+/**
+ * Read the MVICFG saved in fileName by writeSnapshot
+ * lastMod gets the version and the sources of the last version in the snapshot.
+ * Returns NULL if the file cannot be read or is not a snapshot.
+ */
+Graph *readSnapshot(std::string fileName, Module *lastMod);
+} // namespace hydrogen_framework
+#endif
@@ -4,6 +4,10 @@
 
 from sys import argv
 
+# Options like --dot=none go to Hydrogen, the rest select the versions
+options = [arg for arg in argv[1:] if arg.startswith('--')]
+argv = [argv[0]] + [arg for arg in argv[1:] if not arg.startswith('--')]
+
 ########################################
 import os
 print('Compiling Hydrogen')
@@ -11,8 +15,12 @@ os.chdir('./build')
 os.system('ninja')
 if (os.path.isfile('./Result.txt')):
     os.system('rm ./Result.txt')
+if (os.path.isfile('./Result.json')):
+    os.system('rm ./Result.json')
 if (os.path.isfile('./MVICFG.dot')):
     os.system('rm ./MVICFG.dot')
+if (os.path.isfile('./MVICFG.dot.gz')):
+    os.system('rm ./MVICFG.dot.gz')
 os.chdir('../')
 ########################################
 #           Path Settings              #
@@ -51,6 +59,22 @@ demarcator = ' :: '
 #     },
 # }
 
+# test_root = './TestPrograms/VirtualCalls'
+# files = {
+#     'V1': {
+#         'Source': ['prog.c'],
+#         'Bytecode': 'prog.bc',
+#     },
+#     'V2': {
+#         'Source': ['prog.c'],
+#         'Bytecode': 'prog.bc',
+#     },
+#     'V3': {
+#         'Source': ['prog.c'],
+#         'Bytecode': 'prog.bc',
+#     },
+# }
+
 test_root = './TestPrograms/OSS'
 files = {
     'fiche_1': {
@@ -67,6 +91,58 @@ files = {
     },
 }
 
+########################################
+#     Pairwise mode: all adjacent      #
+#     pairs in parallel                #
+########################################
+if len(argv) == 2 and argv[1] == 'pairs':
+    from concurrent.futures import ThreadPoolExecutor
+    import subprocess
+
+    hydrogen = os.path.abspath('./build/Hydrogen.out')
+    items = list(files.items())
+
+    outputs = [('Result', 'txt'), ('Result', 'json'), ('MVICFG', 'dot'), ('MVICFG', 'dot.gz')]
+
+    def run_pair(i):
+        # Each pair gets its own working directory so Result.txt and MVICFG.dot don't collide
+        pair = items[i:i + 2]
+        pair_dir = os.path.join('./build/pairs', f'{i}_{i + 1}')
+        os.makedirs(pair_dir, exist_ok=True)
+        tag = f'_{i}_{i + 1}'
+        # Outputs of an earlier run must not pass for this one's if it fails
+        for output, ext in outputs:
+            for path in [os.path.join(pair_dir, f'{output}.{ext}'), f'{test_root}/{output}{tag}.{ext}']:
+                if os.path.isfile(path):
+                    os.remove(path)
+        args = [hydrogen] + options + [os.path.abspath(os.path.join(test_root, k, v['Bytecode'])) for k, v in pair]
+        for k, v in pair:
+            args += ['::'] + [os.path.abspath(os.path.join(test_root, k, f)) for f in v['Source']]
+        print(f'Running Hydrogen on pair {i}-{i + 1}')
+        proc = subprocess.run(args, cwd=pair_dir, stdout=subprocess.DEVNULL)
+        if proc.returncode != 0:
+            print(f'Hydrogen returned error code {proc.returncode} on pair {i}-{i + 1}')
+            return tag, False
+        for output, ext in outputs:
+            if os.path.isfile(os.path.join(pair_dir, f'{output}.{ext}')):
+                os.replace(os.path.join(pair_dir, f'{output}.{ext}'), f'{test_root}/{output}{tag}.{ext}')
+        return tag, True
+
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+        runs = list(pool.map(run_pair, range(len(items) - 1)))
+
+    # Merge the per-pair results into one report
+    with open(f'{test_root}/Result_pairs.txt', 'w') as merged:
+        for tag, succeeded in runs:
+            merged.write(f'Pair{tag}\n')
+            if succeeded and os.path.isfile(f'{test_root}/Result{tag}.txt'):
+                with open(f'{test_root}/Result{tag}.txt') as result:
+                    merged.write(result.read())
+            else:
+                merged.write('Hydrogen failed\n')
+    print(f'Merged results written to {test_root}/Result_pairs.txt')
+    exit(0 if all(succeeded for _, succeeded in runs) else 1)
+
 if len(argv) == 3:
     items = list(files.items())
     i1 = items[int(argv[1])]
@@ -88,7 +164,7 @@ print('Argument:\n' + path_argument)
 #         Running Hydrogen             #
 ########################################
 print('Running Hydrogen')
-os.system(f'./build/Hydrogen.out {path_argument}')
+os.system(f'./build/Hydrogen.out {" ".join(options)} {path_argument}')
 ########################################
 #        Collecting Results            #
 ########################################
@@ -97,4 +173,7 @@ if len(argv) == 3:
     tag = f'_{argv[1]}_{argv[2]}'
 
 os.system(f'mv Result.txt {test_root}/Result{tag}.txt')
-os.system(f'mv MVICFG.dot {test_root}/MVICFG{tag}.dot')
+os.system(f'mv Result.json {test_root}/Result{tag}.json')
+for ext in ['dot', 'dot.gz']:
+    if os.path.isfile(f'MVICFG.{ext}'):
+        os.system(f'mv MVICFG.{ext} {test_root}/MVICFG{tag}.{ext}')
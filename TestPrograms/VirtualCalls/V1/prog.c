@@ -0,0 +1,15 @@
+int exta(int), extb(int), extc(int), extd(int), exte(int);
+int f(int x) {
+  exta(x);
+  if (x) {
+    extb(x);
+  }
+  return 0;
+}
+int main(int x) {
+  f(x);
+  return 0;
+}
+int h(int x) {
+  return exte(x);
+}
@@ -0,0 +1,14 @@
+int exta(int), extb(int), extc(int), extd(int), exte(int);
+int f(int x) {
+  exta(x);
+  extc(x);
+  return 0;
+}
+int main(int x) {
+  f(x);
+  f(x+1);
+  return 0;
+}
+int h(int x) {
+  return exte(x);
+}
@@ -0,0 +1,88 @@
+/**
+ * @author Ashwin K J
+ * @file
+ * Implementing Trace.hpp
+ */
+#include "Trace.hpp"
+#include "Result.hpp"
+#include <algorithm>
+#include <sys/resource.h>
+#include <unistd.h>
+
+namespace hydrogen_framework {
+Trace::Trace() : traceStart(std::chrono::steady_clock::now()) {
+  auto sinceEpoch = std::chrono::system_clock::now().time_since_epoch();
+  traceEpoch = std::chrono::duration_cast<std::chrono::microseconds>(sinceEpoch).count();
+  /* The creating thread is the main thread, which shares its ID with the process like in the kernel */
+  traceThreads[std::this_thread::get_id()] = getpid();
+} // End Trace
+
+long long Trace::now() {
+  auto elapsed = std::chrono::steady_clock::now() - traceStart;
+  return traceEpoch + std::chrono::duration_cast<std::chrono::microseconds>(elapsed).count();
+} // End now
+
+void Trace::addSpan(std::string name, unsigned version, long long start, long long stop) {
+  Trace_Span span;
+  span.spanName = name;
+  span.spanVersion = version;
+  span.spanStart = start;
+  span.spanStop = stop;
+  span.spanRSS = peakRSS();
+  std::lock_guard<std::mutex> lock(traceMutex);
+  auto thread = traceThreads.find(std::this_thread::get_id());
+  if (thread == traceThreads.end()) {
+    long threadID = getpid() + traceThreads.size();
+    thread = traceThreads.insert(std::pair<std::thread::id, long>(std::this_thread::get_id(), threadID)).first;
+  } // End check for new thread
+  span.spanThread = thread->second;
+  traceSpans.push_back(span);
+} // End addSpan
+
+std::list<std::pair<std::string, long long>> Trace::getTotals() {
+  std::list<std::pair<std::string, long long>> totals;
+  std::lock_guard<std::mutex> lock(traceMutex);
+  for (auto span : traceSpans) {
+    auto total = std::find_if(totals.begin(), totals.end(), [&span](const std::pair<std::string, long long> &iter) {
+      return iter.first == span.spanName;
+    });
+    if (total == totals.end()) {
+      total = totals.insert(totals.end(), std::pair<std::string, long long>(span.spanName, 0));
+    } // End check for new phase
+    total->second += span.spanStop - span.spanStart;
+  } // End loop for traceSpans
+  for (auto &total : totals) {
+    total.second /= 1000;
+  } // End loop for converting to milliseconds
+  return totals;
+} // End getTotals
+
+bool Trace::writeTrace(std::string file) {
+  std::ofstream tFile(file, std::ios::trunc);
+  if (!tFile.is_open()) {
+    std::cerr << "Unable to open file for printing the trace\n";
+    return false;
+  } // End check for trace file
+  long pid = getpid();
+  std::lock_guard<std::mutex> lock(traceMutex);
+  tFile << "{\"traceEvents\": [\n";
+  tFile << "  {\"name\": \"process_name\", \"ph\": \"M\", \"pid\": " << pid << ", \"args\": {\"name\": \"Hydrogen\"}}";
+  for (auto span : traceSpans) {
+    tFile << ",\n  {\"name\": " << Result::escapeJSON(span.spanName) << ", \"cat\": \"hydrogen\", \"ph\": \"X\""
+          << ", \"ts\": " << span.spanStart << ", \"dur\": " << span.spanStop - span.spanStart << ", \"pid\": " << pid
+          << ", \"tid\": " << span.spanThread << ", \"args\": {\"version\": " << span.spanVersion
+          << ", \"peak_rss_kb\": " << span.spanRSS << "}}";
+  } // End loop for traceSpans
+  tFile << "\n]}\n";
+  tFile.close();
+  return true;
+} // End writeTrace
+
+long Trace::peakRSS() {
+  struct rusage usage;
+  if (getrusage(RUSAGE_SELF, &usage) != 0) {
+    return 0;
+  } // End check for getrusage
+  return usage.ru_maxrss;
+} // End peakRSS
+} // namespace hydrogen_framework
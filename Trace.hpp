@@ -0,0 +1,101 @@
+/**
+ * @author Ashwin K J
+ * @file
+ * Trace class: Recording wall time and memory of each phase
+ */
+#ifndef TRACE_H
+#define TRACE_H
+
+#include <chrono>
+#include <list>
+#include <map>
+#include <mutex>
+#include <string>
+#include <thread>
+#include <utility>
+
+namespace hydrogen_framework {
+/**
+ * Trace class: Hold the timed phases of a run and write them as a Chrome trace
+ * Phases can be recorded from several threads
+ */
+class Trace {
+public:
+  /**
+   * Constructor
+   * Marks the start of the run
+   */
+  Trace();
+
+  /**
+   * Return microseconds since the Unix epoch, measured on a steady clock from the start of the run
+   */
+  long long now();
+
+  /**
+   * Record a phase of the given version that ran from start to stop
+   */
+  void addSpan(std::string name, unsigned version, long long start, long long stop);
+
+  /**
+   * Return the total milliseconds spent in each phase, in the order the phases first ran
+   */
+  std::list<std::pair<std::string, long long>> getTotals();
+
+  /**
+   * Write all phases as Chrome trace JSON (chrome://tracing, Perfetto)
+   * Returns FALSE if the file could not be opened
+   */
+  bool writeTrace(std::string file);
+
+  /**
+   * Return the peak resident set size of the process so far in KB
+   */
+  static long peakRSS();
+
+private:
+  /**
+   * A single recorded phase
+   */
+  struct Trace_Span {
+    std::string spanName; /**< Name of the phase */
+    unsigned spanVersion; /**< Version the phase worked on */
+    long long spanStart;  /**< Start in microseconds */
+    long long spanStop;   /**< Stop in microseconds */
+    long spanRSS;         /**< Peak RSS at the end of the phase in KB */
+    long spanThread;      /**< Trace thread ID of the thread that ran the phase */
+  };
+
+  std::chrono::steady_clock::time_point traceStart; /**< Steady start of the run */
+  long long traceEpoch;                             /**< Start of the run in microseconds since the epoch */
+  std::list<Trace_Span> traceSpans;                 /**< Recorded phases */
+  std::map<std::thread::id, long> traceThreads;     /**< Trace thread ID of each recording thread */
+  std::mutex traceMutex;                            /**< Guards traceSpans and traceThreads */
+};                                                  // End Trace class
+
+/**
+ * Trace_Scope class: Record a phase from construction to destruction
+ */
+class Trace_Scope {
+public:
+  /**
+   * Constructor
+   * Starts the phase
+   */
+  Trace_Scope(Trace &trace, std::string name, unsigned version)
+      : scopeTrace(trace), scopeName(name), scopeVersion(version), scopeStart(trace.now()) {}
+
+  /**
+   * Destructor
+   * Ends the phase
+   */
+  ~Trace_Scope() { scopeTrace.addSpan(scopeName, scopeVersion, scopeStart, scopeTrace.now()); }
+
+private:
+  Trace &scopeTrace;     /**< Trace to record into */
+  std::string scopeName; /**< Name of the phase */
+  unsigned scopeVersion; /**< Version the phase works on */
+  long long scopeStart;  /**< Start in microseconds */
+};                       // End Trace_Scope class
+} // namespace hydrogen_framework
+#endif
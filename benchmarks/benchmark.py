@@ -0,0 +1,278 @@
+#!/bin/python3
+'''
+Replay the benchmark suites, repeat each a number of times and compare the
+medians against a stored baseline
+'''
+from argparse import ArgumentParser
+from pathlib import Path
+from statistics import median
+import json
+import platform
+import shutil
+import subprocess
+import sys
+import time
+
+repo = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(repo / 'hydrogit'))
+
+from results import load_runs  # noqa: E402
+from tracing import run_measured  # noqa: E402
+import suites  # noqa: E402
+
+# metrics where a larger number means slower or hungrier
+cost_metrics = ['build_ms', 'mvicfg_ms', 'hydrogen_ms', 'peak_rss_kb']
+# metrics describing the MVICFG itself, which should not change between runs
+count_metrics = ['nodes', 'edges', 'paths_added', 'paths_removed']
+# differences below these are noise, whatever the threshold
+noise_floor = {'build_ms': 50, 'mvicfg_ms': 10, 'hydrogen_ms': 20, 'peak_rss_kb': 2048}
+compile_flags = ['-c', '-O0', '-Xclang', '-disable-O0-optnone', '-g', '-emit-llvm', '-S']
+
+
+def get_args():
+    parser = ArgumentParser(
+        prog='python3 benchmarks/benchmark.py',
+        description='Benchmark Hydrogen on TestPrograms and the USAGE.md projects')
+    parser.add_argument('suites', nargs='*',
+                        help='suites to run (default: all programs suites and every hydrogit suite with a mirror)')
+    parser.add_argument('-n', '--repeat', dest='repeat', type=int, default=5,
+                        help='runs per suite, the median is reported')
+    parser.add_argument('--hydrogen', dest='hydrogen', default=str(repo / 'build' / 'Hydrogen.out'),
+                        help='Hydrogen binary for the programs suites')
+    parser.add_argument('--rebuild', dest='rebuild', action='store_true', default=False,
+                        help='compile the TestPrograms sources with clang and time it, '
+                             'instead of using the checked in bytecode')
+    parser.add_argument('--mirror', dest='mirrors', action='append', default=[], metavar='NAME=PATH',
+                        help='local clone of a hydrogit suite project, e.g. lua=~/src/lua')
+    parser.add_argument('--baseline', dest='baseline', default=str(repo / 'benchmarks' / 'baseline.json'),
+                        help='baseline file to compare against or save to')
+    parser.add_argument('--save-baseline', dest='save_baseline', action='store_true', default=False,
+                        help='store this run as the new baseline instead of comparing')
+    parser.add_argument('--threshold', dest='threshold', type=float, default=0.10,
+                        help='relative slowdown over the baseline that counts as a regression')
+    parser.add_argument('--output', dest='output', default=None,
+                        help='also write every run and the summary to this JSON file')
+    parser.add_argument('--workdir', dest='workdir', default=str(repo / 'benchmarks' / 'runs'),
+                        help='where the runs happen')
+    return parser.parse_args()
+
+
+def run_programs(name, config, workdir, args):
+    '''
+    One Hydrogen run over all versions of a TestPrograms suite
+    '''
+    test_root = repo / config['test_root']
+    files = config['files']
+    run = {'build_ms': None}
+
+    bytecode = [test_root / version / entry['Bytecode'] for version, entry in files.items()]
+    if args.rebuild:
+        start = time.perf_counter()
+        bytecode = [compile_version(test_root / version, entry, workdir / version)
+                    for version, entry in files.items()]
+        run['build_ms'] = int((time.perf_counter() - start) * 1000)
+
+    cmd = [args.hydrogen] + [str(bc) for bc in bytecode]
+    for version, entry in files.items():
+        cmd += ['::'] + [str(test_root / version / source) for source in entry['Source']]
+    return measure(cmd, workdir, run)
+
+
+def compile_version(version_root, entry, out_dir):
+    '''
+    Compile the sources of a version to one bytecode file, like README step 4
+    '''
+    out_dir.mkdir(parents=True, exist_ok=True)
+    parts = []
+    for source in entry['Source']:
+        part = out_dir / f'{Path(source).stem}.ll'
+        subprocess.run(['clang', *compile_flags, str(version_root / source), '-o', str(part)], check=True)
+        parts.append(str(part))
+    out = out_dir / entry['Bytecode']
+    if len(parts) == 1:
+        shutil.copyfile(parts[0], out)
+    else:
+        subprocess.run(['llvm-link', '-S', *parts, '-o', str(out)], check=True)
+    return out
+
+
+def run_hydrogit(name, config, workdir, mirror):
+    '''
+    One full hydrogit run (clone, build, Hydrogen) of a project mirror
+    '''
+    trace = workdir / 'trace.json'
+    cmd = [sys.executable, str(repo / 'hydrogit' / 'hydrogit.py'), '-L', '--no-cache',
+           '--trace', str(trace), *config['args']]
+    if config['target']:
+        cmd += ['--target', config['target']]
+    cmd += [str(mirror), *config['commits']]
+
+    log = workdir / 'hydrogit.log'
+    with log.open('w') as out:
+        proc = subprocess.run(cmd, cwd=workdir, stdout=out, stderr=out, stdin=subprocess.DEVNULL)
+    if proc.returncode != 0 or not trace.exists():
+        print(f'{name}: hydrogit returned error code {proc.returncode}, see {log}')
+        return None
+
+    events = json.loads(trace.read_text())['traceEvents']
+    spans = [e for e in events if e.get('ph') == 'X' and e.get('cat') == 'hydrogit']
+    hydrogen = [e for e in spans if e['name'] == 'hydrogen']
+    run = {
+        'build_ms': sum(e['dur'] for e in spans if e['name'] == 'build version') // 1000,
+        'hydrogen_ms': sum(e['dur'] for e in hydrogen) // 1000,
+        'peak_rss_kb': max((e['args']['peak_rss_kb'] for e in hydrogen), default=None),
+    }
+    return add_result(run, workdir)
+
+
+def measure(cmd, workdir, run):
+    '''
+    Run Hydrogen in workdir, timing it and recording its peak memory
+    '''
+    start = time.perf_counter()
+    proc, rss = run_measured(cmd, cwd=workdir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    run['hydrogen_ms'] = int((time.perf_counter() - start) * 1000)
+    run['peak_rss_kb'] = rss
+    if proc.returncode != 0:
+        print(f'Hydrogen returned error code {proc.returncode}: {" ".join(cmd)}')
+        return None
+    return add_result(run, workdir)
+
+
+def add_result(run, workdir):
+    '''
+    Add the numbers of the Result.json Hydrogen left in workdir
+    '''
+    result_file = workdir / 'Result.json'
+    if not result_file.exists():
+        result_file = workdir / 'Result.txt'
+    if not result_file.exists():
+        print(f'No Hydrogen result in {workdir}')
+        return None
+    _, result = load_runs(result_file)[0]
+    versions = result.get('versions', [])
+    run['mvicfg_ms'] = result.get('timings_ms', {}).get('mvicfg')
+    run['nodes'] = result.get('nodes')
+    run['edges'] = result.get('edges')
+    run['paths_added'] = sum(v.get('paths_added', 0) for v in versions)
+    run['paths_removed'] = sum(v.get('paths_removed', 0) for v in versions)
+    return run
+
+
+def summarize(runs):
+    '''
+    Median of the cost metrics and the count metrics of the last run.
+    Counts that differ between runs are reported, as they should not.
+    '''
+    summary = {}
+    for metric in cost_metrics:
+        values = [run[metric] for run in runs if run.get(metric) is not None]
+        summary[metric] = median(values) if values else None
+    for metric in count_metrics:
+        values = set(run.get(metric) for run in runs)
+        if len(values) > 1:
+            print(f'  {metric} varies between runs: {sorted(v for v in values if v is not None)}')
+        summary[metric] = runs[-1].get(metric)
+    return summary
+
+
+def compare(summaries, baseline, threshold):
+    '''
+    Print the change of each metric against the baseline. Returns the
+    number of regressions.
+    '''
+    regressions = 0
+    for name, summary in summaries.items():
+        base = baseline['suites'].get(name)
+        if not base:
+            print(f'{name}: not in the baseline')
+            continue
+        for metric in cost_metrics + count_metrics:
+            now, before = summary.get(metric), base.get(metric)
+            if now is None or before is None:
+                continue
+            if metric in count_metrics:
+                if now != before:
+                    print(f'{name}: {metric} changed from {before} to {now}, '
+                          'see the expected count changes in benchmarks/README.md')
+                continue
+            change = (now - before) / before if before else 0
+            status = ''
+            if now - before > noise_floor[metric] and change > threshold:
+                status = '  REGRESSION'
+                regressions += 1
+            elif before - now > noise_floor[metric] and -change > threshold:
+                status = '  improved'
+            print(f'{name}: {metric} {before} -> {now} ({change:+.1%}){status}')
+    return regressions
+
+
+def main():
+    args = get_args()
+    mirrors = dict(m.split('=', 1) for m in args.mirrors)
+    # runs happen in their own directories
+    args.hydrogen = str(Path(args.hydrogen).resolve())
+
+    selected = args.suites or list(suites.programs) + [s for s in suites.hydrogit if s in mirrors]
+    for name in selected:
+        assert name in suites.programs or name in suites.hydrogit, f'unknown suite {name}'
+        assert name in suites.programs or name in mirrors, f'{name} needs --mirror {name}=PATH'
+
+    if any(name in suites.programs for name in selected):
+        assert Path(args.hydrogen).exists(), f'Hydrogen not found at {args.hydrogen}'
+
+    workdir = Path(args.workdir)
+    all_runs = {}
+    summaries = {}
+    for name in selected:
+        print(f'{name}: {args.repeat} runs')
+        runs = []
+        for i in range(args.repeat):
+            run_dir = workdir / name / str(i)
+            if run_dir.exists():
+                shutil.rmtree(run_dir)
+            run_dir.mkdir(parents=True)
+            if name in suites.programs:
+                run = run_programs(name, suites.programs[name], run_dir, args)
+            else:
+                run = run_hydrogit(name, suites.hydrogit[name], run_dir, Path(mirrors[name]).expanduser().resolve())
+            if run is None:
+                break
+            runs.append(run)
+        if not runs:
+            print(f'{name}: no successful runs')
+            continue
+        all_runs[name] = runs
+        summaries[name] = summarize(runs)
+        print('  ' + '  '.join(f'{k}={v}' for k, v in summaries[name].items() if v is not None))
+
+    machine = {'node': platform.node(), 'machine': platform.machine(), 'python': platform.python_version()}
+    if args.output:
+        Path(args.output).write_text(json.dumps(
+            {'machine': machine, 'repeat': args.repeat, 'runs': all_runs, 'suites': summaries}, indent=2))
+
+    baseline_file = Path(args.baseline)
+    if args.save_baseline:
+        baseline = json.loads(baseline_file.read_text()) if baseline_file.exists() else {'suites': {}}
+        baseline['machine'] = machine
+        baseline['repeat'] = args.repeat
+        baseline['suites'].update(summaries)
+        baseline_file.write_text(json.dumps(baseline, indent=2))
+        print(f'Baseline written to {baseline_file}')
+        return 0
+
+    if not baseline_file.exists():
+        print(f'No baseline at {baseline_file}, run with --save-baseline first')
+        return 0
+    baseline = json.loads(baseline_file.read_text())
+    if baseline.get('machine', {}).get('node') != machine['node']:
+        print(f'Warning: the baseline was recorded on {baseline.get("machine", {}).get("node")}')
+    regressions = compare(summaries, baseline, args.threshold)
+    if regressions:
+        print(f'{regressions} regressions over {args.threshold:.0%}')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,116 @@
+'''
+Benchmark configurations
+
+A "programs" suite runs Hydrogen directly on the prebuilt bytecode of a
+TestPrograms folder, in the same format as SystemBuilder.py. A "hydrogit"
+suite runs the whole hydrogit pipeline on a project from USAGE.md, which
+needs a local mirror of it (see --mirror) and is skipped otherwise.
+'''
+
+programs = {
+    'basic': {
+        'test_root': 'TestPrograms/Basic',
+        'files': {
+            'Buggy': {
+                'Source': ['Prog.c'],
+                'Bytecode': 'Prog.bc',
+            },
+            'Buggy2': {
+                'Source': ['Prog.c'],
+                'Bytecode': 'Prog.bc',
+            },
+            'Correct': {
+                'Source': ['Prog.c'],
+                'Bytecode': 'Prog.bc',
+            },
+        },
+    },
+    'ladybug': {
+        'test_root': 'TestPrograms/Mine',
+        'files': {
+            'Ladybug1': {
+                'Source': ['main.c'],
+                'Bytecode': 'main.bc',
+            },
+            'Ladybug2': {
+                'Source': ['main.c'],
+                'Bytecode': 'main.bc',
+            },
+            'Ladybug3': {
+                'Source': ['main.c'],
+                'Bytecode': 'main.bc',
+            },
+        },
+    },
+    'fiche': {
+        'test_root': 'TestPrograms/OSS',
+        'files': {
+            'fiche_1': {
+                'Source': ['fiche.c', 'main.c'],
+                'Bytecode': 'prog.bc',
+            },
+            'fiche_2': {
+                'Source': ['fiche.c', 'main.c'],
+                'Bytecode': 'prog.bc',
+            },
+            'fiche_3': {
+                'Source': ['fiche.c', 'main.c'],
+                'Bytecode': 'prog.bc',
+            },
+        },
+    },
+    'virtualcalls': {
+        'test_root': 'TestPrograms/VirtualCalls',
+        'files': {
+            'V1': {
+                'Source': ['prog.c'],
+                'Bytecode': 'prog.bc',
+            },
+            'V2': {
+                'Source': ['prog.c'],
+                'Bytecode': 'prog.bc',
+            },
+            'V3': {
+                'Source': ['prog.c'],
+                'Bytecode': 'prog.bc',
+            },
+        },
+    },
+}
+
+hydrogit = {
+    'findutils': {
+        'args': ['-r', 'find'],
+        'target': 'find',
+        'commits': [
+            'abec46d20493d7b4f2e4be1fbc4175c60e1c7cb8',
+            '7642d172e10a890975696d28278e5192d81afc5b',
+        ],
+    },
+    'lua': {
+        'args': ['-C'],
+        'target': 'lua',
+        'commits': [
+            '9b19c7d3efdc203c6a067f51efa5626f3e440e49',
+            '0937bc974bbf0c062a222ffa49fa20c7cc6ab357',
+        ],
+    },
+    'proggyfresh': {
+        'args': [],
+        'target': None,
+        'commits': [
+            '6312f9f0a1a342483fbf2e0cdc49a5b75067f6b7',
+            '2113db3a5ffca3940443cef8359acbeb56f674ec',
+            '109a409b465a208178c6128a5d7a8eea0225e0b1',
+        ],
+    },
+    'progolone': {
+        'args': ['-C'],
+        'target': None,
+        'commits': [
+            '5e8651df381079d0347ddfa254f554972611d1a0',
+            '70d03532975252bd9982beba60a8720e11ec8f02',
+            '9cde7197d0a3fe0caf7ee0ec7fd291e19ccc18ed',
+        ],
+    },
+}
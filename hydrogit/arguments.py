@@ -57,6 +57,180 @@ def get_args():
         default='',
         )
         
+    parser.add_argument(
+        '-j',
+        '--jobs',
+        dest='jobs',
+        type=int,
+        help='build this many versions in parallel, logging each to tmp/<version>.log',
+        default=1,
+        )
+
+    parser.add_argument(
+        '-i',
+        '--incremental',
+        dest='incremental',
+        action='store_true',
+        help='reuse objects of unchanged translation units from the previous version (Make only)',
+        default=False,
+        )
+
+    parser.add_argument(
+        '-p',
+        '--pairwise',
+        dest='pairwise',
+        action='store_true',
+        help='run Hydrogen on each pair of adjacent versions in parallel (see --jobs)',
+        default=False,
+        )
+
+    parser.add_argument(
+        '--no-cache',
+        dest='use_cache',
+        action='store_false',
+        help='always rebuild instead of reusing cached bytecode',
+        default=True,
+        )
+
+    parser.add_argument(
+        '--cache-dir',
+        dest='cache_dir',
+        help='where to keep cached bytecode (default: hydrogit/cache)',
+        default=None,
+        )
+
+    parser.add_argument(
+        '--cache-size',
+        dest='cache_size',
+        type=int,
+        help='size limit of the bytecode cache in MB',
+        default=2048,
+        )
+
+    parser.add_argument(
+        '--checkout',
+        dest='checkout',
+        choices=['copy', 'worktree', 'archive'],
+        help='how to materialize each version: copy the whole clone, '
+             'add a git worktree of a cached mirror, or export a git archive '
+             '(default: copy with -L, worktree otherwise)',
+        default=None,
+        )
+
+    parser.add_argument(
+        '-t',
+        '--target',
+        dest='target',
+        help='name of the target to run Hydrogen on, instead of asking when there are several',
+        default=None,
+        )
+
+    parser.add_argument(
+        '--targets',
+        dest='targets',
+        metavar='all|NAME,...',
+        help='run Hydrogen on each of these targets, or on all of them, in parallel (see --jobs) '
+             'on the same built versions and merge the per-target results',
+        default=None,
+        )
+
+    parser.add_argument(
+        '--trace',
+        dest='trace',
+        help='write the time and peak memory of every stage, Hydrogen\'s included, '
+             'to this Chrome trace file (open in chrome://tracing or Perfetto)',
+        default=None,
+        )
+
+    parser.add_argument(
+        '--dot',
+        dest='dot',
+        choices=['none', 'mvicfg', 'all'],
+        help='DOT files Hydrogen writes: none, only MVICFG.dot, or all with a Graph_N.dot per version '
+             '(default: all, none with --server)',
+        default=None,
+        )
+
+    parser.add_argument(
+        '--dot-gzip',
+        dest='dot_gzip',
+        action='store_true',
+        help='compress the DOT files with gzip',
+        default=False,
+        )
+
+    parser.add_argument(
+        '--keep-unchanged',
+        dest='keep_unchanged',
+        action='store_true',
+        help='build every commit, also those that change no C/C++ sources since the commit before them',
+        default=False,
+        )
+
+    parser.add_argument(
+        '--scope',
+        dest='scope',
+        metavar='DEPTH',
+        type=int,
+        help='build only the functions the commits change, and the functions up to DEPTH calls '
+             'away from them, in detail and summarize the others',
+        default=None,
+        )
+
+    parser.add_argument(
+        '--append',
+        dest='append',
+        metavar='BRANCH',
+        help='keep an MVICFG snapshot for this branch of the project in hydrogit/snapshots '
+             'and only build and add the versions it does not have yet',
+        default=None,
+        )
+
+    parser.add_argument(
+        '--server',
+        dest='server',
+        metavar='SOCKET',
+        help='send the versions to a Hydrogen server started with Hydrogen.out --serve=SOCKET '
+             'instead of starting Hydrogen, so modules it has seen are not parsed again',
+        default=None,
+        )
+
+    parser.add_argument(
+        '--queue',
+        dest='queue',
+        metavar='QUEUE',
+        help='put a build job per version and a Hydrogen job per pair of adjacent versions on this queue '
+             '(e.g. sqlite:/shared/queue) for worker.py processes to do, and merge their results like -p',
+        default=None,
+        )
+
+    parser.add_argument(
+        '--retries',
+        dest='retries',
+        type=int,
+        help='times a job on the --queue is tried again after its worker failed',
+        default=2,
+        )
+
+    parser.add_argument(
+        '--step-timeout',
+        dest='step_timeout',
+        metavar='SECONDS',
+        type=float,
+        help='stop any git, configure, make, llvm-dis or Hydrogen process that runs longer than this, '
+             'together with its children',
+        default=None,
+        )
+
+    parser.add_argument(
+        '--timeout',
+        dest='timeout',
+        metavar='SECONDS',
+        type=float,
+        help='stop the whole run after this long, stopping the processes still running',
+        default=None,
+        )
+
     parser.add_argument('url')
     parser.add_argument('first_version')
     parser.add_argument('latter_versions', nargs='+')
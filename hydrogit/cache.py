@@ -0,0 +1,144 @@
+from pathlib import Path
+from contextlib import contextmanager
+from functools import lru_cache
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import threading
+
+
+@lru_cache(maxsize=None)
+def tool_version(tool):
+    '''
+    First line of `tool --version`, or None if the tool can't be run
+    '''
+    try:
+        proc = subprocess.run([tool, '--version'],
+                              stdout=subprocess.PIPE,
+                              stderr=subprocess.DEVNULL,
+                              text=True)
+    except OSError:
+        return None
+    if proc.returncode != 0 or not proc.stdout:
+        return None
+    return proc.stdout.splitlines()[0].strip()
+
+
+class BytecodeCache:
+    '''
+    Persistent on-disk cache for the *_hydrogit.bc files of a version.
+
+    Each entry is a directory named after its key, holding the bytecode at
+    its path relative to the version root, and a manifest that records the
+    root it was built in. An entry's mtime records when it was last used,
+    and the least recently used entries are evicted once the cache grows
+    past max_bytes. Several hydrogit processes can share the cache, entries
+    are only read, replaced and evicted while holding a lock on its .lock
+    file.
+    '''
+
+    def __init__(self, root, max_bytes):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key(commit, **settings):
+        '''
+        Content address for a build of commit with the given settings
+        '''
+        settings['commit'] = commit
+        blob = json.dumps(settings, sort_keys=True, default=str)
+        return hashlib.sha256(blob.encode()).hexdigest()
+
+    @contextmanager
+    def locked(self):
+        '''
+        Hold the cache for the enclosed block, against the other threads of
+        this process and against other processes
+        '''
+        with self.lock, open(self.root / '.lock', 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def fetch(self, key, version_root):
+        '''
+        Copy a cached entry into version_root and return its manifest, or
+        None on a miss. An entry that can't be read counts as a miss.
+        '''
+        entry = self.root / key
+        try:
+            with self.locked():
+                manifest = entry / 'manifest.json'
+                if not manifest.exists():
+                    return None
+                contents = json.loads(manifest.read_text())
+                for rel in contents['files']:
+                    dest = version_root / rel
+                    dest.parent.mkdir(parents=True, exist_ok=True)
+                    shutil.copy2(entry / 'files' / rel, dest)
+                # mark as most recently used
+                os.utime(entry)
+        except (OSError, ValueError, KeyError) as msg:
+            print(f'Hydrogit cache: could not read {entry.name} ({msg}), building instead')
+            return None
+        return contents
+
+    def store(self, key, version_root, paths, settings=None):
+        '''
+        Add the given files of version_root to the cache under key. The build
+        goes on without caching if that fails.
+        '''
+        entry = self.root / key
+        staging = self.root / f'.{key}.{os.getpid()}.{threading.get_ident()}'
+        try:
+            if staging.exists():
+                shutil.rmtree(staging)
+
+            files = []
+            for path in paths:
+                rel = Path(path).relative_to(version_root)
+                dest = staging / 'files' / rel
+                dest.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(path, dest)
+                files.append(str(rel))
+            (staging / 'manifest.json').write_text(
+                json.dumps({'files': files, 'root': str(Path(version_root).resolve()), 'settings': settings},
+                           indent=2, default=str))
+
+            with self.locked():
+                if entry.exists():
+                    shutil.rmtree(entry)
+                staging.rename(entry)
+                self.evict()
+        except OSError as msg:
+            print(f'Hydrogit cache: could not store {entry.name} ({msg})')
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def evict(self):
+        '''
+        Drop least recently used entries until the cache fits in max_bytes.
+        Call inside self.locked().
+        '''
+        entries = []
+        total = 0
+        for entry in self.root.iterdir():
+            if not entry.is_dir() or entry.name.startswith('.'):
+                continue
+            size = sum(f.stat().st_size for f in entry.rglob('*') if f.is_file())
+            entries.append((entry.stat().st_mtime, size, entry))
+            total += size
+
+        for _, size, entry in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            print(f'Hydrogit cache: evicting {entry.name}')
+            shutil.rmtree(entry)
+            total -= size
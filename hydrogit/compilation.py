@@ -1,49 +1,188 @@
-from pathlib import Path
+from pathlib import Path, PurePosixPath
 import subprocess
 import os
 import fileinput
 import re
 import shutil
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from cache import BytecodeCache, tool_version
+from incremental import TranslationUnitIndex
+from tracing import Deadline, Tracer, run_measured, stop_on_error
 
 cmake_utils_dir = (Path(__file__).parent /
                    'llvm-ir-cmake-utils' / 'cmake').resolve()
 assert cmake_utils_dir.exists()
 hydrogit_target_tag = '_hydrogit'
+make_cppflags = '-O0 -Xclang -disable-O0-optnone -g -flto'
+make_ldflags = '-flto -fuse-ld=lld -Wl,-save-temps'
+cmake_compile_options = '-c -O0 -Xclang -disable-O0-optnone -g -emit-llvm -S'
+header_suffixes = ['.h', '.hh', '.hpp', '.hxx']
+
+
+def is_version_source(path, language):
+    '''
+    Whether path, relative to the version root, is one of the sources
+    Version.glob_files gathers for language, or a header they include
+    '''
+    path = PurePosixPath(path)
+    if path.suffix in header_suffixes:
+        return True
+    if language == 'C':
+        return path.suffix == '.c'
+    if language == 'CXX':
+        return path.suffix == '.cpp' and (len(path.parts) == 1 or path.parts[0] == 'src')
+    return True
 
 
 class CompileManager:
-    def __init__(self, language, tmp):
+    def __init__(self, language, tmp, cache=None, tracer=None, deadline=None):
         self.language = language
         self.tmp = tmp
+        self.cache = cache
+        self.tracer = tracer or Tracer()
+        self.deadline = deadline or Deadline()
         self.versions_built = []
+        self.previous_units = None
 
-    def build_all(self, verbose, with_cmake, rule):
+    def build_all(self, commits, verbose, with_cmake, rule, jobs=1, incremental=False):
         '''
         Run compilation step for all versions.
+        With jobs > 1 the versions are built in a worker pool and each
+        version's build output goes to tmp/<version>.log.
+        With incremental, each Make build reuses the objects of unchanged
+        translation units from the version built before it.
         '''
-
-        for version_path in Path(self.tmp).iterdir():
-            if version_path.is_dir() and version_path.name != "cloned":
-                ver = Version(version_path, self.language)
-                try:
-                    if with_cmake:
-                        ver.build_cmake(verbose)
-                    else:
-                        ver.build_make(verbose, rule)
-                except Exception as msg:
-                    print(f'{ver.version}: Error({msg}) - skipping')
-                    continue
-
-                print(f'{ver.version}: Built successfully')
-                self.versions_built.append(ver)
+        for _ in self.build_each(commits, verbose, with_cmake, rule, jobs, incremental):
+            pass
         assert len(self.versions_built) > 0, \
             'No versions built'
 
+    def build_each(self, commits, verbose, with_cmake, rule, jobs=1, incremental=False, slots=None):
+        '''
+        Build the versions like build_all, yielding each one (None if its
+        build failed) in commit order as soon as it and the versions before
+        it are done, so later steps can start while the rest still builds.
+        slots is a semaphore shared with those steps, which bounds how many
+        builds and steps run at once.
+        '''
+
+        version_paths = [self.tmp / commit for commit in commits
+                         if (self.tmp / commit).is_dir()]
+        self.versions_built = []
+
+        if incremental:
+            if with_cmake:
+                print('Incremental builds are only supported with Make - building everything')
+            elif jobs > 1:
+                print('Incremental builds depend on the previous version - ignoring --jobs')
+                jobs = 1
+
+        def build(version_path, log_path=None, incremental=False):
+            with slots or nullcontext():
+                return self.build_version(version_path, verbose, with_cmake, rule, log_path, incremental)
+
+        if jobs > 1:
+            print(f'Building {len(version_paths)} versions with {jobs} jobs, '
+                  f'logs in {self.tmp}')
+            with ThreadPoolExecutor(max_workers=jobs) as pool, stop_on_error(pool):
+                futures = [pool.submit(build, version_path, self.tmp / f'{version_path.name}.log')
+                           for version_path in version_paths]
+                # waiting on the futures in turn keeps the commit order
+                for future in futures:
+                    ver = future.result()
+                    if ver:
+                        self.versions_built.append(ver)
+                    yield ver
+        else:
+            for version_path in version_paths:
+                ver = build(version_path, incremental=incremental and not with_cmake)
+                if ver:
+                    self.versions_built.append(ver)
+                yield ver
+
+    def build_version(self, version_path, verbose, with_cmake, rule, log_path=None,
+                      incremental=False):
+        '''
+        Build a single version, returning None if the build failed.
+        '''
+
+        ver = Version(version_path, self.language, self.tracer, self.deadline)
+        if incremental:
+            ver.units = TranslationUnitIndex(ver.root, self.language)
+            ver.previous_units = self.previous_units
+
+        settings = None
+        key = None
+        if self.cache:
+            commit = ver.commit_id()
+            if commit and ver.has_local_changes():
+                # the bytecode would not be the commit's, e.g. a dirty tree copied with -L
+                print(f'{ver.version}: Uncommitted changes, not using the cache')
+            elif commit:
+                settings = self.cache_settings(with_cmake, rule)
+                key = BytecodeCache.key(commit, **settings)
+        hit = None
+        if key:
+            with self.tracer.span('cache fetch', ver.version):
+                hit = self.cache.fetch(key, ver.root)
+        if hit:
+            ver.compile_root = hit.get('root')
+            try:
+                ver.glob_files()
+            except Exception as msg:
+                print(f'{ver.version}: Error({msg}) - skipping')
+                return None
+            print(f'{ver.version}: Bytecode found in cache')
+            return ver
+
+        try:
+            if log_path:
+                with log_path.open('w') as log:
+                    ver.log = log
+                    ver.build(verbose, with_cmake, rule)
+            else:
+                ver.build(verbose, with_cmake, rule)
+        except Exception as msg:
+            print(f'{ver.version}: Error({msg}) - skipping')
+            return None
+        finally:
+            ver.log = None
+
+        print(f'{ver.version}: Built successfully')
+        if ver.units:
+            self.previous_units = ver.units
+        if key:
+            with self.tracer.span('cache store', ver.version):
+                self.cache.store(key, ver.root, ver.bc_paths, settings)
+        return ver
+
+    def cache_settings(self, with_cmake, rule):
+        '''
+        Everything besides the commit that decides what bytecode a build produces
+        '''
+        compiler = 'clang++' if self.language == 'CXX' else 'clang'
+        settings = {
+            'language': self.language,
+            'compiler': tool_version(compiler),
+            'target_tag': hydrogit_target_tag,
+        }
+        if with_cmake:
+            settings['cmake'] = True
+            settings['flags'] = cmake_compile_options
+        else:
+            settings['rule'] = rule
+            settings['flags'] = [make_cppflags, make_ldflags]
+        return settings
+
 
 class Version:
-    def __init__(self, root, language):
+    def __init__(self, root, language, tracer=None, deadline=None):
         assert root.exists()
         self.root = root
+        # where the bytecode was compiled, another checkout for bytecode from
+        # the cache or a worker, None if that isn't known
+        self.compile_root = root.resolve()
         self.version = self.root.stem
         self.build_path = self.root / './build'
         self.cmake_path = self.root / '.'
@@ -51,68 +190,123 @@ class Version:
         self.c_paths = []
         self.bc_paths = []
         self.language = language
+        self.log = None
+        self.units = None
+        self.previous_units = None
+        self.tracer = tracer or Tracer()
+        self.deadline = deadline or Deadline()
+
+    def run(self, args, verbose, **kwargs):
+        '''
+        Run a build step. Output goes to this version's log if one is open,
+        otherwise to stdout when verbose. The step's peak memory goes to the
+        current trace span. A step that runs out of time is killed along
+        with its children and raises subprocess.TimeoutExpired.
+        '''
+        if self.log:
+            stdout = stderr = self.log
+        else:
+            stdout = None if verbose else subprocess.DEVNULL
+            stderr = None if verbose else subprocess.DEVNULL
+
+        proc, rss = run_measured(args, self.deadline.timeout(), stdout=stdout, stderr=stderr, **kwargs)
+        self.tracer.note_rss(rss)
+        return proc
+
+    def commit_id(self):
+        '''
+        Full SHA of the checked out commit, or None if it can't be determined
+        '''
+        # don't let git walk up into an enclosing repository
+        if (self.root / '.git').exists():
+            proc = subprocess.run(['git', 'rev-parse', 'HEAD'],
+                                  stdout=subprocess.PIPE,
+                                  stderr=subprocess.DEVNULL,
+                                  text=True,
+                                  cwd=self.root)
+            if proc.returncode == 0:
+                return proc.stdout.strip()
+        if re.fullmatch('[0-9a-f]{40}', self.version):
+            return self.version
+        return None
+
+    def has_local_changes(self):
+        '''
+        Whether the checkout differs from its commit, call before building.
+        Checkouts without their own .git are exported clean.
+        '''
+        if not (self.root / '.git').exists():
+            return False
+        proc = subprocess.run(['git', 'status', '--porcelain'],
+                              stdout=subprocess.PIPE,
+                              stderr=subprocess.DEVNULL,
+                              text=True,
+                              cwd=self.root)
+        # a status that can't be read counts as changed
+        return proc.returncode != 0 or bool(proc.stdout.strip())
+
+    def build(self, verbose, with_cmake, rule):
+        with self.tracer.span('build version', self.version):
+            if with_cmake:
+                self.build_cmake(verbose)
+            else:
+                self.build_make(verbose, rule)
 
     def build_make(self, verbose, rule):
-        print('Hydrogit cleaning...')
-        subprocess.run(['rm', '*.bc'], 
-            stdout=None if verbose else subprocess.DEVNULL,
-            stderr=None if verbose else subprocess.DEVNULL,
-            cwd=self.root)
-        subprocess.run(['make', 'clean'], 
-            stdout=None if verbose else subprocess.DEVNULL,
-            stderr=None if verbose else subprocess.DEVNULL,
-            cwd=self.root)
-
-        print('Hydrogit configuring')
-        configure_proc = subprocess.run(
-            ['bash', 'configure'],
-            stdout=None if verbose else subprocess.DEVNULL,
-            stderr=None if verbose else subprocess.DEVNULL,
-            cwd=self.root
-        )
+        print(f'{self.version}: Hydrogit cleaning...')
+        with self.tracer.span('clean', self.version):
+            self.run(['rm', '*.bc'], verbose, cwd=self.root)
+            self.run(['make', 'clean'], verbose, cwd=self.root)
+
+        print(f'{self.version}: Hydrogit configuring')
+        with self.tracer.span('configure', self.version):
+            configure_proc = self.run(['bash', 'configure'], verbose, cwd=self.root)
 
         assert configure_proc.returncode == 0, \
             f'configure returned error code {configure_proc.returncode}'
             
-        print('Hydrogit configuring again')
-        subprocess.run(['rm', '*.bc'], 
-            stdout=None if verbose else subprocess.DEVNULL,
-            stderr=None if verbose else subprocess.DEVNULL,
-            cwd=self.root)
-        subprocess.run(['make', 'clean'], 
-            stdout=None if verbose else subprocess.DEVNULL,
-            stderr=None if verbose else subprocess.DEVNULL,
-            cwd=self.root)
-
-        print('Hydrogit running make')
-        make_proc = subprocess.run([
-            'make',
-            rule,
-            'CC=clang',
-            'CPPFLAGS=-O0 -Xclang -disable-O0-optnone -g -flto',
-            'LDFLAGS=-flto -fuse-ld=lld -Wl,-save-temps'
-        ],
-            stdout=None if verbose else subprocess.DEVNULL,
-            stderr=None if verbose else subprocess.DEVNULL,
-            cwd=self.root)
+        print(f'{self.version}: Hydrogit configuring again')
+        with self.tracer.span('clean', self.version):
+            self.run(['rm', '*.bc'], verbose, cwd=self.root)
+            self.run(['make', 'clean'], verbose, cwd=self.root)
+
+        if self.units:
+            with self.tracer.span('seed objects', self.version):
+                self.units.scan()
+                if self.previous_units:
+                    reused, rebuilt = self.units.seed_from(self.previous_units)
+                    print(f'{self.version}: Reusing {reused} translation units, '
+                          f'rebuilding {rebuilt}')
+
+        print(f'{self.version}: Hydrogit running make')
+        with self.tracer.span('build', self.version):
+            make_proc = self.run([
+                'make',
+                rule,
+                'CC=clang',
+                f'CPPFLAGS={make_cppflags}',
+                f'LDFLAGS={make_ldflags}'
+            ], verbose, cwd=self.root)
 
         assert make_proc.returncode == 0, \
             f'make returned error code {make_proc.returncode}'
 
+        if self.units:
+            self.units.collect_objects()
+
         # Invoke llvm-dis
         filename = next(self.root.glob('**/*.precodegen.bc'), None)
         assert filename, \
             f'no intermediate found in {self.root}'
 
         outfile = f'{filename.parent/filename.stem[0:filename.stem.find(".")]}{hydrogit_target_tag}.bc'
-        llvmdis_proc = subprocess.run([
-            'llvm-dis',
-            filename,
-            '-o',
-            outfile,
-        ],
-            stdout=None if verbose else subprocess.DEVNULL,
-            stderr=None if verbose else subprocess.DEVNULL)
+        with self.tracer.span('llvm-dis', self.version):
+            llvmdis_proc = self.run([
+                'llvm-dis',
+                filename,
+                '-o',
+                outfile,
+            ], verbose)
 
         assert llvmdis_proc.returncode == 0, \
             f'llvm-dis returned error code {llvmdis_proc.returncode}'
@@ -132,9 +326,11 @@ class Version:
 
         # Run CMake and collect the output
         print(f'{self.version}: Running CMake...')
-        targets = self.cmake(verbose)
+        with self.tracer.span('configure', self.version):
+            targets = self.cmake(verbose)
         print(f'{self.version}: Building...')
-        self.make_cmake(targets, verbose)
+        with self.tracer.span('build', self.version):
+            self.make_cmake(targets, verbose)
         print(f'{self.version}: Gathering files...')
         self.glob_files()
 
@@ -188,7 +384,7 @@ foreach(_target ${{_allTargets}})
     if((_type STREQUAL "EXECUTABLE") OR (_type STREQUAL "STATIC_LIBRARY") OR (_type STREQUAL "SHARED_LIBRARY"))
         message(STATUS "Hydrogit adding IR for target ${{_target}} type ${{_type}}")
         set_target_properties(${{_target}} PROPERTIES LINKER_LANGUAGE C)
-        add_compile_options(-c -O0 -Xclang -disable-O0-optnone -g -emit-llvm -S)
+        add_compile_options({cmake_compile_options})
         llvmir_attach_bc_target(${{_target}}_bc ${{_target}})
         add_dependencies(${{_target}}_bc ${{_target}})
         llvmir_attach_link_target(${{_target}}{hydrogit_target_tag} ${{_target}}_bc -S)
@@ -204,22 +400,18 @@ endforeach(_target ${{_allTargets}})
         Run CMake with the given target
         '''
 
-        stdout = None if verbose else subprocess.DEVNULL
-        stderr = None if verbose else subprocess.DEVNULL
-
         compile_env = os.environ.copy()
         if self.language == 'C':
             compile_env['CC'] = 'clang'
         elif self.language == 'CXX':
             compile_env['CXX'] = 'clang++'
 
-        cmake_proc = subprocess.run(args=[
+        cmake_proc = self.run([
             'cmake',
             '-B', str(self.build_path),
             str(self.cmake_path)
         ],
-            stdout=stdout,
-            stderr=stderr,
+            verbose,
             text=True,
             env=compile_env
         )
@@ -254,15 +446,8 @@ endforeach(_target ${{_allTargets}})
                 if verbose:
                     args.append('--verbose')  # show make output
 
-                stdout = None if verbose else subprocess.DEVNULL
-                stderr = None if verbose else subprocess.DEVNULL
-
-                build_proc = subprocess.run(
-                    args=args,
-                    stdout=stdout,
-                    stderr=stderr,
-                    text=True
-                )
+                with self.tracer.span(f'build {target}', self.version):
+                    build_proc = self.run(args, verbose, text=True)
 
                 assert build_proc.returncode == 0, \
                     f'Build step returned error code {build_proc.returncode}'
@@ -0,0 +1,126 @@
+from pathlib import Path
+import shutil
+import time
+import uuid
+from compilation import hydrogit_target_tag
+from hydrogen import write_pairwise
+from jobqueue import format_jobs
+from tracing import Deadline, Tracer
+
+
+class BuiltVersion:
+    '''
+    A version a worker built, as far as the coordinator needs to know it
+    '''
+
+    def __init__(self, job):
+        self.version = job['spec']['commit']
+        self.artifacts = job['result']['artifacts']
+        self.compile_root = job['result'].get('root')
+        self.bc_paths = [Path(path) for path in job['result']['bc']]
+
+
+class Coordinator:
+    '''
+    Splits a pairwise run into a build job per commit and a pair job for
+    every two adjacent built versions, which workers (worker.py) on any host
+    that reaches the queue take. A pair job is put on the queue as soon as
+    both of its versions are built. Failed jobs are retried by the queue.
+    '''
+
+    def __init__(self, queue, hydrogen_manager, tracer=None, deadline=None, attempts=3, poll=1.0):
+        self.queue = queue
+        self.hydrogen_manager = hydrogen_manager
+        self.tracer = tracer or Tracer()
+        self.deadline = deadline or Deadline()
+        self.attempts = attempts
+        self.poll = poll
+
+    def run(self, commits, spec, workdir, target=None):
+        '''
+        Put the jobs for the commits on the queue and wait for them, then
+        fetch the pair reports into workdir and merge them into Result.txt and
+        Result.json. spec holds what workers need to check out and build a
+        commit and to run Hydrogen, see HydroGit.distribute.
+        '''
+        run = uuid.uuid4().hex[:12]
+        builds = [self.queue.put(run, 'build', dict(spec, commit=commit), self.attempts) for commit in commits]
+        print(f'Run {run}: {len(builds)} build jobs on {self.queue}, '
+              f'start workers with `python worker.py {self.queue}`')
+
+        pairs = []
+        pair_jobs = []
+        build_target_bc = None
+        previous = None
+        resolved = 0
+        states = {}
+        with self.tracer.span('distributed run'):
+            while True:
+                jobs = {job['id']: job for job in self.queue.jobs(run)}
+                self.report(jobs, states)
+                # builds are paired in commit order, skipping the failed ones
+                while resolved < len(builds) and jobs[builds[resolved]]['state'] in ['done', 'failed']:
+                    job = jobs[builds[resolved]]
+                    resolved += 1
+                    if job['state'] == 'failed':
+                        continue
+                    version = BuiltVersion(job)
+                    if build_target_bc is None:
+                        build_target_bc = (f'{target}{hydrogit_target_tag}' if target
+                                           else self.hydrogen_manager.select_target([version]))
+                    if not any(bc.stem == build_target_bc for bc in version.bc_paths):
+                        # Only build the versions that have the specified target
+                        continue
+                    if previous:
+                        pairs.append((len(pairs), (previous, version)))
+                        pair_jobs.append(self.queue.put(run, 'pair', dict(
+                            spec, target=build_target_bc,
+                            before={'commit': previous.version, 'artifacts': previous.artifacts,
+                                    'root': previous.compile_root},
+                            after={'commit': version.version, 'artifacts': version.artifacts,
+                                   'root': version.compile_root}), self.attempts))
+                    previous = version
+                open_jobs = [job_id for job_id in builds + pair_jobs
+                             if job_id not in jobs or jobs[job_id]['state'] not in ['done', 'failed']]
+                if not open_jobs:
+                    break
+                if self.deadline.expired():
+                    print(f'Run {run} ran out of time with {len(open_jobs)} jobs left, they stay on the queue')
+                    break
+                time.sleep(self.poll)
+
+        if not pairs:
+            print('Need at least two versions with the target for pairwise mode')
+            return False
+
+        if workdir.exists():
+            shutil.rmtree(workdir)
+        workdir.mkdir(parents=True)
+        results = []
+        for (i, (before, after)), job_id in zip(pairs, pair_jobs):
+            job = jobs.get(job_id)
+            if not job or job['state'] != 'done':
+                results.append(None)
+                continue
+            self.queue.get_artifacts(job['result']['artifacts'],
+                                     workdir / f'{i}_{before.version[:8]}_{after.version[:8]}')
+            results.append(job['result']['hydrogen'])
+        write_pairwise(pairs, results, workdir)
+        return all(result is not None for result in results)
+
+    def report(self, jobs, states):
+        '''
+        Print the jobs whose state changed since the last report, and how far
+        the run has got
+        '''
+        changed = [job for job in jobs.values() if states.get(job['id']) != (job['state'], job['attempts'])]
+        if not changed:
+            return
+        print(format_jobs(changed))
+        for job in changed:
+            states[job['id']] = (job['state'], job['attempts'])
+        builds = [job for job in jobs.values() if job['kind'] == 'build']
+        pairs = [job for job in jobs.values() if job['kind'] == 'pair']
+        print(f'Progress: {sum(job["state"] == "done" for job in builds)}/{len(builds)} versions built, '
+              f'{sum(job["state"] == "done" for job in pairs)}/{len(pairs)} pairs done, '
+              f'{sum(job["state"] == "failed" for job in jobs.values())} failed')
@@ -0,0 +1,83 @@
+from pathlib import Path
+from functools import lru_cache
+import os
+import re
+import subprocess
+
+# magic numbers of raw and wrapped bitcode, anything else is read as textual IR
+bitcode_magics = [b'BC\xc0\xde', b'\xde\xc0\x17\x0b']
+difile_pattern = re.compile(
+    r'!DIFile\(filename: "((?:[^"\\]|\\.)*)", directory: "((?:[^"\\]|\\.)*)"')
+escape_pattern = re.compile(r'\\([0-9A-Fa-f]{2})')
+
+
+def unescape(name):
+    '''
+    Undo the \\XX escapes LLVM writes in metadata strings
+    '''
+    raw = escape_pattern.sub(lambda m: chr(int(m.group(1), 16)), name)
+    return raw.encode('latin-1').decode('utf-8', errors='replace')
+
+
+def ir_lines(bc_path):
+    '''
+    Lines of the module's textual IR, disassembled first if it is bitcode
+    '''
+    with open(bc_path, 'rb') as f:
+        magic = f.read(4)
+    if magic not in bitcode_magics:
+        with open(bc_path, errors='replace') as f:
+            yield from f
+        return
+
+    proc = subprocess.run(['llvm-dis', str(bc_path), '-o', '-'],
+                          stdout=subprocess.PIPE,
+                          stderr=subprocess.DEVNULL,
+                          text=True,
+                          errors='replace')
+    assert proc.returncode == 0, \
+        f'llvm-dis returned error code {proc.returncode} for {bc_path}'
+    yield from proc.stdout.splitlines()
+
+
+@lru_cache(maxsize=None)
+def read_debug_files(bc_path, mtime):
+    '''
+    (filename, directory) of every DIFile in the module, in order
+    '''
+    files = []
+    for line in ir_lines(bc_path):
+        if 'DIFile' not in line:
+            continue
+        for match in difile_pattern.finditer(line):
+            files.append((unescape(match.group(1)), unescape(match.group(2))))
+    return files
+
+
+def debug_sources(bc_path, root, compile_root=None):
+    '''
+    The files under root that the debug info of the module at bc_path refers
+    to, which are the sources and headers its functions were compiled from.
+    Files outside root, like system headers, are left out.
+    compile_root is the root the module was compiled in, if that was another
+    checkout (cached or queued bytecode), files under it are looked for at
+    the same place under root. Returns None if a source the module was
+    compiled from lies outside both roots, as when compile_root isn't known,
+    since the list would then be incomplete.
+    '''
+    bc_path = Path(bc_path)
+    root = Path(root).resolve()
+    compile_root = Path(compile_root).resolve() if compile_root else None
+    sources = []
+    for filename, directory in read_debug_files(bc_path, bc_path.stat().st_mtime_ns):
+        path = Path(os.path.normpath(Path(directory) / filename))
+        if root not in path.parents and compile_root and compile_root in path.parents:
+            path = root / path.relative_to(compile_root)
+        if root not in path.parents:
+            if not Path(filename).is_absolute():
+                # a file compiled relative to a checkout this one doesn't know
+                return None
+            continue
+        if path.is_file() and path not in sources:
+            sources.append(path)
+    return sources
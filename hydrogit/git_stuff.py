@@ -1,42 +1,198 @@
 from pathlib import Path
+import hashlib
 import shutil
 import subprocess
+import tarfile
+import tempfile
 import os
+from tracing import Deadline, Tracer, measured_process, run_measured
+
+checkout_backends = ['copy', 'worktree', 'archive']
+
+
+def mirror_name(url):
+    '''
+    Directory name for the bare mirror of url. A local path is resolved
+    first, the same relative path names other projects from elsewhere.
+    '''
+    if Path(url).exists():
+        url = str(Path(url).resolve())
+    digest = hashlib.sha1(url.encode()).hexdigest()[:12]
+    return f'{Path(url.rstrip("/")).stem}-{digest}.git'
+
 
 class GitManager:
-    def __init__(self, git_url, tmp):
+    def __init__(self, git_url, tmp, backend='copy', mirrors=None, tracer=None, deadline=None):
+        assert backend in checkout_backends, \
+            f'unknown checkout backend {backend}'
         self.tmp=tmp
         self.url=None
         self.cloned=self.tmp/"cloned"
         self.commits=[]
         self.current_cwd=os.getcwd()
         self.url = git_url
+        self.backend = backend
+        self.mirror = (mirrors or self.tmp.parent / "mirrors") / mirror_name(git_url)
+        self.tracer = tracer or Tracer()
+        self.deadline = deadline or Deadline()
+
+    def run(self, args, **kwargs):
+        '''
+        Run a git command, reporting its peak memory to the current trace span
+        '''
+        proc, rss = run_measured(args, self.deadline.timeout(), **kwargs)
+        self.tracer.note_rss(rss)
+        return proc
 
     def clone(self, local_dir):
         if self.tmp.exists():
             shutil.rmtree(self.tmp)
         self.tmp.mkdir(exist_ok=True)
+        with self.tracer.span('clone'):
+            if self.backend != 'copy':
+                self.update_mirror(local_dir)
+            elif local_dir:
+                local = Path(self.url)
+                assert local.exists()
+                shutil.copytree(str(local), str(self.cloned))
+            else:
+                self.run(["git", "clone", self.url, str(self.cloned)])
+
+
+    def update_mirror(self, local_dir):
+        '''
+        Create the bare mirror on first use, otherwise fetch what's new.
+        The mirror lives outside tmp so it survives between runs.
+        '''
+        url = self.url
         if local_dir:
             local = Path(self.url)
             assert local.exists()
-            shutil.copytree(str(local), str(self.cloned))
+            url = str(local.resolve())
+
+        if self.mirror.exists():
+            print(f'Fetching into mirror {self.mirror}')
+            fetch_proc = self.run(
+                ["git", "--git-dir", str(self.mirror), "fetch", "--prune", "origin"])
+            assert fetch_proc.returncode == 0, \
+                f'git fetch returned error code {fetch_proc.returncode}'
         else:
-            subprocess.run(["git", "clone", self.url, str(self.cloned)])
+            self.mirror.parent.mkdir(parents=True, exist_ok=True)
+            clone_proc = self.run(
+                ["git", "clone", "--mirror", url, str(self.mirror)])
+            assert clone_proc.returncode == 0, \
+                f'git clone returned error code {clone_proc.returncode}'
+
+        # worktrees from the previous run went away with tmp
+        self.run(["git", "--git-dir", str(self.mirror), "worktree", "prune"])
 
+    def changed_files(self, before, after):
+        '''
+        Paths changed between two commits, or None if git cannot tell
+        '''
+        git = ["git", "-C", str(self.cloned)] if self.backend == 'copy' \
+            else ["git", "--git-dir", str(self.mirror)]
+        with tempfile.TemporaryFile('w+') as out:
+            diff_proc = self.run(git + ["diff", "--name-only", before, after],
+                                 stdout=out, stderr=subprocess.DEVNULL)
+            if diff_proc.returncode != 0:
+                return None
+            out.seek(0)
+            return out.read().splitlines()
+
+    def skip_unchanged(self, commits, is_source, base=None):
+        '''
+        Drop the commits that change no path is_source accepts since the
+        commit kept before them, or since base for the first one. The first
+        commit is always kept when there is no base.
+        '''
+        kept = []
+        skipped = []
+        previous = base
+        with self.tracer.span('skip unchanged'):
+            for commit in commits:
+                changed = self.changed_files(previous, commit) if previous else None
+                if changed is not None and not any(is_source(path) for path in changed):
+                    skipped.append(commit)
+                    continue
+                kept.append(commit)
+                previous = commit
+        if skipped:
+            print(f'Skipping {len(skipped)} commits without source changes: {" ".join(skipped)}')
+        return kept
 
     def checkout_copy_versions(self, versions, force=False):
+        if self.backend == 'worktree':
+            self.checkout_worktrees(versions, force)
+            return
+        if self.backend == 'archive':
+            self.export_archives(versions, force)
+            return
+
         wd=os.getcwd()
         os.chdir(self.cloned)
         for version in versions:
-            subprocess.run(["git", "checkout", version])
-            if (self.tmp/version) .exists() and not force:
-                print(str(self.tmp/version) + "exists, will not copy")
-            else:
-                shutil.copytree(self.cloned, self.tmp/version,
-                # ignore=shutil.ignore_patterns(".git")
-                )
+            with self.tracer.span('checkout', version):
+                self.run(["git", "checkout", version])
+                if (self.tmp/version) .exists() and not force:
+                    print(str(self.tmp/version) + "exists, will not copy")
+                else:
+                    shutil.copytree(self.cloned, self.tmp/version,
+                    # ignore=shutil.ignore_patterns(".git")
+                    )
         os.chdir(wd)
 
+    def checkout_worktrees(self, versions, force=False):
+        '''
+        Check out each version as a detached worktree of the mirror
+        '''
+        for version in versions:
+            dest = self.tmp/version
+            if dest.exists() and not force:
+                print(str(dest) + "exists, will not check out")
+                continue
+            if dest.exists():
+                shutil.rmtree(dest)
+                self.run(["git", "--git-dir", str(self.mirror), "worktree", "prune"])
+
+            with self.tracer.span('checkout', version):
+                worktree_proc = self.run(
+                    ["git", "--git-dir", str(self.mirror),
+                     "worktree", "add", "--detach", str(dest), version])
+            assert worktree_proc.returncode == 0, \
+                f'git worktree add returned error code {worktree_proc.returncode}'
+
+    def export_archives(self, versions, force=False):
+        '''
+        Stream `git archive` of each version straight into its directory.
+        The result has no .git, just the tracked files of that commit.
+        '''
+        for version in versions:
+            dest = self.tmp/version
+            if dest.exists() and not force:
+                print(str(dest) + "exists, will not export")
+                continue
+            if dest.exists():
+                shutil.rmtree(dest)
+            dest.mkdir()
+
+            with self.tracer.span('checkout', version):
+                # git is killed if the extraction fails, times out or hydrogit stops
+                with measured_process(
+                        ["git", "--git-dir", str(self.mirror), "archive", "--format=tar", version],
+                        self.deadline.timeout(), stdout=subprocess.PIPE) as archive_proc:
+                    with tarfile.open(fileobj=archive_proc.stdout, mode='r|') as tar:
+                        # the tar filter keeps modes and symlinks as git stores them, but
+                        # still refuses absolute paths and members outside dest. Pythons
+                        # without extraction filters extract the archive of our own mirror as is
+                        if hasattr(tarfile, 'tar_filter'):
+                            tar.extractall(str(dest), filter='tar')
+                        else:
+                            tar.extractall(str(dest))
+                self.tracer.note_rss(archive_proc.peak_rss)
+            assert archive_proc.returncode == 0, \
+                f'git archive returned error code {archive_proc.returncode}'
+
 
 def main():
     gc=GitManager("https://github.com/google/googletest.git", Path('./tmp'))
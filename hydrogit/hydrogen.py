@@ -1,20 +1,172 @@
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+import json
+import shutil
+import socket
 import subprocess
+import threading
 from compilation import hydrogit_target_tag
+from debuginfo import debug_sources
+from results import load_runs
+from tracing import Deadline, Tracer, run_measured, stop_on_error
+
+# values of Hydrogen's --dot option
+dot_outputs = ['none', 'mvicfg', 'all']
+
+def write_result(result, directory=Path('.')):
+    '''
+    Write a result received from the Hydrogen server as the Result.json and
+    Result.txt Hydrogen writes itself
+    '''
+    (directory / 'Result.json').write_text(json.dumps(result, indent=2))
+    with (directory / 'Result.txt').open('w') as text:
+        text.write(f'Input Args:\n{"  ".join(result["args"])}  \n')
+        write_report(text, result)
+
+
+def write_report(text, result):
+    '''
+    Write the numbers of a result the way Hydrogen's Result.txt has them
+    '''
+    text.write(f'Finished Building MVICFG in {result["timings_ms"].get("mvicfg")}ms\n')
+    text.write(f'Nodes: {result["nodes"]}\n')
+    text.write(f'Edges: {result["edges"]}\n')
+    for entry in result['versions']:
+        text.write(f'Version {entry["version"]} added {entry.get("paths_added")} paths\n')
+        text.write(f'Version {entry["version"]} removed {entry.get("paths_removed")} paths\n')
+        if entry.get('paths_truncated'):
+            text.write(f'Version {entry["version"]} path search stopped at the limit, '
+                       'the counts are lower bounds\n')
+
+
+def write_pairwise(pairs, results, workdir):
+    '''
+    Merge the results of the (index, (before, after)) pairs of versions,
+    None for a failed pair, into Result.txt and Result.json
+    '''
+    versions = [before for _, (before, _) in pairs] + [pairs[-1][1][1]]
+
+    with open('Result.txt', 'w') as merged:
+        merged.write(f'Pairwise results for {len(versions)} versions\n')
+        for (i, (before, after)), result in zip(pairs, results):
+            merged.write(f'{before.version} -> {after.version}\n')
+            if result is None:
+                merged.write(f'Version {i + 2} failed, see {workdir}\n')
+                continue
+            merged.write(f'Finished Building MVICFG in {result["timings_ms"].get("mvicfg")}ms\n')
+            merged.write(f'Nodes: {result["nodes"]}\n')
+            merged.write(f'Edges: {result["edges"]}\n')
+            for entry in result['versions']:
+                merged.write(f'Version {i + 2} added {entry.get("paths_added")} paths\n')
+                merged.write(f'Version {i + 2} removed {entry.get("paths_removed")} paths\n')
+                if entry.get('paths_truncated'):
+                    merged.write(f'Version {i + 2} path search stopped at the limit, '
+                                 'the counts are lower bounds\n')
+
+    with open('Result.json', 'w') as merged:
+        json.dump({'pairs': [
+            {'before': before.version, 'after': after.version, 'result': result}
+            for (_, (before, after)), result in zip(pairs, results)]}, merged, indent=2)
+    print('Merged results written to Result.txt and Result.json')
+
+
+class HydrogenClient:
+    '''
+    Client of a Hydrogen server started with `Hydrogen.out --serve=SOCKET`.
+    Each thread keeps its connection open for all the runs it sends.
+    '''
+
+    def __init__(self, socket_path):
+        self.socket_path = str(socket_path)
+        self.local = threading.local()
+
+    def connection(self):
+        if getattr(self.local, 'sock', None) is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.connect(self.socket_path)
+            self.local.sock = sock
+            self.local.reader = sock.makefile('rb')
+        return self.local.sock, self.local.reader
+
+    def close(self):
+        if getattr(self.local, 'sock', None) is not None:
+            self.local.reader.close()
+            self.local.sock.close()
+            self.local.sock = None
+
+    def run(self, args, timeout=None):
+        '''
+        Run Hydrogen on its command line args, without the binary, and return
+        the parsed Result.json, or None if the run failed. Raises
+        socket.timeout if the answer takes more than timeout seconds.
+        '''
+        if timeout is not None and timeout <= 0:
+            raise socket.timeout('no time left for the Hydrogen server')
+        request = b''.join(str(arg).encode() + b'\0' for arg in args) + b'\0'
+        # a connection the server closed in the meantime is opened again once
+        for attempt in range(2):
+            try:
+                sock, reader = self.connection()
+                sock.settimeout(timeout)
+                sock.sendall(request)
+                header = reader.readline()
+                if not header:
+                    raise ConnectionResetError('connection closed by the Hydrogen server')
+                status, length = header.decode().split()
+                body = reader.read(int(length)).decode()
+                break
+            except socket.timeout:
+                # the answer may still come, the connection can't be used again
+                self.close()
+                raise
+            except ConnectionError:
+                self.close()
+                if attempt:
+                    raise
+        if status != 'OK':
+            print(f'Hydrogen server: {body}')
+            return None
+        return json.loads(body)
+
 
 class HydrogenAdapter:
-    def __init__(self, hydrogen_binary):
+    def __init__(self, hydrogen_binary, tracer=None, dot=None, dot_gzip=False, scope=None, server=None,
+                 deadline=None):
         self.hy=hydrogen_binary
-        assert self.hy.exists()
+        self.client = HydrogenClient(server) if server else None
+        assert self.client or self.hy.exists()
+        self.tracer = tracer or Tracer()
+        self.deadline = deadline or Deadline()
+        if dot is None:
+            dot = 'none' if server else 'all'
+        assert dot in dot_outputs, f'dot output should be one of {" ".join(dot_outputs)}'
+        assert not (server and (dot != 'none' or dot_gzip)), 'the Hydrogen server does not write DOT files'
+        assert not (server and self.tracer.path), 'the Hydrogen server does not write traces'
+        self.dot = dot
+        self.dot_gzip = dot_gzip
+        assert scope is None or scope >= 0, 'the scope depth cannot be negative'
+        assert not (server and scope is not None), 'the Hydrogen server does not support --scope'
+        self.scope = scope
 
-    def select_target(self, versions):
+    def target_names(self, versions):
         '''
-        Select target to build
+        Names of the targets built in any of the versions
         '''
         bcs = [bc for v in versions for bc in v.bc_paths]
         target_names_unique = set([bc.stem.replace(hydrogit_target_tag, '') for bc in bcs])
-        target_names = sorted(list(target_names_unique))
-        if len(target_names) > 1:
+        return sorted(list(target_names_unique))
+
+    def select_target(self, versions, target=None):
+        '''
+        Select target to build, asking unless it was given
+        '''
+        target_names = self.target_names(versions)
+        if target:
+            assert target in target_names, \
+                f'target {target} not found, the targets are {" ".join(target_names)}'
+            build_target = target
+        elif len(target_names) > 1:
             print(f'{len(target_names)} targets found:')
             print(' '.join(f'''{i}) {name}''' for i, name in enumerate(target_names, start=1)))
 
@@ -25,18 +177,26 @@ class HydrogenAdapter:
             build_target = target_names[0]
         return f'{build_target}{hydrogit_target_tag}'
 
-    def run(self, versions):
+    def select_targets(self, versions, targets):
         '''
-        Run Hydrogen on these versions
+        The targets named in the comma separated list targets, or all
+        targets of the versions for 'all'
         '''
+        target_names = self.target_names(versions)
+        if targets == 'all':
+            selected = target_names
+        else:
+            selected = [name.strip() for name in targets.split(',') if name.strip()]
+            missing = [name for name in selected if name not in target_names]
+            assert not missing, \
+                f'targets {" ".join(missing)} not found, the targets are {" ".join(target_names)}'
+        return [f'{name}{hydrogit_target_tag}' for name in selected]
 
-        if not any(versions):
-            print('Nothing to build :(')
-            return
-
-        build_target_bc = self.select_target(versions)
-
-        # Run Hydrogen
+    def inputs(self, versions, build_target_bc):
+        '''
+        Bytecode and sources of the versions that have the target, as
+        Hydrogen takes them after its options
+        '''
         bcs=[]
         sources=[]
         for version in versions:
@@ -48,10 +208,227 @@ class HydrogenAdapter:
 
             bcs.append(bc)
             sources.append("::")
-            for c_path in version.c_paths:
+            # Only the files the target was compiled from need to be read and diffed
+            target_sources = debug_sources(bc, version.root, version.compile_root)
+            if target_sources is None:
+                print(f'{version.version}: debug info of {bc.name} names sources outside the version, '
+                      'using all sources')
+                target_sources = version.c_paths
+            elif not target_sources:
+                print(f'{version.version}: no debug info in {bc.name}, using all sources')
+                target_sources = version.c_paths
+            for c_path in target_sources:
                 sources.append(c_path)
+        return list(map(str, bcs)) + list(map(str, sources))
+
+    def command(self, versions, build_target_bc, trace_file=None, snapshot_in=None, snapshot_out=None):
+        '''
+        Hydrogen command line for the versions that have the target, added
+        to the MVICFG in snapshot_in if given
+        '''
+        # all is Hydrogen's default, leaving it out keeps older builds working
+        options = [f'--dot={self.dot}'] if self.dot != 'all' else []
+        if self.dot_gzip:
+            options.append('--dot-gzip')
+        if self.scope is not None:
+            options.append(f'--scope={self.scope}')
+        if trace_file:
+            options.append(f'--trace={trace_file}')
+        if snapshot_in:
+            options.append(f'--snapshot-in={snapshot_in}')
+        if snapshot_out:
+            options.append(f'--snapshot-out={snapshot_out}')
+        return [str(self.hy)] + options + self.inputs(versions, build_target_bc)
 
-        cmd = [str(self.hy)] + list(map(str, bcs)) + list(map(str, sources))
+    def run(self, versions, target=None, snapshot_in=None, snapshot_out=None):
+        '''
+        Run Hydrogen on these versions, returning whether it succeeded.
+        With snapshot_in they are added to the MVICFG saved there, with
+        snapshot_out the MVICFG is saved for the next run.
+        '''
+
+        if not any(versions):
+            print('Nothing to build :(')
+            return False
+
+        build_target_bc = self.select_target(versions, target)
+
+        if self.client:
+            assert not (snapshot_in or snapshot_out), 'the Hydrogen server does not keep snapshots'
+            try:
+                with self.tracer.span('hydrogen'):
+                    result = self.client.run(self.inputs(versions, build_target_bc), self.deadline.timeout())
+            except socket.timeout:
+                print('Hydrogen server ran out of time')
+                return False
+            if result is None:
+                return False
+            write_result(result)
+            print(f'Finished Building MVICFG in {result["timings_ms"].get("mvicfg")}ms')
+            return True
+
+        # Run Hydrogen
+        trace_file = self.tracer.hydrogen_trace('hydrogen')
+        cmd = self.command(versions, build_target_bc, trace_file, snapshot_in, snapshot_out)
         print(f'running command {cmd}')
 
-        subprocess.run(cmd)
+        try:
+            with self.tracer.span('hydrogen'):
+                proc, rss = run_measured(cmd, self.deadline.timeout())
+                self.tracer.note_rss(rss)
+        except subprocess.TimeoutExpired:
+            print('Hydrogen ran out of time and was stopped')
+            return False
+        self.tracer.merge(trace_file)
+        if proc.returncode != 0:
+            print(f'Hydrogen returned error code {proc.returncode}')
+        return proc.returncode == 0
+
+    def run_pairwise(self, versions, jobs, workdir, target=None, slots=None):
+        '''
+        Run Hydrogen on every pair of adjacent versions in parallel, each pair
+        in its own directory under workdir, and merge the per-pair results
+        into Result.txt and Result.json.
+        versions can also be an iterator yielding the versions as they are
+        built (None for a failed build), a pair then starts as soon as both
+        its versions are there. slots bounds the runs together with the builds.
+        '''
+
+        build_target_bc = None
+        if isinstance(versions, list):
+            if not any(versions):
+                print('Nothing to build :(')
+                return
+            build_target_bc = self.select_target(versions, target)
+
+        if workdir.exists():
+            shutil.rmtree(workdir)
+        workdir.mkdir(parents=True)
+
+        def run_pair(index, pair):
+            with slots or nullcontext():
+                return self.run_pair(index, pair, build_target_bc, workdir)
+
+        print(f'Running Hydrogen on pairs of adjacent versions with {jobs} jobs, output in {workdir}')
+        pairs = []
+        futures = []
+        previous = None
+        with ThreadPoolExecutor(max_workers=jobs) as pool, stop_on_error(pool):
+            for version in versions:
+                if version is None:
+                    continue
+                if build_target_bc is None:
+                    # the versions to come are not known yet, so a target not
+                    # given is chosen among those of the first version
+                    build_target_bc = (f'{target}{hydrogit_target_tag}' if target
+                                       else self.select_target([version]))
+                if not any(bc.stem == build_target_bc for bc in version.bc_paths):
+                    # Only build the versions that have the specified target
+                    continue
+                if previous:
+                    pairs.append((len(pairs), (previous, version)))
+                    futures.append(pool.submit(run_pair, *pairs[-1]))
+                previous = version
+            results = [future.result() for future in futures]
+
+        if not pairs:
+            print('Need at least two versions with the target for pairwise mode')
+            return
+        write_pairwise(pairs, results, workdir)
+
+    def run_targets(self, versions, targets, jobs, workdir):
+        '''
+        Run Hydrogen on the versions once for each of the targets (see
+        select_targets) in parallel, each target in its own directory under
+        workdir, and merge the per-target results into Result.txt and
+        Result.json. Returns whether all runs succeeded.
+        '''
+
+        if not any(versions):
+            print('Nothing to build :(')
+            return False
+
+        build_target_bcs = self.select_targets(versions, targets)
+        assert build_target_bcs, 'no targets selected'
+
+        if workdir.exists():
+            shutil.rmtree(workdir)
+        workdir.mkdir(parents=True)
+
+        def run_target(build_target_bc):
+            name = build_target_bc[:-len(hydrogit_target_tag)]
+            target_dir = workdir / name
+            target_dir.mkdir()
+            return self.run_in(versions, build_target_bc, target_dir, name, name)
+
+        print(f'Running Hydrogen on {len(build_target_bcs)} targets with {jobs} jobs, output in {workdir}')
+        with ThreadPoolExecutor(max_workers=jobs) as pool, stop_on_error(pool):
+            results = list(pool.map(run_target, build_target_bcs))
+        names = [bc[:-len(hydrogit_target_tag)] for bc in build_target_bcs]
+
+        with open('Result.txt', 'w') as merged:
+            merged.write(f'Results for {len(names)} targets\n')
+            for name, result in zip(names, results):
+                merged.write(f'Target {name}\n')
+                if result is None:
+                    merged.write(f'Failed, see {workdir / name}\n')
+                    continue
+                write_report(merged, result)
+
+        with open('Result.json', 'w') as merged:
+            json.dump({'targets': [
+                {'target': name, 'result': result}
+                for name, result in zip(names, results)]}, merged, indent=2)
+        print('Merged results written to Result.txt and Result.json')
+        return all(result is not None for result in results)
+
+    def run_pair(self, index, pair, build_target_bc, workdir):
+        '''
+        Run Hydrogen on one pair of versions, returning its parsed result
+        '''
+        before, after = pair
+        pair_dir = workdir / f'{index}_{before.version[:8]}_{after.version[:8]}'
+        pair_dir.mkdir()
+        return self.run_in(pair, build_target_bc, pair_dir, f'{before.version} -> {after.version}', after.version)
+
+    def run_in(self, versions, build_target_bc, directory, label, span=None):
+        '''
+        Run Hydrogen on the versions in directory, which keeps its reports
+        and log, returning its parsed result or None if it failed
+        '''
+        if self.client:
+            try:
+                with self.tracer.span('hydrogen', span):
+                    result = self.client.run(self.inputs(versions, build_target_bc), self.deadline.timeout())
+            except socket.timeout:
+                print(f'{label}: Hydrogen server ran out of time')
+                return None
+            if result is None:
+                print(f'{label}: Hydrogen server returned an error')
+                return None
+            write_result(result, directory)
+            print(f'{label}: done')
+            return result
+
+        trace_file = directory / 'trace.json' if self.tracer.path else None
+        cmd = self.command(versions, build_target_bc, trace_file)
+        with (directory / 'hydrogen.log').open('w') as log:
+            try:
+                with self.tracer.span('hydrogen', span):
+                    proc, rss = run_measured(cmd, self.deadline.timeout(), cwd=directory, stdout=log, stderr=log)
+                    self.tracer.note_rss(rss)
+            except subprocess.TimeoutExpired:
+                print(f'{label}: Hydrogen ran out of time and was stopped')
+                return None
+        self.tracer.merge(trace_file)
+
+        result_file = directory / 'Result.json'
+        if not result_file.exists():
+            # Hydrogen builds from before Result.json only write the text report
+            result_file = directory / 'Result.txt'
+        if proc.returncode != 0 or not result_file.exists():
+            print(f'{label}: Hydrogen returned error code {proc.returncode}')
+            return None
+        print(f'{label}: done')
+        _, result = load_runs(result_file)[0]
+        return result
@@ -1,46 +1,170 @@
 from git_stuff import GitManager
-from compilation import CompileManager
+from compilation import CompileManager, is_version_source
+from cache import BytecodeCache
+from coordinator import Coordinator
 from hydrogen import HydrogenAdapter
+from jobqueue import open_queue
+from snapshots import SnapshotStore
+from tracing import Deadline, Tracer, kill_running
 from arguments import get_args
 import os
 from pathlib import Path
+import threading
 
 class HydroGit:
-    def __init__(self, url, commit_ids, language):
+    def __init__(self, url, commit_ids, language, cache_dir=None, cache_size=None,
+                 checkout='copy', trace=None, dot=None, dot_gzip=False, append=None, scope=None,
+                 server=None, step_timeout=None, timeout=None):
         self.git_commits = commit_ids
+        self.language = language
+        self.url = url
+        self.checkout = checkout
+        self.skipped = []
 
         wd = (Path(__file__).parent.absolute())
+        self.snapshots = None
+        if append:
+            # only the versions the snapshot of the branch does not have yet
+            self.snapshots = SnapshotStore(wd / "snapshots", url, append)
+            self.git_commits = self.snapshots.pending(commit_ids)
+        self.requested = self.git_commits
         tmp = wd / "tmp"
-        self.git_manager=GitManager(url, tmp)
-        self.compiler=CompileManager(language, tmp)
-        self.hydrogen_manager=HydrogenAdapter(wd / "../buildninja/Hydrogen.out")
+        self.tmp = tmp
+        cache = None
+        if cache_size:
+            cache = BytecodeCache(cache_dir or wd / "cache", cache_size * 1024 * 1024)
+        self.tracer = Tracer(trace)
+        self.deadline = Deadline(step_timeout, timeout)
+        self.git_manager=GitManager(url, tmp, checkout, wd / "mirrors", self.tracer, self.deadline)
+        self.compiler=CompileManager(language, tmp, cache, self.tracer, self.deadline)
+        self.hydrogen_manager=HydrogenAdapter(wd / "../buildninja/Hydrogen.out", self.tracer, dot, dot_gzip, scope,
+                                             server, self.deadline)
 
-    def clone(self, local_dir):
+    def clone(self, local_dir, keep_unchanged=False, checkout=True):
         # git
         self.git_manager.clone(local_dir)
-        self.git_manager.checkout_copy_versions(self.git_commits)
+        if not keep_unchanged:
+            # a commit without source changes gives the same MVICFG as the one before it
+            base = self.snapshots.last() if self.snapshots else None
+            kept = self.git_manager.skip_unchanged(
+                self.git_commits, lambda path: is_version_source(path, self.language), base)
+            self.skipped = [c for c in self.git_commits if c not in kept]
+            self.git_commits = kept
+        if checkout:
+            self.git_manager.checkout_copy_versions(self.git_commits)
 
-    def compile(self, verbose, with_cmake, rule):
+    def compile(self, verbose, with_cmake, rule, jobs, incremental):
         # compilation
-        self.compiler.build_all(verbose, with_cmake, rule)
+        self.compiler.build_all(self.git_commits, verbose, with_cmake, rule, jobs, incremental)
 
-    def hydrogen(self):
-        self.hydrogen_manager.run(self.compiler.versions_built)
+    def compile_pairwise(self, verbose, with_cmake, rule, jobs, incremental, target=None):
+        '''
+        Build the versions and run Hydrogen on each pair of adjacent versions
+        as soon as both are built, with at most jobs builds and runs at once
+        '''
+        slots = threading.BoundedSemaphore(jobs)
+        built = self.compiler.build_each(self.git_commits, verbose, with_cmake, rule, jobs, incremental, slots)
+        self.hydrogen_manager.run_pairwise(built, jobs, self.tmp / "pairs", target, slots)
+        assert len(self.compiler.versions_built) > 0, \
+            'No versions built'
+
+    def distribute(self, queue, local_dir, with_cmake, rule, target=None, retries=2):
+        '''
+        Have workers on the queue build the versions and run Hydrogen on each
+        pair of adjacent versions, and merge their results like -p does
+        '''
+        spec = {
+            # workers elsewhere need the full path of a local project
+            'url': str(Path(self.url).absolute()) if local_dir else self.url,
+            'local': local_dir,
+            'checkout': self.checkout,
+            'language': self.language,
+            'with_cmake': with_cmake,
+            'rule': rule,
+            'dot': self.hydrogen_manager.dot,
+            'dot_gzip': self.hydrogen_manager.dot_gzip,
+            'scope': self.hydrogen_manager.scope,
+        }
+        coordinator = Coordinator(open_queue(queue), self.hydrogen_manager, self.tracer, self.deadline, retries + 1)
+        coordinator.run(self.git_commits, spec, self.tmp / "pairs", target)
+
+    def hydrogen(self, jobs, target=None, targets=None):
+        if targets:
+            self.hydrogen_manager.run_targets(
+                self.compiler.versions_built, targets, jobs, self.tmp / "targets")
+        elif self.snapshots:
+            # the snapshot keeps the versions in order, so it only grows up to
+            # the first commit that failed to build, which the next run retries
+            built = {v.version: v for v in self.compiler.versions_built}
+            added = []
+            for commit in self.requested:
+                if commit not in built and commit not in self.skipped:
+                    print(f'{commit} failed to build, only the versions before it go into the snapshot')
+                    break
+                added.append(commit)
+            versions = [built[c] for c in added if c in built]
+            if not versions:
+                if added:
+                    # skipped commits are in the snapshot through the version before them
+                    self.snapshots.skip(added)
+                return
+            target = self.snapshots.target(target)
+            snapshot_in = self.snapshots.path if self.snapshots.exists() else None
+            if self.hydrogen_manager.run(versions, target, snapshot_in, self.snapshots.new_path()):
+                self.snapshots.update(added, target)
+        else:
+            self.hydrogen_manager.run(self.compiler.versions_built, target)
 
 def run(args):
     commit_ids = [args.first_version, *args.latter_versions]
 
     # setup
-    hg=HydroGit(args.url, commit_ids, args.language)
+    checkout = args.checkout or ('copy' if args.local_dir else 'worktree')
+    hg=HydroGit(args.url, commit_ids, args.language,
+                args.cache_dir, args.cache_size if args.use_cache else None,
+                checkout, args.trace, args.dot, args.dot_gzip, args.append, args.scope, args.server,
+                args.step_timeout, args.timeout)
+    assert not (args.append and args.pairwise), '--append does not work with --pairwise'
+    assert not (args.append and args.scope is not None), '--append does not work with --scope'
+    assert not (args.append and args.server), '--append does not work with --server'
+    assert not (args.targets and args.target), '--targets replaces --target'
+    assert not (args.targets and args.pairwise), '--targets does not work with --pairwise'
+    assert not (args.targets and args.append), '--targets does not work with --append'
+    assert not (args.queue and (args.append or args.server or args.targets or args.incremental)), \
+        '--queue does not work with --append, --server, --targets or --incremental'
+    if not hg.git_commits:
+        print('The snapshot has all versions already')
+        return
+
+    try:
+        # clone, only to find the commits to skip when workers check out the versions
+        hg.clone(args.local_dir, args.keep_unchanged, not args.queue)
+        if not hg.git_commits:
+            print('None of the commits changes the sources')
+            if hg.snapshots:
+                hg.snapshots.skip(hg.skipped)
+            return
+
+        if args.queue:
+            hg.distribute(args.queue, args.local_dir, args.with_cmake, args.rule_name, args.target, args.retries)
+            return
 
-    # clone
-    hg.clone(args.local_dir)
+        if args.pairwise:
+            # pairs start on Hydrogen while later versions still build
+            hg.compile_pairwise(args.verbose, args.with_cmake, args.rule_name, args.jobs, args.incremental,
+                                args.target)
+            return
 
-    # fake compilation
-    hg.compile(args.verbose, args.with_cmake, args.rule_name)
+        # fake compilation
+        hg.compile(args.verbose, args.with_cmake, args.rule_name, args.jobs, args.incremental)
 
-    # hydrogen
-    hg.hydrogen()
+        # hydrogen
+        hg.hydrogen(args.jobs, args.target, args.targets)
+    finally:
+        # don't leave builds or Hydrogen running when stopped by an error or Ctrl-C
+        kill_running()
+        # keep the trace of a failed run too, it shows where it got to
+        hg.tracer.write()
 
 if __name__ == '__main__':
     args = get_args()
@@ -0,0 +1,116 @@
+from pathlib import Path
+import hashlib
+import os
+import re
+import shutil
+
+include_pattern = re.compile(r'^\s*#\s*include\s*[<"]([^>"]+)[>"]', re.MULTILINE)
+header_suffixes = {'.h', '.hh', '.hpp', '.hxx', '.def', '.inc'}
+source_suffixes = {
+    'C': {'.c'},
+    'CXX': {'.c', '.cc', '.cpp', '.cxx'},
+}
+object_suffixes = ['.o', '.lo']
+
+
+class TranslationUnitIndex:
+    '''
+    Content hashes of a version's translation units and the object files
+    make produced for them. A unit's hash covers its source and every header
+    of the tree it (transitively) includes, so an unchanged hash means the
+    previous version's objects can be reused as they are.
+    '''
+
+    def __init__(self, root, language):
+        self.root = root
+        self.language = language
+        self.headers = {}
+        self.hashes = {}
+        self.objects = {}
+
+    def scan(self):
+        '''
+        Hash all translation units. Run after configure so generated headers
+        like config.h are part of the hash.
+        '''
+        for p in self.root.rglob('*'):
+            if p.suffix in header_suffixes and p.is_file():
+                self.headers.setdefault(p.name, []).append(p)
+
+        header_hashes = {}
+        for p in self.root.rglob('*'):
+            if p.suffix in source_suffixes[self.language] and p.is_file():
+                rel = p.relative_to(self.root)
+                self.hashes[str(rel)] = self.hash_unit(p, header_hashes)
+
+    def hash_unit(self, source, header_hashes):
+        digest = hashlib.sha256()
+        seen = set()
+        pending = [source]
+        while pending:
+            current = pending.pop()
+            if current in seen:
+                continue
+            seen.add(current)
+            if current not in header_hashes:
+                data = current.read_bytes()
+                header_hashes[current] = (hashlib.sha256(data).hexdigest(),
+                                          self.includes(current, data))
+            file_hash, includes = header_hashes[current]
+            digest.update(str(current.relative_to(self.root)).encode())
+            digest.update(file_hash.encode())
+            pending.extend(includes)
+        return digest.hexdigest()
+
+    def includes(self, path, data):
+        '''
+        Headers of this tree that path includes. Names that could refer to
+        several headers pull in all of them.
+        '''
+        found = []
+        for name in include_pattern.findall(data.decode(errors='replace')):
+            local = path.parent / name
+            if local.is_file():
+                found.append(local)
+            else:
+                found.extend(self.headers.get(Path(name).name, []))
+        return found
+
+    def collect_objects(self):
+        '''
+        Record the objects built for each translation unit, after make ran
+        '''
+        for rel in self.hashes:
+            source = self.root / rel
+            stem = source.stem
+            objects = []
+            for directory in [source.parent, source.parent / '.libs']:
+                if not directory.is_dir():
+                    continue
+                for suffix in object_suffixes:
+                    objects.extend(directory.glob(f'{stem}{suffix}'))
+                    # automake prefixes per-target objects with the target name,
+                    # but foo-bar.o may just as well come from foo-bar.c
+                    objects.extend(
+                        o for o in directory.glob(f'*-{stem}{suffix}')
+                        if not (source.parent / f'{o.stem}{source.suffix}').exists())
+            self.objects[rel] = [o.relative_to(self.root) for o in objects]
+
+    def seed_from(self, previous):
+        '''
+        Copy objects of unchanged units from the previous version's tree and
+        make them newer than everything configure wrote, so make keeps them.
+        Returns the number of reused and rebuilt units.
+        '''
+        reused = 0
+        for rel, unit_hash in self.hashes.items():
+            objects = previous.objects.get(rel)
+            if not objects or previous.hashes.get(rel) != unit_hash:
+                continue
+            for obj in objects:
+                dest = self.root / obj
+                dest.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copyfile(previous.root / obj, dest)
+                os.utime(dest)
+            reused += 1
+        return reused, len(self.hashes) - reused
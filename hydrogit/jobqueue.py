@@ -0,0 +1,286 @@
+from abc import ABC, abstractmethod
+from argparse import ArgumentParser
+from contextlib import contextmanager
+from pathlib import Path
+import json
+import os
+import shutil
+import sqlite3
+import time
+import uuid
+
+job_kinds = ['build', 'pair']
+job_states = ['pending', 'running', 'done', 'failed']
+
+
+class JobQueue(ABC):
+    '''
+    The jobs of distributed runs and the files they produce. The coordinator
+    puts jobs on it and follows their state, workers take them, push their
+    artifacts and report back. Backends implement all of these methods,
+    see open_queue for how one is chosen.
+
+    A job is a dict with its id, run, kind, spec, state, attempts, worker,
+    result and error. A job whose worker fails goes back to pending until it
+    has been tried attempts times, then it is failed.
+    '''
+
+    @abstractmethod
+    def put(self, run, kind, spec, attempts=1):
+        '''
+        Add a job of kind with the JSON-able spec to run, returning its id
+        '''
+
+    @abstractmethod
+    def take(self, worker, kinds=None):
+        '''
+        Claim the oldest pending job of one of kinds for worker, or return
+        None if there is none
+        '''
+
+    @abstractmethod
+    def heartbeat(self, job):
+        '''
+        Tell the queue the worker of the job is still at it
+        '''
+
+    @abstractmethod
+    def finish(self, job, result):
+        '''
+        Mark the job done with the JSON-able result. Reports of an attempt
+        that was given up on, because its worker stopped responding, are
+        ignored.
+        '''
+
+    @abstractmethod
+    def fail(self, job, error):
+        '''
+        Record why the job failed, queueing it again if it has attempts left
+        '''
+
+    @abstractmethod
+    def jobs(self, run=None):
+        '''
+        The jobs of run, or of the latest run, in the order they were put
+        '''
+
+    @abstractmethod
+    def put_artifacts(self, job, root, paths):
+        '''
+        Store the files at paths, which lie under root, for this attempt at
+        the job and return where they are, for the job's result to record.
+        The files only become visible all at once, and only if the attempt
+        is still the job's current one, otherwise an AssertionError is
+        raised. Files of other attempts are left alone.
+        '''
+
+    @abstractmethod
+    def get_artifacts(self, location, dest):
+        '''
+        Copy the files put_artifacts stored at location to the same places
+        under dest, returning their paths
+        '''
+
+
+class SQLiteQueue(JobQueue):
+    '''
+    Queue in a directory every host can reach: the jobs in a SQLite database
+    and the artifacts of each job in a directory next to it. Several worker
+    processes on one machine can share it; for many hosts it needs a
+    filesystem with working locks.
+    '''
+
+    def __init__(self, path, stale_after=300):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.path / 'queue.db'
+        self.artifacts = self.path / 'artifacts'
+        # running jobs without a heartbeat for this long lost their worker
+        self.stale_after = stale_after
+        with self.connect() as db:
+            db.execute('''CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                run TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                spec TEXT NOT NULL,
+                state TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                max_attempts INTEGER NOT NULL,
+                worker TEXT,
+                result TEXT,
+                error TEXT,
+                updated REAL NOT NULL)''')
+
+    def __str__(self):
+        return str(self.path)
+
+    @contextmanager
+    def connect(self):
+        '''
+        A connection holding a write lock for the enclosed block, so that two
+        workers cannot claim the same job
+        '''
+        db = sqlite3.connect(str(self.db_path), timeout=60, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        try:
+            db.execute('BEGIN IMMEDIATE')
+            yield db
+            db.execute('COMMIT')
+        except BaseException:
+            # nothing to roll back if BEGIN itself timed out on the lock
+            if db.in_transaction:
+                db.execute('ROLLBACK')
+            raise
+        finally:
+            db.close()
+
+    def put(self, run, kind, spec, attempts=1):
+        assert kind in job_kinds, f'unknown job kind {kind}'
+        with self.connect() as db:
+            cursor = db.execute(
+                'INSERT INTO jobs (run, kind, spec, max_attempts, updated) VALUES (?, ?, ?, ?, ?)',
+                (run, kind, json.dumps(spec), attempts, time.time()))
+            return cursor.lastrowid
+
+    def take(self, worker, kinds=None):
+        kinds = kinds or job_kinds
+        with self.connect() as db:
+            self.requeue_stale(db)
+            row = db.execute(
+                f'SELECT id FROM jobs WHERE state = ? AND kind IN ({", ".join("?" * len(kinds))}) '
+                'ORDER BY id LIMIT 1', ['pending', *kinds]).fetchone()
+            if row is None:
+                return None
+            db.execute(
+                'UPDATE jobs SET state = ?, attempts = attempts + 1, worker = ?, error = NULL, updated = ? '
+                'WHERE id = ?', ('running', worker, time.time(), row['id']))
+            return self.job(db, row['id'])
+
+    def requeue_stale(self, db):
+        '''
+        Count running jobs whose worker stopped sending heartbeats as failed
+        '''
+        for row in db.execute('SELECT id FROM jobs WHERE state = ? AND updated < ?',
+                              ('running', time.time() - self.stale_after)).fetchall():
+            self.set_failed(db, row['id'], 'worker stopped responding')
+
+    def heartbeat(self, job):
+        with self.connect() as db:
+            db.execute('UPDATE jobs SET updated = ? WHERE id = ? AND state = ? AND attempts = ?',
+                       (time.time(), job['id'], 'running', job['attempts']))
+
+    def finish(self, job, result):
+        with self.connect() as db:
+            db.execute('UPDATE jobs SET state = ?, result = ?, updated = ? '
+                       'WHERE id = ? AND state = ? AND attempts = ?',
+                       ('done', json.dumps(result), time.time(), job['id'], 'running', job['attempts']))
+
+    def fail(self, job, error):
+        with self.connect() as db:
+            self.set_failed(db, job['id'], error, job['attempts'])
+
+    def set_failed(self, db, job_id, error, attempts=None):
+        # jobs with attempts left go back on the queue
+        db.execute(
+            'UPDATE jobs SET state = CASE WHEN attempts < max_attempts THEN ? ELSE ? END, '
+            'error = ?, updated = ? WHERE id = ? AND state = ? AND attempts = COALESCE(?, attempts)',
+            ('pending', 'failed', error, time.time(), job_id, 'running', attempts))
+
+    def job(self, db, job_id):
+        row = db.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        job = dict(row)
+        del job['updated']
+        job['spec'] = json.loads(job['spec'])
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        return job
+
+    def jobs(self, run=None):
+        with self.connect() as db:
+            if run is None:
+                latest = db.execute('SELECT run FROM jobs ORDER BY id DESC LIMIT 1').fetchone()
+                if latest is None:
+                    return []
+                run = latest['run']
+            return [self.job(db, row['id'])
+                    for row in db.execute('SELECT id FROM jobs WHERE run = ? ORDER BY id', (run,)).fetchall()]
+
+    def current(self, job):
+        '''
+        Whether the attempt of job is the one the queue waits for
+        '''
+        with self.connect() as db:
+            return db.execute('SELECT 1 FROM jobs WHERE id = ? AND state = ? AND attempts = ?',
+                              (job['id'], 'running', job['attempts'])).fetchone() is not None
+
+    def put_artifacts(self, job, root, paths):
+        location = f'{job["id"]}/{job["attempts"]}'
+        dest = self.artifacts / location
+        # copied aside first, the rename makes all files visible at once
+        staging = dest.with_name(f'{dest.name}.{uuid.uuid4().hex}.partial')
+        for path in paths:
+            target = staging / Path(path).relative_to(root)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(path, target)
+        staging.mkdir(parents=True, exist_ok=True)
+        if not self.current(job):
+            shutil.rmtree(staging)
+            raise AssertionError('the queue gave up on this attempt')
+        os.rename(staging, dest)
+        return location
+
+    def get_artifacts(self, location, dest):
+        source = self.artifacts / location
+        copied = []
+        for path in sorted(source.rglob('*')):
+            if path.is_file():
+                target = dest / path.relative_to(source)
+                target.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(path, target)
+                copied.append(target)
+        return copied
+
+
+queue_backends = {
+    'sqlite': SQLiteQueue,
+}
+
+
+def open_queue(spec):
+    '''
+    Open the queue spec names as BACKEND:LOCATION, e.g. sqlite:/shared/queue.
+    A plain path is a SQLite queue.
+    '''
+    backend, _, location = spec.partition(':')
+    if backend not in queue_backends:
+        backend, location = 'sqlite', spec
+    return queue_backends[backend](location)
+
+
+def format_jobs(jobs):
+    '''
+    One line per job: its id, kind, the commits it is about, state and worker
+    '''
+    lines = []
+    for job in jobs:
+        spec = job['spec']
+        subject = (spec['commit'][:8] if job['kind'] == 'build'
+                   else f'{spec["before"]["commit"][:8]}..{spec["after"]["commit"][:8]}')
+        line = f'{job["id"]:>5}  {job["kind"]:<5}  {subject:<18}  {job["state"]:<7}  ' \
+               f'attempt {job["attempts"]}/{job["max_attempts"]}'
+        if job['worker']:
+            line += f'  on {job["worker"]}'
+        if job['error']:
+            line += f'  ({job["error"]})'
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(
+        prog='python jobqueue.py',
+        description='Show the jobs of a distributed hydrogit run')
+    parser.add_argument('queue', help='queue the run was put on, e.g. sqlite:/shared/queue')
+    parser.add_argument('--run', dest='run', help='run to show (default: the latest)', default=None)
+    args = parser.parse_args()
+
+    print(format_jobs(open_queue(args.queue).jobs(args.run)))
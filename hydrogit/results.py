@@ -0,0 +1,156 @@
+from argparse import ArgumentParser
+from pathlib import Path
+import csv
+import json
+import re
+import sys
+
+text_patterns = {
+    'time': re.compile(r'Finished Building MVICFG in (\d+)ms'),
+    'nodes': re.compile(r'^Nodes: (\d+)', re.MULTILINE),
+    'edges': re.compile(r'^Edges: (\d+)', re.MULTILINE),
+    'paths': re.compile(r'^Version (\d+) (added|removed) (-?\d+) paths', re.MULTILINE),
+}
+table_columns = ['run', 'versions', 'time_ms', 'nodes', 'edges', 'paths_added', 'paths_removed']
+
+
+def parse_text(text):
+    '''
+    Read the old free text Result.txt into the same shape as Result.json
+    '''
+    result = {'args': [], 'timings_ms': {}, 'nodes': None, 'edges': None, 'versions': []}
+
+    lines = text.splitlines()
+    if len(lines) > 1 and lines[0].startswith('Input Args'):
+        result['args'] = lines[1].split()
+
+    match = text_patterns['time'].search(text)
+    if match:
+        result['timings_ms']['mvicfg'] = int(match.group(1))
+    for key in ['nodes', 'edges']:
+        match = text_patterns[key].search(text)
+        if match:
+            result[key] = int(match.group(1))
+
+    versions = {}
+    for version, kind, count in text_patterns['paths'].findall(text):
+        entry = versions.setdefault(int(version), {'version': int(version)})
+        entry[f'paths_{kind}'] = int(count)
+    result['versions'] = [versions[v] for v in sorted(versions)]
+    return result
+
+
+def load_runs(path):
+    '''
+    Load the runs in a Result.json or legacy Result.txt as (name, result)
+    pairs. A merged pairwise Result.json holds one run per pair, and one
+    merged with --targets one run per target.
+    '''
+    path = Path(path)
+    if path.suffix != '.json':
+        return [(str(path), parse_text(path.read_text()))]
+
+    data = json.loads(path.read_text())
+    if 'targets' in data:
+        return [(f'{path}:{target["target"]}', target['result'])
+                for target in data['targets'] if target['result'] is not None]
+    if 'pairs' not in data:
+        return [(str(path), data)]
+    return [(f'{path}:{pair["before"][:8]}..{pair["after"][:8]}', pair['result'])
+            for pair in data['pairs'] if pair['result'] is not None]
+
+
+def find_results(paths):
+    '''
+    Expand directories to the Result*.json files in them, falling back to
+    Result*.txt where there is no JSON file next to it
+    '''
+    found = []
+    for path in map(Path, paths):
+        if not path.is_dir():
+            found.append(path)
+            continue
+        json_files = sorted(path.rglob('Result*.json'))
+        found.extend(json_files)
+        found.extend(p for p in sorted(path.rglob('Result*.txt'))
+                     if p.with_suffix('.json') not in json_files)
+    return found
+
+
+class ResultTable:
+    '''
+    One row per Hydrogen run, with the per-version path deltas summed up
+    '''
+
+    def __init__(self):
+        self.rows = []
+
+    @classmethod
+    def from_paths(cls, paths):
+        table = cls()
+        for path in find_results(paths):
+            for name, result in load_runs(path):
+                table.add(name, result)
+        return table
+
+    def add(self, name, result):
+        versions = result.get('versions', [])
+        self.rows.append({
+            'run': name,
+            'versions': len(versions) + 1,
+            'time_ms': result.get('timings_ms', {}).get('mvicfg'),
+            'nodes': result.get('nodes'),
+            'edges': result.get('edges'),
+            'paths_added': sum(v.get('paths_added', 0) for v in versions),
+            'paths_removed': sum(v.get('paths_removed', 0) for v in versions),
+        })
+
+    def summary(self):
+        '''
+        Min, mean and max of the numeric columns over all runs
+        '''
+        summary = {}
+        for column in table_columns[1:]:
+            values = [row[column] for row in self.rows if row[column] is not None]
+            if values:
+                summary[column] = (min(values), sum(values) / len(values), max(values))
+        return summary
+
+    def format(self):
+        '''
+        The table as aligned text, followed by the summary
+        '''
+        cells = [table_columns] + [
+            ['' if row[c] is None else str(row[c]) for c in table_columns] for row in self.rows]
+        summary = self.summary()
+        for label, index in [('min', 0), ('mean', 1), ('max', 2)]:
+            cells.append([label] + [
+                f'{summary[c][index]:.1f}' if c in summary and index == 1 else
+                str(summary[c][index]) if c in summary else ''
+                for c in table_columns[1:]])
+
+        widths = [max(len(row[i]) for row in cells) for i in range(len(table_columns))]
+        return '\n'.join(
+            '  '.join(cell.ljust(width) if i == 0 else cell.rjust(width)
+                      for i, (cell, width) in enumerate(zip(row, widths)))
+            for row in cells)
+
+    def write_csv(self, out):
+        writer = csv.DictWriter(out, fieldnames=table_columns)
+        writer.writeheader()
+        writer.writerows(self.rows)
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(
+        prog='python results.py',
+        description='Tabulate Hydrogen Result.json (or legacy Result.txt) files')
+    parser.add_argument('paths', nargs='+', help='result files or directories to search')
+    parser.add_argument('--csv', dest='csv', action='store_true', help='write CSV instead of a text table')
+    args = parser.parse_args()
+
+    table = ResultTable.from_paths(args.paths)
+    if args.csv:
+        table.write_csv(sys.stdout)
+    else:
+        print(table.format())
@@ -0,0 +1,72 @@
+import json
+import os
+from git_stuff import mirror_name
+
+
+class SnapshotStore:
+    '''
+    The MVICFG snapshot Hydrogen left for a branch of a project, and the
+    versions that went into it. New versions of the branch are added to the
+    snapshot instead of rebuilding the MVICFG from the first version.
+    '''
+
+    def __init__(self, root, url, branch):
+        name = mirror_name(url)[:-len('.git')]
+        self.path = root / name / f'{branch.replace("/", "-")}.snap'
+        self.meta_path = self.path.with_suffix('.json')
+        self.meta = {'target': None, 'versions': []}
+        if self.meta_path.exists() and self.path.exists():
+            self.meta = json.loads(self.meta_path.read_text())
+
+    def exists(self):
+        return bool(self.meta['versions'])
+
+    def target(self, target=None):
+        '''
+        The target the snapshot was built for, which later runs have to keep
+        '''
+        known = self.meta['target']
+        assert not (known and target and known != target), \
+            f'the snapshot is for target {known}, not {target}'
+        return target or known
+
+    def last(self):
+        '''
+        The last version in the snapshot, new versions are compared with it
+        '''
+        return self.meta['versions'][-1] if self.exists() else None
+
+    def pending(self, commits):
+        '''
+        The commits that are not in the snapshot yet
+        '''
+        known = set(self.meta['versions'])
+        skipped = [c for c in commits if c in known]
+        if skipped:
+            print(f'Already in the snapshot: {" ".join(skipped)}')
+        return [c for c in commits if c not in known]
+
+    def skip(self, versions):
+        '''
+        Count versions without source changes as part of the snapshot, which
+        holds the same MVICFG for them as for the version before them
+        '''
+        self.meta['versions'] += versions
+        self.meta_path.write_text(json.dumps(self.meta, indent=2))
+
+    def new_path(self):
+        '''
+        Where Hydrogen writes the updated snapshot, moved into place by update
+        '''
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        return self.path.with_suffix('.snap.new')
+
+    def update(self, versions, target):
+        '''
+        Keep the snapshot Hydrogen wrote to new_path, now holding versions too
+        '''
+        os.replace(self.new_path(), self.path)
+        self.meta['target'] = target
+        self.meta['versions'] += versions
+        self.meta_path.write_text(json.dumps(self.meta, indent=2))
+        print(f'Snapshot of {len(self.meta["versions"])} versions written to {self.path}')
@@ -0,0 +1,267 @@
+from contextlib import contextmanager
+from pathlib import Path
+import json
+import os
+import resource
+import signal
+import subprocess
+import threading
+import time
+
+
+def self_peak_rss():
+    '''
+    Peak RSS of this process so far in KB
+    '''
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+running_groups = set()
+running_lock = threading.Lock()
+# set once hydrogit is stopping, no new steps are started after that
+stopping = threading.Event()
+
+
+def kill_group(pgid):
+    '''
+    Kill every process left in the process group
+    '''
+    try:
+        os.killpg(pgid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+def kill_running():
+    '''
+    Kill the process groups of all steps still running, e.g. when hydrogit
+    is interrupted while other threads wait on them
+    '''
+    with running_lock:
+        groups = list(running_groups)
+    for pgid in groups:
+        kill_group(pgid)
+
+
+def stop_running():
+    '''
+    Kill the steps still running and refuse to start new ones, so that the
+    threads running them give up instead of going on with their next step
+    '''
+    with running_lock:
+        stopping.set()
+    kill_running()
+
+
+@contextmanager
+def stop_on_error(pool):
+    '''
+    Leaving the with block of an executor waits for all its work, also the
+    queued work. If the enclosed block is left by an exception, e.g. Ctrl-C,
+    stop the running steps and drop the queued work instead.
+    '''
+    # shutdown only takes cancel_futures from Python 3.9 on, so the futures
+    # are kept to cancel them here (map submits through pool.submit as well)
+    futures = []
+    submit = pool.submit
+
+    def submit_tracked(*args, **kwargs):
+        future = submit(*args, **kwargs)
+        futures.append(future)
+        return future
+
+    pool.submit = submit_tracked
+    try:
+        yield pool
+    except BaseException:
+        stop_running()
+        for future in futures:
+            future.cancel()
+        pool.shutdown(wait=False)
+        raise
+
+
+@contextmanager
+def measured_process(args, timeout=None, **kwargs):
+    '''
+    Start a process for the enclosed block to talk to, e.g. through its
+    pipes, like run_measured does. Its pipes are closed when the block is
+    left, then it is waited for and gets a peak_rss in KB. If the block
+    raises, the process group is killed instead.
+    '''
+    if stopping.is_set():
+        raise subprocess.SubprocessError('hydrogit is stopping')
+    if timeout is not None and timeout <= 0:
+        raise subprocess.TimeoutExpired(args, 0)
+    proc = subprocess.Popen(args, start_new_session=True, **kwargs)
+    with running_lock:
+        running_groups.add(proc.pid)
+        stopped = stopping.is_set()
+    if stopped:
+        # started while stop_running was killing the others
+        kill_group(proc.pid)
+    expired = threading.Event()
+
+    def expire():
+        expired.set()
+        kill_group(proc.pid)
+
+    timer = threading.Timer(timeout, expire) if timeout is not None else None
+    try:
+        if timer:
+            timer.start()
+        try:
+            yield proc
+        finally:
+            for pipe in [proc.stdin, proc.stdout, proc.stderr]:
+                if pipe:
+                    pipe.close()
+        _, status, usage = os.wait4(proc.pid, 0)
+    except BaseException as error:
+        kill_group(proc.pid)
+        proc.wait()
+        # the block most likely failed because the process was killed
+        if isinstance(error, Exception) and stopping.is_set():
+            raise subprocess.SubprocessError('hydrogit is stopping') from error
+        if isinstance(error, Exception) and expired.is_set():
+            raise subprocess.TimeoutExpired(args, timeout) from error
+        raise
+    finally:
+        if timer:
+            timer.cancel()
+        with running_lock:
+            running_groups.discard(proc.pid)
+    # negative signal number for a killed process, like Popen.returncode
+    proc.returncode = -os.WTERMSIG(status) if os.WIFSIGNALED(status) else os.WEXITSTATUS(status)
+    proc.peak_rss = usage.ru_maxrss
+    if stopping.is_set():
+        raise subprocess.SubprocessError('hydrogit is stopping')
+    if expired.is_set():
+        raise subprocess.TimeoutExpired(args, timeout)
+
+
+def run_measured(args, timeout=None, **kwargs):
+    '''
+    Like subprocess.run (without capturing output), but also returns the
+    peak RSS in KB of the process and the children it waited for.
+    The process gets a process group of its own, which is killed as a whole
+    if it runs for more than timeout seconds, raising subprocess.TimeoutExpired.
+    '''
+    with measured_process(args, timeout, **kwargs) as proc:
+        pass
+    return subprocess.CompletedProcess(args, proc.returncode), proc.peak_rss
+
+
+class Deadline:
+    '''
+    Time limits of the steps of a run: each process may take step seconds,
+    and none may run past total seconds from the start of the run
+    '''
+
+    def __init__(self, step=None, total=None):
+        self.step = step
+        self.stop = time.monotonic() + total if total else None
+
+    def timeout(self):
+        '''
+        Seconds the next process may run, or None without a limit
+        '''
+        if self.stop is None:
+            return self.step
+        left = self.stop - time.monotonic()
+        return left if self.step is None else min(self.step, left)
+
+    def expired(self):
+        '''
+        Whether the run is past its total time
+        '''
+        return self.stop is not None and time.monotonic() >= self.stop
+
+
+class Tracer:
+    '''
+    Records the wall time and peak RSS of each pipeline stage and writes
+    them as a Chrome trace (chrome://tracing, Perfetto). Without a path the
+    stages are still timed, just never written.
+    '''
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path else None
+        self.events = []
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.pid = os.getpid()
+
+    @contextmanager
+    def span(self, name, version=None):
+        '''
+        Time the enclosed block as stage name of version. Its peak RSS is
+        the largest of the child processes run inside it, or of hydrogit
+        itself if it ran none.
+        '''
+        stack = self.local.__dict__.setdefault('stack', [])
+        frame = {'rss': 0}
+        stack.append(frame)
+        start = time.time()
+        try:
+            yield
+        finally:
+            stop = time.time()
+            stack.pop()
+            if stack:
+                stack[-1]['rss'] = max(stack[-1]['rss'], frame['rss'])
+            args = {'peak_rss_kb': frame['rss'] or self_peak_rss()}
+            if version:
+                args['version'] = version
+            self.add(name, start, stop, args)
+
+    def note_rss(self, rss):
+        '''
+        Report the peak RSS of a child process to the innermost open span
+        '''
+        stack = self.local.__dict__.get('stack')
+        if stack:
+            stack[-1]['rss'] = max(stack[-1]['rss'], rss)
+
+    def add(self, name, start, stop, args):
+        event = {
+            'name': name,
+            'cat': 'hydrogit',
+            'ph': 'X',
+            'ts': int(start * 1e6),
+            'dur': int((stop - start) * 1e6),
+            'pid': self.pid,
+            'tid': threading.get_native_id(),
+            'args': args,
+        }
+        with self.lock:
+            self.events.append(event)
+
+    def hydrogen_trace(self, name):
+        '''
+        Where Hydrogen should write its own trace for a run, or None when
+        not tracing
+        '''
+        if not self.path:
+            return None
+        return self.path.with_name(f'{self.path.stem}.{name}.json')
+
+    def merge(self, trace_file):
+        '''
+        Pull the events of a Hydrogen --trace file into this trace
+        '''
+        if not trace_file or not Path(trace_file).exists():
+            return
+        events = json.loads(Path(trace_file).read_text())['traceEvents']
+        with self.lock:
+            self.events.extend(events)
+
+    def write(self):
+        if not self.path:
+            return
+        meta = {'name': 'process_name', 'ph': 'M', 'pid': self.pid, 'args': {'name': 'hydrogit'}}
+        with self.lock:
+            events = [meta] + sorted(self.events, key=lambda e: e.get('ts', 0))
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps({'traceEvents': events}, indent=1))
+        print(f'Trace written to {self.path}')
@@ -0,0 +1,191 @@
+from argparse import ArgumentParser
+from pathlib import Path
+import os
+import shutil
+import socket
+import threading
+import time
+from cache import BytecodeCache
+from compilation import CompileManager, Version
+from git_stuff import GitManager
+from hydrogen import HydrogenAdapter
+from jobqueue import job_kinds, open_queue
+from tracing import Deadline, Tracer
+
+
+class Worker:
+    '''
+    Does the jobs of distributed hydrogit runs (see coordinator.py) that it
+    takes off a queue, in a directory of its own with its own mirrors and
+    bytecode cache. A build job pushes the *_hydrogit.bc of its version to
+    the queue, along with the root they were compiled in. A pair job checks
+    out its two versions, fetches their bytecode, runs Hydrogen on them and
+    pushes the reports back.
+    '''
+
+    def __init__(self, queue, workdir, name=None, kinds=None, hydrogen_binary=None, cache_size=None,
+                 step_timeout=None, verbose=False, heartbeat=30):
+        self.queue = queue
+        self.workdir = workdir
+        self.workdir.mkdir(parents=True, exist_ok=True)
+        self.name = name or f'{socket.gethostname()}-{os.getpid()}'
+        self.kinds = kinds or job_kinds
+        self.hydrogen_binary = hydrogen_binary
+        self.cache = None
+        if cache_size:
+            self.cache = BytecodeCache(workdir / 'cache', cache_size * 1024 * 1024)
+        self.step_timeout = step_timeout
+        self.verbose = verbose
+        self.heartbeat = heartbeat
+
+    def serve(self, idle_exit=None, poll=1.0):
+        '''
+        Do jobs until none came for idle_exit seconds, or forever without it
+        '''
+        print(f'{self.name}: taking {" and ".join(self.kinds)} jobs from {self.queue}')
+        idle_since = time.monotonic()
+        while True:
+            try:
+                job = self.queue.take(self.name, self.kinds)
+            except Exception as msg:
+                # e.g. the queue stayed locked, the job is still there next time
+                print(f'{self.name}: taking a job failed ({msg}), trying again')
+                time.sleep(poll)
+                continue
+            if job is None:
+                if idle_exit is not None and time.monotonic() - idle_since > idle_exit:
+                    print(f'{self.name}: no jobs for {idle_exit}s, stopping')
+                    return
+                time.sleep(poll)
+                continue
+            self.do(job)
+            idle_since = time.monotonic()
+
+    def do(self, job):
+        '''
+        Do one job and report to the queue how it went
+        '''
+        label = f'{self.name}: {job["kind"]} job {job["id"]}'
+        print(f'{label} started, attempt {job["attempts"]}')
+        stop = threading.Event()
+
+        def beat():
+            while not stop.wait(self.heartbeat):
+                try:
+                    self.queue.heartbeat(job)
+                except Exception as msg:
+                    # a missed heartbeat is fine, stopping them gets the job requeued
+                    print(f'{label}: heartbeat failed ({msg}), trying again')
+
+        threading.Thread(target=beat, daemon=True).start()
+        jobdir = self.workdir / f'job{job["id"]}'
+        try:
+            if job['kind'] == 'build':
+                result = self.build(job, jobdir)
+            else:
+                result = self.pair(job, jobdir)
+        except Exception as msg:
+            print(f'{label}: Error({msg})')
+            self.queue.fail(job, str(msg))
+            return False
+        finally:
+            stop.set()
+            if jobdir.exists():
+                shutil.rmtree(jobdir)
+        self.queue.finish(job, result)
+        print(f'{label} done')
+        return True
+
+    def checkout(self, spec, jobdir, commits, tracer, deadline):
+        '''
+        Check out the commits under jobdir from this worker's mirror
+        '''
+        git_manager = GitManager(spec['url'], jobdir, spec['checkout'], self.workdir / 'mirrors', tracer, deadline)
+        git_manager.clone(spec['local'])
+        git_manager.checkout_copy_versions(commits)
+
+    def build(self, job, jobdir):
+        '''
+        Build the version of a build job, returning the paths of its bytecode
+        relative to the version and where the queue keeps it
+        '''
+        spec = job['spec']
+        tracer = Tracer()
+        deadline = Deadline(self.step_timeout)
+        self.checkout(spec, jobdir, [spec['commit']], tracer, deadline)
+
+        log_path = None
+        if not self.verbose:
+            # kept after the job directory is gone, to see why a build failed
+            log_path = self.workdir / 'logs' / f'job{job["id"]}_{spec["commit"][:8]}.log'
+            log_path.parent.mkdir(parents=True, exist_ok=True)
+        compiler = CompileManager(spec['language'], jobdir, self.cache, tracer, deadline)
+        ver = compiler.build_version(jobdir / spec['commit'], self.verbose, spec['with_cmake'], spec['rule'],
+                                     log_path)
+        assert ver, f'build failed, see {log_path or "the output"} on {self.name}'
+
+        location = self.queue.put_artifacts(job, ver.root, ver.bc_paths)
+        return {'bc': [str(bc.relative_to(ver.root)) for bc in ver.bc_paths],
+                'root': str(ver.compile_root) if ver.compile_root else None, 'artifacts': location}
+
+    def pair(self, job, jobdir):
+        '''
+        Run Hydrogen on the two versions of a pair job, returning its result
+        and where the queue keeps its reports
+        '''
+        spec = job['spec']
+        tracer = Tracer()
+        deadline = Deadline(self.step_timeout)
+        before, after = spec['before'], spec['after']
+        self.checkout(spec, jobdir, [before['commit'], after['commit']], tracer, deadline)
+
+        versions = []
+        for side in [before, after]:
+            ver = Version(jobdir / side['commit'], spec['language'], tracer, deadline)
+            self.queue.get_artifacts(side['artifacts'], ver.root)
+            ver.compile_root = side.get('root')
+            ver.glob_files()
+            versions.append(ver)
+
+        hydrogen_manager = HydrogenAdapter(self.hydrogen_binary, tracer, spec['dot'], spec['dot_gzip'],
+                                           spec['scope'], deadline=deadline)
+        pair_dir = jobdir / 'pair'
+        pair_dir.mkdir()
+        result = hydrogen_manager.run_in(versions, spec['target'], pair_dir,
+                                         f'{before["commit"]} -> {after["commit"]}', after['commit'])
+        assert result is not None, f'Hydrogen failed, see hydrogen.log of job {job["id"]}'
+        location = self.queue.put_artifacts(job, pair_dir, [path for path in pair_dir.rglob('*') if path.is_file()])
+        return {'hydrogen': result, 'artifacts': location}
+
+
+if __name__ == '__main__':
+    wd = Path(__file__).parent.absolute()
+
+    parser = ArgumentParser(
+        prog='python worker.py',
+        description='Do the build and Hydrogen jobs of distributed hydrogit runs (see --queue of hydrogit.py)')
+    parser.add_argument('queue', help='queue to take jobs from, e.g. sqlite:/shared/queue')
+    parser.add_argument('--name', dest='name', help='name of this worker (default: host-pid)', default=None)
+    parser.add_argument('--workdir', dest='workdir',
+                        help='where to check out and build (default: hydrogit/workers/<name>)', default=None)
+    parser.add_argument('--only', dest='only', choices=job_kinds,
+                        help='only take build jobs, or only pair jobs', default=None)
+    parser.add_argument('--hydrogen', dest='hydrogen', help='Hydrogen binary (default: buildninja/Hydrogen.out)',
+                        default=str(wd / '../buildninja/Hydrogen.out'))
+    parser.add_argument('--no-cache', dest='use_cache', action='store_false',
+                        help='always rebuild instead of reusing cached bytecode', default=True)
+    parser.add_argument('--cache-size', dest='cache_size', type=int,
+                        help='size limit of the bytecode cache in MB', default=2048)
+    parser.add_argument('--step-timeout', dest='step_timeout', metavar='SECONDS', type=float,
+                        help='stop any process of a job that runs longer than this', default=None)
+    parser.add_argument('--idle-exit', dest='idle_exit', metavar='SECONDS', type=float,
+                        help='stop after this long without jobs, instead of waiting for more', default=None)
+    parser.add_argument('-v', '--verbose', dest='verbose', action='store_true',
+                        help='show build output instead of logging it to <workdir>/logs', default=False)
+    args = parser.parse_args()
+
+    name = args.name or f'{socket.gethostname()}-{os.getpid()}'
+    worker = Worker(open_queue(args.queue), Path(args.workdir or wd / 'workers' / name).absolute(), name,
+                    [args.only] if args.only else None, Path(args.hydrogen),
+                    args.cache_size if args.use_cache else None, args.step_timeout, args.verbose)
+    worker.serve(args.idle_exit)